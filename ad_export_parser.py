@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Active Directory Export Parser
+Streams LDIF (ldifde) and CSV (csvde, Get-ADObject) directory exports into object, group nesting and stale account counts for AWS directory sizing
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, Iterable, List, Optional
+
+from server_inventory_analyzer import HOURS_PER_MONTH
+
+# Accounts that have not logged on for this long (or never have) count as stale
+STALE_DAYS = 90
+# userAccountControl flags
+ACCOUNT_DISABLED = 0x2
+SERVER_TRUST_ACCOUNT = 0x2000
+# Windows FILETIME: 100 ns intervals since 1601-01-01
+FILETIME_EPOCH_OFFSET = 11_644_473_600
+# Entries are counted in batches of this many, so LDIF parsing never holds more than one batch
+BATCH_ENTRIES = 50_000
+
+# CSV header aliases (lower case) across csvde and PowerShell exports
+CSV_COLUMNS = {
+    'dn': ['dn', 'distinguishedname'],
+    'object_class': ['objectclass'],
+    'uac': ['useraccountcontrol'],
+    'enabled': ['enabled'],
+    'last_logon': ['lastlogontimestamp', 'lastlogondate', 'lastlogon'],
+    'member_of': ['memberof'],
+    'member': ['member', 'members'],
+}
+
+# AWS directory options: (size, hourly price per domain controller or directory, objects or users supported)
+MANAGED_AD_EDITIONS = [('Standard', 0.12, 30_000), ('Enterprise', 0.40, 500_000)]
+MANAGED_AD_MIN_DOMAIN_CONTROLLERS = 2
+# Additional Enterprise domain controllers beyond the two included, per this many directory objects
+OBJECTS_PER_DOMAIN_CONTROLLER = 250_000
+AD_CONNECTOR_SIZES = [('Small', 0.05, 500), ('Large', 0.125, 5_000)]
+SIMPLE_AD_SIZES = [('Small', 0.05, 500), ('Large', 0.15, 5_000)]
+
+
+class DirectoryExportParser:
+    def __init__(self, as_of: Optional[float] = None, stale_days: int = STALE_DAYS):
+        self.as_of = time.time() if as_of is None else as_of
+        self.stale_days = stale_days
+
+    def parse(self, source, file_name: Optional[str] = None, chunk_rows: int = 200_000) -> Dict:
+        """Summarize an LDIF or CSV export (path or file-like), choosing the format from the file name"""
+        file_name = file_name or getattr(source, 'name', str(source))
+        if os.path.splitext(file_name)[1].lower() == '.csv':
+            return self.parse_csv(source, chunk_rows)
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding='utf-8', errors='replace') as fh:
+                return self.parse_ldif(fh)
+        if isinstance(source.read(0), bytes):
+            source = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+        return self.parse_ldif(source)
+
+    def parse_ldif(self, lines: Iterable[str]) -> Dict:
+        """Summarize LDIF text line by line; only the attributes the summary needs are kept per entry"""
+        counts = _DirectoryCounts(self.as_of, self.stale_days)
+        batch = _EntryBatch()
+        entry, attribute, value, encoded = {}, None, None, False
+
+        for line in lines:
+            if line[:1] == ' ':
+                # Folded line: continues the previous value
+                if value is not None:
+                    value += line[1:].rstrip('\r\n')
+                continue
+            if value is not None:
+                self._keep(entry, attribute, self._decode(value) if encoded else value)
+                value = None
+            line = line.rstrip('\r\n')
+            if not line:
+                if entry:
+                    batch.add(entry)
+                    entry = {}
+                    if len(batch) >= BATCH_ENTRIES:
+                        counts.add(batch.frame())
+                        batch = _EntryBatch()
+                continue
+            name, _, rest = line.partition(':')
+            attribute = name.lower()
+            # Everything else, comments included, is skipped without building its value
+            if attribute not in LDIF_ATTRIBUTES:
+                continue
+            encoded = rest[:1] == ':'
+            value = rest[1:].strip() if encoded else rest.strip()
+        if value is not None:
+            self._keep(entry, attribute, self._decode(value) if encoded else value)
+        if entry:
+            batch.add(entry)
+        counts.add(batch.frame())
+        return counts.summary()
+
+    @staticmethod
+    def _keep(entry: Dict, attribute: str, value: str):
+        if attribute in MULTI_VALUED:
+            entry.setdefault(attribute, []).append(value)
+        else:
+            # objectClass is listed from 'top' down, so the last value is the most specific class
+            entry[attribute] = value
+
+    @staticmethod
+    def _decode(value: str) -> str:
+        """Value of an 'attribute:: base64' line"""
+        try:
+            return base64.b64decode(value).decode('utf-8', errors='replace')
+        except ValueError:
+            return ''
+
+    def parse_csv(self, source, chunk_rows: int = 200_000) -> Dict:
+        """Summarize a csvde or PowerShell CSV export chunk by chunk; multi-valued cells are ';'-separated"""
+        counts = _DirectoryCounts(self.as_of, self.stale_days)
+        for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+            columns = {column.lower(): column for column in chunk.columns}
+            frame = pd.DataFrame(index=chunk.index)
+            for field, aliases in CSV_COLUMNS.items():
+                column = next((columns[alias] for alias in aliases if alias in columns), None)
+                frame[field] = chunk[column] if column is not None else ''
+            # Without a logon column staleness is unknown, not 'never logged on'
+            if not any(alias in columns for alias in CSV_COLUMNS['last_logon']):
+                frame['last_logon'] = None
+            # csvde writes the most specific class only; PowerShell may write the full chain
+            frame['object_class'] = frame['object_class'].str.split(';').str[-1].str.strip()
+            for field in ('member_of', 'member'):
+                frame[field] = frame[field].str.split(';').map(lambda values: [v for v in values if v])
+            counts.add(frame)
+        return counts.summary()
+
+
+LDIF_ATTRIBUTES = {'dn', 'objectclass', 'useraccountcontrol', 'lastlogontimestamp', 'memberof', 'member'}
+MULTI_VALUED = {'memberof', 'member'}
+
+
+class _EntryBatch:
+    """Column lists for up to BATCH_ENTRIES parsed LDIF entries"""
+
+    def __init__(self):
+        self.columns: Dict[str, List] = {'dn': [], 'object_class': [], 'uac': [], 'enabled': [], 'last_logon': [],
+                                         'member_of': [], 'member': []}
+
+    def __len__(self) -> int:
+        return len(self.columns['dn'])
+
+    def add(self, entry: Dict[str, List[str]]):
+        columns = self.columns
+        columns['dn'].append(entry.get('dn', ''))
+        columns['object_class'].append(entry.get('objectclass', ''))
+        columns['uac'].append(entry.get('useraccountcontrol', ''))
+        columns['enabled'].append('')
+        columns['last_logon'].append(entry.get('lastlogontimestamp', ''))
+        columns['member_of'].append(entry.get('memberof', []))
+        columns['member'].append(entry.get('member', []))
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
+
+
+class _DirectoryCounts:
+    """Running totals; group links and the non-group objects seen are kept as 64-bit DN hashes, nothing else per
+    object survives a batch"""
+
+    def __init__(self, as_of: float, stale_days: int):
+        self.as_of = as_of
+        self.stale_days = stale_days
+        self.totals = {key: 0 for key in ('objects', 'users', 'enabled_users', 'disabled_users', 'stale_users',
+                                          'computers', 'stale_computers', 'domain_controllers', 'groups',
+                                          'group_policies', 'organizational_units', 'contacts')}
+        self.domains = set()
+        self._group_hashes: List[np.ndarray] = []
+        self._links: List[np.ndarray] = []
+        # Sorted DN hashes of every user, computer and other non-group object seen so far (8 bytes per object)
+        self._leaf_hashes = np.zeros(0, dtype=np.int64)
+
+    def add(self, batch: pd.DataFrame):
+        if not len(batch):
+            return
+        object_class = batch['object_class'].str.lower().to_numpy()
+        uac = pd.to_numeric(batch['uac'], errors='coerce').fillna(0).astype(np.int64).to_numpy()
+        enabled = batch['enabled'].str.lower().to_numpy()
+        disabled = ((uac & ACCOUNT_DISABLED) > 0) | (enabled == 'false')
+        stale = self._stale(batch['last_logon']) & ~disabled
+        dn = batch['dn'].str.lower()
+
+        is_user = object_class == 'user'
+        is_computer = object_class == 'computer'
+        is_group = object_class == 'group'
+        totals = self.totals
+        totals['objects'] += len(batch)
+        totals['users'] += int(is_user.sum())
+        totals['disabled_users'] += int((is_user & disabled).sum())
+        totals['enabled_users'] += int((is_user & ~disabled).sum())
+        totals['stale_users'] += int((is_user & stale).sum())
+        totals['computers'] += int(is_computer.sum())
+        # Domain controllers do not replicate lastLogonTimestamp for themselves, so they are never counted as stale
+        is_domain_controller = is_computer & (((uac & SERVER_TRUST_ACCOUNT) > 0)
+                                              | dn.str.contains('ou=domain controllers,', regex=False).to_numpy())
+        totals['stale_computers'] += int((is_computer & stale & ~is_domain_controller).sum())
+        totals['domain_controllers'] += int(is_domain_controller.sum())
+        totals['groups'] += int(is_group.sum())
+        totals['group_policies'] += int((object_class == 'grouppolicycontainer').sum())
+        totals['organizational_units'] += int((object_class == 'organizationalunit').sum())
+        totals['contacts'] += int((object_class == 'contact').sum())
+        # The domain is the DN from its first dc= component; RE2 in Arrow keeps this off the Python loop
+        domains = pc.struct_field(pc.extract_regex(pa.array(dn, pa.string()), r',(?P<domain>dc=.*)$'), [0])
+        self.domains.update(pc.unique(domains.drop_null()).to_pylist())
+
+        # Nesting links as (child, parent) DN hashes, from either side: memberOf on groups, member of groups.
+        # ldifde writes users and computers before the groups holding them, so members already seen as a non-group
+        # object are dropped and what is kept grows with the group-in-group links, not with the memberships
+        if not is_group.all():
+            # Both runs are already sorted, so the stable sort is a linear merge
+            leaves = np.sort(self._hash(dn[~is_group]))
+            self._leaf_hashes = np.sort(np.concatenate([self._leaf_hashes, leaves]), kind='stable')
+        groups = batch.loc[is_group]
+        self._group_hashes.append(self._hash(dn[is_group]))
+        member_of = groups['member_of'].explode().dropna()
+        members = groups['member'].explode().dropna()
+        member_hashes = self._hash(members)
+        known_leaf = self._contains(self._leaf_hashes, member_hashes)
+        self._links.append(np.column_stack([self._hash(dn[member_of.index]), self._hash(member_of)]))
+        self._links.append(np.column_stack([member_hashes, self._hash(dn[members.index])])[~known_leaf])
+
+    def summary(self) -> Dict:
+        summary = dict(self.totals)
+        depth, circular, nested = self._nesting_depth()
+        summary.update({
+            'domains': sorted(self.domains),
+            'nested_groups': nested,
+            'max_nesting_depth': depth,
+            'circular_nesting': circular,
+            'stale_days': self.stale_days,
+        })
+        return summary
+
+    def _nesting_depth(self):
+        """(longest acyclic chain of nested groups, whether nesting loops, groups inside another group); a group with
+        no group members is depth 1"""
+        group_hashes = np.unique(np.concatenate(self._group_hashes)) if self._group_hashes else np.zeros(0, np.int64)
+        if not len(group_hashes):
+            return 0, False, 0
+        links = np.unique(np.concatenate(self._links), axis=0)
+        index = pd.Index(group_hashes)
+        child, parent = index.get_indexer(links[:, 0]), index.get_indexer(links[:, 1])
+        keep = (child >= 0) & (parent >= 0) & (child != parent)
+        child, parent = child[keep], parent[keep]
+        nested = len(np.unique(child))
+
+        # Layered from the leaves: a group sits one above its deepest nested group once all of them are placed.
+        # Groups never placed are on a cycle or contain one, and are left out of the depth
+        depth = np.zeros(len(group_hashes), dtype=np.int64)
+        pending = np.bincount(parent, minlength=len(group_hashes))
+        layer = np.flatnonzero(pending == 0)
+        level = 0
+        while len(layer):
+            level += 1
+            depth[layer] = level
+            in_layer = np.zeros(len(group_hashes), dtype=bool)
+            in_layer[layer] = True
+            parents = parent[in_layer[child]]
+            pending -= np.bincount(parents, minlength=len(group_hashes))
+            parents = np.unique(parents)
+            layer = parents[pending[parents] == 0]
+        return int(depth.max()), bool((depth == 0).any()), nested
+
+    def _stale(self, last_logon: pd.Series) -> np.ndarray:
+        """Never logged on, or last logon more than stale_days before as_of; FILETIME or date text, null if unknown"""
+        known = last_logon.notna().to_numpy()
+        last_logon = last_logon.fillna('')
+        numeric = pd.to_numeric(last_logon, errors='coerce')
+        seconds = numeric / 1e7 - FILETIME_EPOCH_OFFSET
+        text = last_logon[numeric.isna() & (last_logon != '')]
+        if len(text):
+            dates = pd.to_datetime(text, errors='coerce', utc=True)
+            seconds[text.index] = (dates - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+        seconds = seconds.where(numeric.fillna(1) > 0)
+        return known & (seconds.isna() | (seconds < self.as_of - self.stale_days * 86_400)).to_numpy()
+
+    @staticmethod
+    def _contains(sorted_hashes: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+        """Membership by binary search, so the sorted set is neither copied nor re-sorted per batch"""
+        if not len(sorted_hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+        return sorted_hashes[positions] == hashes
+
+    @staticmethod
+    def _hash(dn: pd.Series) -> np.ndarray:
+        return pd.util.hash_pandas_object(dn.astype('str').str.lower(), index=False).to_numpy().view(np.int64)
+
+
+def recommend_directory_service(summary: Dict) -> pd.DataFrame:
+    """AWS Managed Microsoft AD, AD Connector and Simple AD sized for a parsed directory"""
+    users = summary['enabled_users'] - summary['stale_users']
+    objects = summary['objects']
+
+    edition, price, limit = next((option for option in MANAGED_AD_EDITIONS if objects <= option[2]), MANAGED_AD_EDITIONS[-1])
+    controllers = MANAGED_AD_MIN_DOMAIN_CONTROLLERS + max(0, -(-(objects - limit) // OBJECTS_PER_DOMAIN_CONTROLLER))
+    managed_note = f"{edition}, {controllers} DCs" + (" (over edition guidance)" if objects > limit else '')
+
+    size, connector_price, connector_limit = next((option for option in AD_CONNECTOR_SIZES if users <= option[2]),
+                                                  AD_CONNECTOR_SIZES[-1])
+    connectors = max(1, -(-users // connector_limit))
+
+    # Simple AD is sized for reference only: FSx for Windows File Server cannot join it
+    simple = next((option for option in SIMPLE_AD_SIZES if users <= option[2]), None)
+
+    return pd.DataFrame({
+        'Option': ['AWS Managed Microsoft AD', 'AD Connector', 'Simple AD'],
+        'Best For': ['New AWS workloads', 'Hybrid scenarios', 'Basic needs only'],
+        'Size': [managed_note, f"{connectors} x {size}", simple[0] if simple else f"> {SIMPLE_AD_SIZES[-1][2]:,} users"],
+        'Cost/Month': [controllers * price * HOURS_PER_MONTH, connectors * connector_price * HOURS_PER_MONTH,
+                       simple[1] * HOURS_PER_MONTH if simple else np.nan],
+        'Features': ['Full AD features', 'Proxy to on-premises', 'Basic LDAP'],
+        'Recommendation': ['✅ Recommended', '⚠️ Consider', '❌ Not suitable'],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize an Active Directory LDIF or CSV export')
+    parser.add_argument('export', help='ldifde .ldf/.ldif or csvde/PowerShell .csv export')
+    parser.add_argument('--stale-days', type=int, default=STALE_DAYS, help='Days without logon before an account is stale')
+    args = parser.parse_args()
+
+    summary = DirectoryExportParser(stale_days=args.stale_days).parse(args.export)
+    print(json.dumps(summary, indent=2))
+    print(recommend_directory_service(summary).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
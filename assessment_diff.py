@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Assessment Diff
+What changed between two assessment runs: added and removed servers, new instance types and cost deltas, matched on Server_Name with row fingerprints
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict
+
+from chart_data import COST_COLUMNS
+from incremental_inventory import latest_rows, row_fingerprints
+
+CHANGE_TYPES = ['Added', 'Removed', 'Instance Changed', 'Cost Changed', 'Attributes Changed']
+COMPONENTS = ['Compute', 'License', 'Storage', 'Total']
+REQUIRED_COLUMNS = ['Recommended_Instance', 'Instance_Family'] + COST_COLUMNS
+# Cost differences below half a cent are rounding, not a change
+COST_TOLERANCE = 0.005
+
+
+class AssessmentDiff:
+    """Matches servers with one Arrow hash lookup and compares them by row fingerprint, so the run time grows
+    linearly with the fleet and only changed rows are looked at column by column"""
+
+    def __init__(self, key: str = 'Server_Name'):
+        self.key = key
+
+    def compare(self, before: pd.DataFrame, after: pd.DataFrame) -> Dict:
+        """Per-server changes from before to after, with totals per change type, cost component and instance family"""
+        for name, frame in (('before', before), ('after', after)):
+            missing = [column for column in [self.key] + REQUIRED_COLUMNS if column not in frame]
+            if missing:
+                raise ValueError(f"The {name} assessment is missing {', '.join(missing)}")
+        # A server listed twice is represented by its last row, as when an inventory is refreshed
+        before_latest, after_latest = latest_rows(before[self.key]), latest_rows(after[self.key])
+        duplicates = int((~before_latest).sum() + (~after_latest).sum())
+        before = before if before_latest.all() else before[before_latest]
+        after = after if after_latest.all() else after[after_latest]
+
+        lookup = pc.index_in(pa.array(after[self.key].astype(str)), value_set=pa.array(before[self.key].astype(str)))
+        lookup = lookup.to_numpy(zero_copy_only=False)
+        matched = ~np.isnan(lookup) if lookup.dtype.kind == 'f' else np.ones(len(lookup), dtype=bool)
+        after_rows = np.flatnonzero(matched)
+        before_rows = lookup[matched].astype(np.intp)
+        kept = np.zeros(len(before), dtype=bool)
+        kept[before_rows] = True
+
+        # Columns only one run has (a newer release adding a field) are left out, so they do not flag every row
+        shared = [column for column in before.columns if column in after.columns]
+        changed = row_fingerprints(before[shared], exclude=[self.key])[before_rows] \
+            != row_fingerprints(after[shared], exclude=[self.key])[after_rows]
+        before_rows, after_rows = before_rows[changed], after_rows[changed]
+
+        before_instance = before['Recommended_Instance'].iloc[before_rows].to_numpy(dtype=object)
+        after_instance = after['Recommended_Instance'].iloc[after_rows].to_numpy(dtype=object)
+        before_cost = before['Estimated_Monthly_Cost'].iloc[before_rows].to_numpy(dtype=np.float64)
+        after_cost = after['Estimated_Monthly_Cost'].iloc[after_rows].to_numpy(dtype=np.float64)
+        change = np.where(before_instance != after_instance, 'Instance Changed',
+                          np.where(np.abs(after_cost - before_cost) >= COST_TOLERANCE, 'Cost Changed', 'Attributes Changed'))
+
+        added = after.iloc[np.flatnonzero(~matched)]
+        removed = before.iloc[np.flatnonzero(~kept)]
+        changes = pd.concat([
+            self._changes(added[self.key], 'Added', None, added['Recommended_Instance'],
+                          np.nan, added['Estimated_Monthly_Cost']),
+            self._changes(removed[self.key], 'Removed', removed['Recommended_Instance'], None,
+                          removed['Estimated_Monthly_Cost'], np.nan),
+            self._changes(after[self.key].iloc[after_rows], change, before_instance, after_instance,
+                          before_cost, after_cost),
+        ], ignore_index=True)
+        changes['Change'] = pd.Categorical(changes['Change'], CHANGE_TYPES)
+        changes = changes.sort_values('Cost_Delta', key=np.abs, ascending=False, kind='stable', ignore_index=True)
+
+        by_change = changes.groupby('Change', observed=False)['Cost_Delta'].agg(['size', 'sum'])
+        by_change = pd.DataFrame({'Change': CHANGE_TYPES + ['Unchanged'],
+                                  'Servers': list(by_change['size']) + [int((~changed).sum())],
+                                  'Cost Delta': list(by_change['sum'].round(2)) + [0.0]})
+        moves = changes[changes['Change'] == 'Instance Changed']
+        return {
+            'changes': changes,
+            'by_change': by_change,
+            'by_component': self._by_component(before, after),
+            'by_family': self._by_family(before, after),
+            'instance_moves': moves.groupby(['Before_Instance', 'After_Instance'], sort=False)['Cost_Delta']
+                                   .agg(Servers='size', Cost_Delta='sum').round(2).reset_index()
+                                   .sort_values('Servers', ascending=False, kind='stable', ignore_index=True),
+            'duplicates': duplicates,
+        }
+
+    def _changes(self, names, change, before_instance, after_instance, before_cost, after_cost) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            self.key: np.asarray(names, dtype=object),
+            'Change': change,
+            'Before_Instance': before_instance,
+            'After_Instance': after_instance,
+            'Before_Monthly_Cost': before_cost,
+            'After_Monthly_Cost': after_cost,
+        })
+        frame['Cost_Delta'] = (frame['After_Monthly_Cost'].fillna(0) - frame['Before_Monthly_Cost'].fillna(0)).round(2)
+        return frame
+
+    @staticmethod
+    def _by_component(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+        """Fleet monthly cost per component in each run"""
+        table = pd.DataFrame({'Component': COMPONENTS,
+                              'Before': before[COST_COLUMNS].sum().to_numpy(),
+                              'After': after[COST_COLUMNS].sum().to_numpy()})
+        table['Change'] = table['After'] - table['Before']
+        table['Change (%)'] = np.divide(table['Change'] * 100, table['Before'],
+                                        out=np.full(len(table), np.nan), where=table['Before'].to_numpy() != 0)
+        return table.round(2)
+
+    @staticmethod
+    def _by_family(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+        """Servers and monthly cost per instance family in each run, largest change first"""
+        sides = [frame.groupby('Instance_Family')['Estimated_Monthly_Cost'].agg(['size', 'sum'])
+                 for frame in (before, after)]
+        table = pd.concat(sides, axis=1, keys=['Before', 'After']).fillna(0)
+        table = pd.DataFrame({
+            'Instance_Family': table.index,
+            'Servers Before': table[('Before', 'size')].astype(np.int64).to_numpy(),
+            'Servers After': table[('After', 'size')].astype(np.int64).to_numpy(),
+            'Before': table[('Before', 'sum')].to_numpy(),
+            'After': table[('After', 'sum')].to_numpy(),
+        })
+        table['Change'] = table['After'] - table['Before']
+        return table.round(2).sort_values('Change', key=np.abs, ascending=False, kind='stable', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the per-server results of two assessment runs')
+    parser.add_argument('before', help='Earlier recommendations CSV or Parquet (e.g. a job\'s recommendations.parquet)')
+    parser.add_argument('after', help='Later recommendations CSV or Parquet')
+    parser.add_argument('--key', default='Server_Name', help='Column identifying a server in both runs')
+    parser.add_argument('--output', help='Write the per-server changes to this CSV')
+    args = parser.parse_args()
+
+    before, after = (pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+                     for path in (args.before, args.after))
+    diff = AssessmentDiff(args.key).compare(before, after)
+    print(diff['by_change'].to_string(index=False))
+    print()
+    print(diff['by_component'].to_string(index=False))
+    if args.output:
+        diff['changes'].to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
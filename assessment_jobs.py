@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Assessment Jobs
+Resumable stages of the MAP analysis, run by job_queue workers; each stage persists its artifacts in the job directory
+"""
+
+import json
+import os
+import pandas as pd
+from typing import Dict
+
+from chart_data import cost_by_family
+from inventory_validation import InventoryValidator
+from report_export import ReportExporter
+from server_inventory_analyzer import ServerInventoryAnalyzer
+
+
+def _read_frame(job_dir: str, name: str) -> pd.DataFrame:
+    return pd.read_parquet(os.path.join(job_dir, f"{name}.parquet"))
+
+
+def _write_frame(job_dir: str, name: str, df: pd.DataFrame):
+    path = os.path.join(job_dir, f"{name}.parquet")
+    df.to_parquet(f"{path}.tmp", index=False)
+    # A worker killed mid-write leaves no partial artifact for the resumed stage to trust
+    os.replace(f"{path}.tmp", path)
+
+
+def _write_json(job_dir: str, name: str, data: Dict):
+    path = os.path.join(job_dir, f"{name}.json")
+    with open(f"{path}.tmp", 'w') as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def validate_inventory(job_dir: str, params: Dict):
+    _write_json(job_dir, 'validation', InventoryValidator().validate(_read_frame(job_dir, 'inventory')))
+
+
+def size_inventory(job_dir: str, params: Dict):
+    recommendations = ServerInventoryAnalyzer().analyze_inventory_dataframe(_read_frame(job_dir, 'inventory'))
+    _write_frame(job_dir, 'recommendations', recommendations)
+
+
+def estimate_costs(job_dir: str, params: Dict):
+    recommendations = _read_frame(job_dir, 'recommendations')
+    _write_json(job_dir, 'summary', ServerInventoryAnalyzer().summarize(recommendations))
+    _write_frame(job_dir, 'cost_by_family', cost_by_family(recommendations))
+
+
+def plan_migration(job_dir: str, params: Dict):
+    recommendations = _read_frame(job_dir, 'recommendations')
+    _write_json(job_dir, 'migration', {
+        'servers_by_complexity': recommendations['Migration_Complexity'].value_counts().to_dict(),
+        'servers_by_storage': recommendations['Recommended_Storage'].value_counts().to_dict(),
+    })
+
+
+def prepare_reports(job_dir: str, params: Dict):
+    """Pre-build the large downloads in the shared export cache so the results page serves them immediately"""
+    recommendations = _read_frame(job_dir, 'recommendations')
+    exporter = ReportExporter(params.get('export_cache_dir', '.toolkit_cache/exports'))
+    fmt = params.get('export_format', 'csv')
+    exporter.export("Technical Details", {'Server Recommendations': recommendations}, fmt)
+    exporter.export("Cost Model", {'Server Costs': recommendations,
+                                   'Cost by Family': _read_frame(job_dir, 'cost_by_family')}, fmt)
+
+
+# Labels match the progress messages shown in Step 4 of the MAP wizard
+MAP_ASSESSMENT_STAGES = [
+    ("Analyzing server inventory...", validate_inventory),
+    ("Mapping to AWS services...", size_inventory),
+    ("Calculating cost estimates...", estimate_costs),
+    ("Generating recommendations...", plan_migration),
+    ("Creating reports...", prepare_reports),
+]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Assessment Benchmark Suite
+Times every assessment stage on synthetic fleets and compares against a stored baseline
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # 1k, 100k and 1M servers
+    python benchmarks/run_benchmarks.py --sizes 1000 100000  # quicker run
+    python benchmarks/run_benchmarks.py --save-baseline      # record current numbers as the baseline
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assessment_diff import AssessmentDiff
+from cashflow_engine import CashflowEngine
+from chart_data import COST_COLUMNS, category_counts, cost_by_family
+from consolidation_planner import ConsolidationPlanner
+from cost_simulation import CostSimulator
+from fleet_generator import FleetGenerator
+from inventory_validation import InventoryValidator
+from licensing_calculator import LicensingCalculator
+from scenario_engine import CostScenarioEngine
+from server_inventory_analyzer import ServerInventoryAnalyzer
+from spot_scoring import SpotScorer
+from storage_analyzer import StorageAnalyzer
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def build_stages(n_servers: int) -> List[tuple]:
+    """(stage name, callable) pairs; inputs are prepared here so only the stage itself is timed"""
+    fleet = FleetGenerator(seed=42)
+    inventory = fleet.server_inventory(n_servers)
+    csv_bytes = inventory.to_csv(index=False).encode()
+    file_servers = fleet.file_servers(n_servers)
+    analyzer = ServerInventoryAnalyzer()
+    recommendations = analyzer.analyze_inventory_dataframe(inventory)
+    scenario = CostScenarioEngine(inventory)
+    scenario.get('cost_model')
+    coverage = iter(np.linspace(0.01, 1, 10_000))
+    storage_gb = inventory['Storage_GB'].to_numpy(dtype=float)
+    storage_type = inventory['Storage_Type']
+    # The OLA layout carries SQL Server editions, so every licensing model is exercised
+    ola_inventory = fleet.multiplatform_inventory(n_servers)
+    ola_sizing = analyzer.analyze_inventory_dataframe(ola_inventory)
+    calculator = LicensingCalculator()
+    ola_licensing = calculator.license_costs(ola_inventory, ola_sizing)
+    # A later run after a 5% price change: every server's cost differs, the worst case for the diff
+    repriced = recommendations.assign(**{column: recommendations[column] * 1.05 for column in COST_COLUMNS})
+
+    def what_if():
+        # Everything downstream of the sizing node, as a slider change would trigger it
+        scenario.set_input('hybrid_benefit_coverage', next(coverage))
+        return scenario.get('cost_model')
+
+    def cashflow():
+        # Building the per-server prefix sums, then a grid of growth x ramp x RI term scenarios
+        server_costs = scenario.get('server_costs')
+        engine = CashflowEngine(server_costs['Lift_And_Shift_Monthly_Cost'], server_costs['Optimized_Monthly_Cost'],
+                                scenario.get('reserved_compute'), 1_200.0)
+        return engine.evaluate(5, np.array([0.0, 0.05, 0.1])[:, None, None], 0.08,
+                               np.array([3, 6, 12])[None, :, None], np.array([0, 12, 36])[None, None, :])
+
+    return [
+        ('parsing', lambda: pd.read_csv(io.BytesIO(csv_bytes))),
+        ('validation', lambda: InventoryValidator().validate(inventory)),
+        ('sizing', lambda: analyzer.analyze_inventory_dataframe(inventory)),
+        ('storage_recommendations', lambda: (analyzer.recommend_storage_type(storage_gb, storage_type),
+                                             StorageAnalyzer().recommend_fsx(file_servers))),
+        ('licensing', lambda: calculator.savings_by_license(calculator.license_costs(ola_inventory, ola_sizing))),
+        ('consolidation', lambda: ConsolidationPlanner().plan(ola_inventory, ola_licensing)),
+        ('what_if', what_if),
+        ('cashflow', cashflow),
+        ('cost_simulation', lambda: CostSimulator().simulate(ola_inventory, ola_sizing, trials=10_000)),
+        ('spot_scoring', lambda: SpotScorer().summarize(SpotScorer().score(ola_inventory, ola_sizing))),
+        ('region_comparison', lambda: analyzer.compare_regions(recommendations, 'eu-west-1')),
+        ('assessment_diff', lambda: AssessmentDiff().compare(recommendations, repriced)),
+        ('aggregation', lambda: (analyzer.summarize(recommendations), cost_by_family(recommendations))),
+        ('chart_data', lambda: (category_counts(inventory['OS'], 'OS'),
+                                category_counts(recommendations['Recommended_Instance'], 'Instance'))),
+    ]
+
+
+def measure(stage: Callable, repeat: int) -> Dict:
+    """Best wall time over `repeat` runs, then one traced run for peak Python/NumPy allocation"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_mb': peak / 2**20}
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for n_servers in sizes:
+        for stage_name, stage in build_stages(n_servers):
+            result = measure(stage, repeat)
+            result['rows_per_second'] = n_servers / result['seconds'] if result['seconds'] else float('inf')
+            results[f"{stage_name}@{n_servers}"] = result
+    return results
+
+
+def report(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold_pct: float, min_seconds: float) -> List[str]:
+    """Print the results table and return the stages slower than the baseline by more than threshold_pct"""
+    regressions = []
+    print(f"{'stage':<34}{'seconds':>10}{'rows/s':>14}{'peak MB':>10}{'vs baseline':>13}")
+    for key, result in results.items():
+        delta = ''
+        if key in baseline:
+            change = (result['seconds'] / baseline[key]['seconds'] - 1) * 100
+            delta = f"{change:+.1f}%"
+            # Sub-millisecond stages are dominated by timer noise
+            if change > threshold_pct and result['seconds'] >= min_seconds:
+                regressions.append(key)
+                delta += ' !'
+        print(f"{key:<34}{result['seconds']:>10.4f}{result['rows_per_second']:>14,.0f}{result['peak_mb']:>10.1f}{delta:>13}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every assessment stage on synthetic fleets")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with this run")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Regression threshold in percent")
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help="Ignore regressions on stages faster than this")
+    parser.add_argument('--output', help="Also write this run's results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)['results']
+    regressions = report(results, baseline, args.threshold, args.min_seconds)
+
+    document = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                'machine': platform.machine(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(document, fh, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            json.dump(document, fh, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"Regressions over {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Bitmap Facet Index
+Packed per-value bitmaps over categorical inventory columns; facet filters and counts are bitwise word operations
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+# Columns results are usually sliced by, in the order the filters are shown
+FACET_COLUMNS = ['OS', 'Platform_Category', 'Workload_Type', 'Environment', 'Storage_Type']
+# Columns with more distinct values than this are not indexed (one bitmap per value)
+MAX_BITMAP_VALUES = 256
+
+
+class BitmapIndex:
+    """Built once per dataset; a bitmap holds one bit per row, 64 rows to a word"""
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[str] = FACET_COLUMNS):
+        self.n_rows = len(df)
+        self.n_words = (self.n_rows + 63) // 64
+        self._values: Dict[str, pd.Index] = {}
+        self._bitmaps: Dict[str, np.ndarray] = {}
+        for column in columns:
+            if column not in df:
+                continue
+            codes, uniques = pd.factorize(df[column], sort=True)
+            if len(uniques) > MAX_BITMAP_VALUES:
+                continue
+            self._values[column] = pd.Index(uniques)
+            self._bitmaps[column] = np.stack([self._pack(codes == code) for code in range(len(uniques))]) \
+                if len(uniques) else np.zeros((0, self.n_words), dtype=np.uint64)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._bitmaps)
+
+    def values(self, column: str) -> pd.Index:
+        return self._values[column]
+
+    def all(self) -> np.ndarray:
+        """Bitmap with every row set"""
+        return self._pack(np.ones(self.n_rows, dtype=bool))
+
+    def select(self, facets: Dict[str, Sequence]) -> np.ndarray:
+        """Rows matching any selected value within a column and every filtered column (OR within, AND across)"""
+        selection = self.all()
+        for column, selected in facets.items():
+            positions = self._values[column].get_indexer(pd.Index(list(selected)))
+            selection &= np.bitwise_or.reduce(self._bitmaps[column][positions[positions >= 0]], axis=0,
+                                              initial=np.uint64(0))
+        return selection
+
+    def contains(self, column: str, text: str, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows whose value contains text (case-insensitive); scans the distinct values, not the rows"""
+        hits = self._values[column].astype(str).str.contains(text, case=False, regex=False)
+        bitmap = np.bitwise_or.reduce(self._bitmaps[column][np.flatnonzero(hits)], axis=0, initial=np.uint64(0))
+        return bitmap if within is None else bitmap & within
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(np.bitwise_count(bitmap).sum())
+
+    def counts(self, column: str, within: Optional[np.ndarray] = None) -> pd.Series:
+        """Rows per value of the column, optionally inside a selection"""
+        bitmaps = self._bitmaps[column] if within is None else self._bitmaps[column] & within
+        return pd.Series(np.bitwise_count(bitmaps).sum(axis=1, dtype=np.int64), index=self._values[column])
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        """Row positions set in the bitmap, ascending"""
+        return np.flatnonzero(np.unpackbits(bitmap.view(np.uint8), count=self.n_rows, bitorder='little'))
+
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        words = np.zeros(self.n_words * 8, dtype=np.uint8)
+        packed = np.packbits(mask, bitorder='little')
+        words[:len(packed)] = packed
+        return words.view('<u8')
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Multi-year Cash-flow Engine
+Monthly cost projections with growth, migration ramp, dual running and Reserved Instance upfronts; NPV, payback and ROI for many scenarios at once
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+# Defaults for the business case
+HORIZON_YEARS = 3
+DISCOUNT_RATE = 0.08
+GROWTH_RATE = 0.05
+MIGRATION_MONTHS = 6
+# One-time labour and tooling per migrated server
+MIGRATION_COST_PER_SERVER = 1_200.0
+# Partial upfront Reserved Instances pay about half the term up front; the rest is billed monthly
+RI_UPFRONT_SHARE = 0.5
+RI_TERM_MONTHS = {
+    'On-Demand': 0,
+    '1-year': 12,
+    '3-year': 36,
+}
+
+
+class CashflowEngine:
+    """Per-server monthly costs before and after migration, projected month by month
+
+    Servers migrate in order of monthly savings, the largest first, spread evenly over the ramp. Each server runs on
+    both sides in its migration month. Servers are summed into prefix sums once, so every scenario reads a migration
+    wave's totals at two positions instead of touching each server."""
+
+    def __init__(self, current_monthly, target_monthly, reserved_monthly=None, migration_cost=None):
+        current = np.asarray(current_monthly, dtype=np.float64)
+        target = np.asarray(target_monthly, dtype=np.float64)
+        reserved = np.zeros_like(current) if reserved_monthly is None else np.asarray(reserved_monthly, dtype=np.float64)
+        migration = np.zeros_like(current) if migration_cost is None else np.broadcast_to(
+            np.asarray(migration_cost, dtype=np.float64), current.shape)
+
+        self.n_servers = len(current)
+        self.order = np.argsort(target - current, kind='stable')
+        self._prefix = {name: np.concatenate([[0.0], np.cumsum(values[self.order])]) for name, values in
+                        [('current', current), ('target', target), ('reserved', reserved), ('migration', migration)]}
+
+    def evaluate(self, horizon_years: int = HORIZON_YEARS, growth_rate=GROWTH_RATE, discount_rate=DISCOUNT_RATE,
+                 migration_months=MIGRATION_MONTHS, ri_term_months=0, ri_upfront_share=RI_UPFRONT_SHARE) -> Dict:
+        """Cash flows for every combination given; array arguments broadcast to one scenario per element
+
+        Returns (scenarios, months) arrays 'baseline' (staying put), 'projected' (cash basis), 'amortized' (upfronts
+        spread over their term) and 'net' savings with its 'cumulative' sum, and per scenario 'npv',
+        'payback_month' (NaN if not within the horizon), 'investment' and 'roi'."""
+        growth, rate, ramp, term, upfront_share = (a.astype(np.float64).ravel() for a in np.broadcast_arrays(
+            np.atleast_1d(growth_rate), discount_rate, migration_months, ri_term_months, ri_upfront_share))
+        months = 12 * horizon_years
+        month = np.arange(months)
+        ramp = np.clip(np.round(ramp), 1, months).astype(np.int64)
+        upfront_share = np.where(term > 0, upfront_share, 0.0)
+
+        # Servers migrated by the end of each month: wave k holds positions [bounds[k], bounds[k + 1])
+        k = np.arange(months + 1)
+        bounds = np.minimum(-(-(k * self.n_servers) // ramp[:, None]), self.n_servers)
+        migrated = {name: prefix[bounds[:, 1:]] for name, prefix in self._prefix.items()}
+        wave = {name: prefix[bounds[:, 1:]] - prefix[bounds[:, :-1]] for name, prefix in self._prefix.items()}
+
+        scale = (1 + growth[:, None]) ** (month / 12)
+        baseline = self._prefix['current'][-1] * scale
+        on_premises = (baseline - migrated['current'] * scale) + wave['current'] * scale
+        amortized = on_premises + migrated['target'] * scale + wave['migration']
+
+        # A term bought in a server's migration month renews every term_months; its upfront covers the whole term
+        renewal = (month[:, None] >= month) & ((month[:, None] - month) % np.maximum(term, 1)[:, None, None] == 0)
+        upfronts = np.einsum('smw,sw->sm', renewal, wave['reserved']) * (upfront_share * term)[:, None] * scale
+        projected = amortized - upfront_share[:, None] * migrated['reserved'] * scale + upfronts
+
+        net = baseline - projected
+        cumulative = np.cumsum(net, axis=1)
+        npv = (net * (1 + rate[:, None]) ** (-(month + 1) / 12)).sum(axis=1)
+        # Payback is the first month from which the cumulative position stays non-negative
+        stays_positive = np.flip(np.minimum.accumulate(np.flip(cumulative, axis=1), axis=1), axis=1) >= 0
+        payback = np.where(stays_positive[:, -1], stays_positive.argmax(axis=1) + 1, np.nan)
+        # Invested: one-time migration costs and the target side of each dual-running month
+        investment = (wave['migration'] + wave['target'] * scale).sum(axis=1)
+        roi = np.divide(cumulative[:, -1], investment, out=np.full(len(npv), np.nan), where=investment > 0)
+
+        return {'months': month + 1, 'baseline': baseline, 'projected': projected, 'amortized': amortized, 'net': net,
+                'cumulative': cumulative, 'npv': npv, 'payback_month': payback, 'investment': investment, 'roi': roi}
+
+    @staticmethod
+    def scenario_table(results: Dict, labels) -> pd.DataFrame:
+        """One row per evaluated scenario"""
+        return pd.DataFrame({
+            'Scenario': list(labels),
+            'NPV': results['npv'].round(2),
+            'Payback (months)': results['payback_month'],
+            'Cumulative Savings': results['cumulative'][:, -1].round(2),
+            'ROI': results['roi'],
+        })
+
+    @staticmethod
+    def yearly(results: Dict, scenario: int = 0) -> pd.DataFrame:
+        """Cash-basis yearly totals of one scenario"""
+        years = (results['months'] - 1) // 12
+        yearly = pd.DataFrame({
+            'Year': 'Year ' + pd.Series(years + 1).astype(str),
+            'Current Cost': results['baseline'][scenario],
+            'Projected Cost': results['projected'][scenario],
+            'Net Savings': results['net'][scenario],
+        }).groupby('Year', sort=False).sum()
+        yearly['Cumulative Savings'] = yearly['Net Savings'].cumsum()
+        return yearly.round(2).reset_index()
+
+    @staticmethod
+    def curve(results: Dict, labels: Optional[list] = None) -> pd.DataFrame:
+        """Long table of cumulative net savings by month, one series per scenario, for line charts"""
+        labels = list(labels) if labels is not None else [f'Scenario {i + 1}' for i in range(len(results['npv']))]
+        return pd.DataFrame({
+            'Month': np.tile(results['months'], len(labels)),
+            'Scenario': np.repeat(labels, len(results['months'])),
+            'Cumulative Savings': results['cumulative'].ravel().round(2),
+        })
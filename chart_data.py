@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Chart Data Preparation
+Pre-aggregates result frames so charts receive a few rows instead of the whole fleet
+"""
+
+import pandas as pd
+
+COST_COLUMNS = ['Compute_Monthly_Cost', 'License_Monthly_Cost', 'Storage_Monthly_Cost', 'Estimated_Monthly_Cost']
+
+
+def category_counts(values: pd.Series, name: str) -> pd.DataFrame:
+    """Server count per category, largest first"""
+    return counts_frame(values.value_counts(), name)
+
+
+def counts_frame(counts: pd.Series, name: str) -> pd.DataFrame:
+    """Chart rows from precomputed per-category counts (e.g. a bitmap index), largest first, empty ones dropped"""
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return pd.DataFrame({name: counts.index, 'Servers': counts.to_numpy()})
+
+
+def cost_by_family(recommendations: pd.DataFrame) -> pd.DataFrame:
+    """Monthly cost components summed per EC2 instance family"""
+    return recommendations.groupby('Instance_Family', as_index=False)[COST_COLUMNS].sum()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Assessment Checkpoints
+Wizard state as JSON and data frames as Arrow IPC files, saved per assessment id and memory-mapped on restore
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+import pandas as pd
+import pyarrow as pa
+from typing import Dict, Optional, Tuple
+
+MANIFEST_FILE = 'checkpoint.json'
+
+
+class CheckpointStore:
+    def __init__(self, root: str = '.toolkit_cache/checkpoints'):
+        self.root = root
+        self._lock = threading.Lock()
+        # Last frame object and version, and state text, written per (assessment, name); unchanged ones are not rewritten
+        self._written_frames: Dict[Tuple[str, str], Tuple[weakref.ref, int]] = {}
+        self._written_state: Dict[str, str] = {}
+        # Saved assessments as last listed; dropped whenever a checkpoint is written or deleted
+        self._listing: Optional[pd.DataFrame] = None
+
+    def save(self, assessment_id: str, state: Dict, frames: Dict[str, pd.DataFrame], title: str = '',
+             versions: Optional[Dict[str, int]] = None) -> bool:
+        """Checkpoint an assessment; returns True if anything was written. versions are edit counts of frames
+        changed in place, so a frame is rewritten when it is a different object or its version moved"""
+        versions = versions or {}
+        directory = self._directory(assessment_id)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            written = False
+            for name, frame in frames.items():
+                written_frame = self._written_frames.get((assessment_id, name))
+                version = versions.get(name, 0)
+                if written_frame is not None and written_frame[0]() is frame and written_frame[1] == version:
+                    continue
+                self._write_frame(os.path.join(directory, f"{name}.arrow"), frame)
+                self._written_frames[(assessment_id, name)] = (weakref.ref(frame), version)
+                written = True
+
+            # Frames dropped from the session are dropped from the checkpoint too
+            for file_name in os.listdir(directory):
+                name, extension = os.path.splitext(file_name)
+                if extension == '.arrow' and name not in frames:
+                    os.remove(os.path.join(directory, file_name))
+                    self._written_frames.pop((assessment_id, name), None)
+                    written = True
+
+            state_text = json.dumps({'title': title, 'state': state, 'frames': sorted(frames)}, sort_keys=True, default=str)
+            if not written and self._written_state.get(assessment_id) == state_text:
+                return False
+            manifest = json.loads(state_text)
+            manifest.update({'assessment_id': assessment_id, 'updated': time.time(),
+                             'rows': {name: len(frame) for name, frame in frames.items()}})
+            self._write_json(os.path.join(directory, MANIFEST_FILE), manifest)
+            self._written_state[assessment_id] = state_text
+            self._listing = None
+            return True
+
+    def load(self, assessment_id: str) -> Optional[Tuple[Dict, Dict[str, pd.DataFrame]]]:
+        """(state, frames) of a checkpointed assessment, or None if there is no such checkpoint"""
+        directory = self._directory(assessment_id)
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+
+        frames = {}
+        with self._lock:
+            for name in manifest['frames']:
+                path = os.path.join(directory, f"{name}.arrow")
+                if not os.path.exists(path):
+                    continue
+                # Memory-mapped, so restoring only copies what to_pandas needs to convert
+                with pa.memory_map(path) as source:
+                    frames[name] = pa.ipc.open_file(source).read_all().to_pandas()
+                self._written_frames[(assessment_id, name)] = (weakref.ref(frames[name]), 0)
+            self._written_state[assessment_id] = json.dumps(
+                {'title': manifest['title'], 'state': manifest['state'], 'frames': manifest['frames']},
+                sort_keys=True, default=str)
+        return manifest['state'], frames
+
+    def list(self) -> pd.DataFrame:
+        """Saved assessments, most recently updated first; the manifests are only read again after a save or delete"""
+        with self._lock:
+            if self._listing is None:
+                rows = []
+                if os.path.isdir(self.root):
+                    for assessment_id in os.listdir(self.root):
+                        manifest_path = os.path.join(self._directory(assessment_id), MANIFEST_FILE)
+                        if not os.path.exists(manifest_path):
+                            continue
+                        with open(manifest_path) as fh:
+                            manifest = json.load(fh)
+                        rows.append({'Assessment': assessment_id, 'Title': manifest['title'],
+                                     'Servers': max(manifest['rows'].values(), default=0),
+                                     'Updated': pd.Timestamp(manifest['updated'], unit='s').floor('s')})
+                saved = pd.DataFrame(rows, columns=['Assessment', 'Title', 'Servers', 'Updated'])
+                self._listing = saved.sort_values('Updated', ascending=False, ignore_index=True)
+            return self._listing.copy()
+
+    def delete(self, assessment_id: str):
+        with self._lock:
+            shutil.rmtree(self._directory(assessment_id), ignore_errors=True)
+            self._written_state.pop(assessment_id, None)
+            self._listing = None
+            for key in [key for key in self._written_frames if key[0] == assessment_id]:
+                del self._written_frames[key]
+
+    def _directory(self, assessment_id: str) -> str:
+        if not assessment_id.isalnum():
+            raise ValueError(f"Invalid assessment id: {assessment_id}")
+        return os.path.join(self.root, assessment_id)
+
+    @staticmethod
+    def _write_frame(path: str, frame: pd.DataFrame):
+        table = pa.Table.from_pandas(frame)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as fh:
+            json.dump(data, fh, indent=2, default=str)
+        os.replace(tmp_path, path)
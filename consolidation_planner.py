@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+License Consolidation Planner
+First-fit-decreasing bin packing of SQL Server instances onto shared instances and Windows VMs onto Datacenter Dedicated Hosts
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+from licensing_calculator import (CORE_PACK_SIZE, DEDICATED_HOST_PHYSICAL_CORES, SOFTWARE_ASSURANCE_PER_PACK,
+                                  SQL_CORE_MINIMUM, VCPU_PER_PHYSICAL_CORE)
+from server_inventory_analyzer import ServerInventoryAnalyzer
+
+# Consolidated targets are filled to this CPU utilization; measured utilization shrinks each workload's demand to match
+TARGET_CPU_UTILIZATION = 0.7
+# SQL Server is consolidated onto memory-optimized instances; Standard edition is capped at 24 cores
+SQL_TARGET_FAMILY = 'r5'
+SQL_STANDARD_MAX_CORES = 24
+SQL_CONSOLIDATION_EDITIONS = ['Enterprise', 'Standard']
+# Memory of the Dedicated Host whose physical cores licensing_calculator prices (m5, 384 GiB)
+DEDICATED_HOST_MEMORY_GB = 384
+
+PLACEMENT_COLUMNS = ['Server_Name', 'Workload_Group', 'Target', 'Target_ID', 'CPU_Demand', 'Memory_Demand']
+SUMMARY_COLUMNS = ['Workload Group', 'Workloads', 'Target', 'Targets Needed', 'Avg CPU Fill', 'Licensed Cores Before',
+                   'Licensed Cores After', 'License Before', 'License After', 'Monthly Savings']
+
+
+class ConsolidationPlanner:
+    def __init__(self, target_cpu_utilization: float = TARGET_CPU_UTILIZATION):
+        self.target_cpu_utilization = target_cpu_utilization
+        catalog = ServerInventoryAnalyzer().catalog
+        self.sql_targets = catalog[catalog['Family'] == SQL_TARGET_FAMILY].sort_values('vCPU', ignore_index=True)
+
+    def pack(self, cpu: np.ndarray, memory: np.ndarray, cpu_capacity: float,
+             memory_capacity: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """First-fit decreasing; returns (target per workload, CPU used per target, memory used per target)
+
+        Demands are whole vCPUs and GiB, so a fleet has few distinct ones. Every workload of one demand is placed
+        in a single vectorized step: first fit of identical items fills each open target, in order, to what it can
+        still hold, then opens new targets. A workload larger than a target gets one to itself."""
+        n_items = len(cpu)
+        demands, inverse, counts = np.unique(np.column_stack([cpu, memory]), axis=0,
+                                             return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        # Largest share of either dimension first, as in first-fit decreasing
+        type_order = np.lexsort((demands[:, 1], demands[:, 0],
+                                 -np.maximum(demands[:, 0] / cpu_capacity, demands[:, 1] / memory_capacity)))
+        items_by_type = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+
+        free_cpu = np.empty(n_items)
+        free_memory = np.empty(n_items)
+        assignment = np.empty(n_items, dtype=np.intp)
+        n_bins = 0
+        for t in type_order:
+            item_cpu, item_memory = demands[t]
+            count = counts[t]
+            fits = np.minimum(free_cpu[:n_bins] // item_cpu,
+                              free_memory[:n_bins] // item_memory if item_memory else np.inf)
+            fits = np.maximum(fits, 0)
+            taken = np.diff(np.minimum(np.cumsum(fits), count), prepend=0).astype(np.int64)
+            free_cpu[:n_bins] -= taken * item_cpu
+            free_memory[:n_bins] -= taken * item_memory
+
+            remaining = count - int(taken.sum())
+            per_bin = max(1, int(min(cpu_capacity // item_cpu,
+                                     memory_capacity // item_memory if item_memory else np.inf)))
+            new_bins = -(-remaining // per_bin)
+            new_taken = np.full(new_bins, per_bin, dtype=np.int64)
+            if new_bins:
+                new_taken[-1] = remaining - per_bin * (new_bins - 1)
+            free_cpu[n_bins:n_bins + new_bins] = cpu_capacity - new_taken * item_cpu
+            free_memory[n_bins:n_bins + new_bins] = memory_capacity - new_taken * item_memory
+
+            bins = np.arange(n_bins + new_bins)
+            assignment[items_by_type[t]] = np.repeat(bins, np.concatenate([taken, new_taken]))
+            n_bins += new_bins
+        return assignment, cpu_capacity - free_cpu[:n_bins], memory_capacity - free_memory[:n_bins]
+
+    def plan(self, inventory: pd.DataFrame, licensing: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(per-workload placements, per-group summary) for a fleet and its LicensingCalculator.license_costs()
+
+        "Before" is each workload licensed on its own under BYOL, as the calculator prices it; "after" licenses the
+        consolidated targets instead."""
+        cpu, memory = self._demands(inventory)
+        placements, summary = [], []
+
+        for edition in SQL_CONSOLIDATION_EDITIONS:
+            rows = np.flatnonzero((licensing['SQL_Edition'] == edition).to_numpy())
+            if not len(rows):
+                continue
+            target, assignment, cpu_used = self._best_sql_target(edition, cpu[rows], memory[rows])
+            licensed_after = self._sql_licensed_cores(cpu_used, target.vCPU)
+            self._record(placements, summary, f'SQL Server {edition}', f'sql-{edition.lower()}', target.Instance_Type,
+                         target.vCPU, licensing.iloc[rows], 'SQL', cpu[rows], memory[rows], assignment, cpu_used,
+                         licensed_after, licensed_after / CORE_PACK_SIZE * SOFTWARE_ASSURANCE_PER_PACK[('SQL', edition)])
+
+        rows = np.flatnonzero((licensing['Windows_Edition'] != 'None').to_numpy())
+        if len(rows):
+            host_vcpu = DEDICATED_HOST_PHYSICAL_CORES * VCPU_PER_PHYSICAL_CORE
+            assignment, cpu_used, _ = self.pack(cpu[rows], memory[rows], host_vcpu, DEDICATED_HOST_MEMORY_GB)
+            # Datacenter on a host covers every VM on it, so only the hosts' physical cores are licensed
+            licensed_after = len(cpu_used) * DEDICATED_HOST_PHYSICAL_CORES
+            self._record(placements, summary, 'Windows Server VMs', 'host', 'Dedicated Host (Datacenter)', host_vcpu,
+                         licensing.iloc[rows], 'Windows', cpu[rows], memory[rows], assignment, cpu_used, licensed_after,
+                         licensed_after / CORE_PACK_SIZE * SOFTWARE_ASSURANCE_PER_PACK[('Windows', 'Datacenter')])
+
+        placements = pd.concat(placements, ignore_index=True) if placements else pd.DataFrame(columns=PLACEMENT_COLUMNS)
+        return placements, pd.DataFrame(summary, columns=SUMMARY_COLUMNS)
+
+    def _best_sql_target(self, edition: str, cpu: np.ndarray, memory: np.ndarray):
+        """(target row, placements, CPU used per target) for the size leaving the fewest licensed cores, then the
+        lowest compute cost"""
+        targets = self.sql_targets
+        if edition == 'Standard':
+            targets = targets[targets['vCPU'] <= SQL_STANDARD_MAX_CORES]
+        # Sizes some workload does not fit are only tried when no size fits them all
+        fitting = targets[(targets['vCPU'] >= cpu.max()) & (targets['Memory_GB'] >= memory.max())]
+        best = None
+        for target in (fitting if len(fitting) else targets.tail(1)).itertuples():
+            assignment, cpu_used, _ = self.pack(cpu, memory, target.vCPU, target.Memory_GB)
+            key = (self._sql_licensed_cores(cpu_used, target.vCPU), len(cpu_used) * target.Hourly_Price)
+            if best is None or key < best[0]:
+                best = (key, target, assignment, cpu_used)
+        return best[1:]
+
+    @staticmethod
+    def _sql_licensed_cores(cpu_used: np.ndarray, target_vcpu: int) -> int:
+        """Every target's vCPUs, or an oversized workload's own demand in 2-core packs, never below the minimum"""
+        cores = np.ceil(np.maximum(cpu_used, target_vcpu) / CORE_PACK_SIZE) * CORE_PACK_SIZE
+        return int(np.maximum(cores, SQL_CORE_MINIMUM).sum())
+
+    @staticmethod
+    def _record(placements, summary, group, prefix, target, target_vcpu, licensing, product, cpu, memory,
+                assignment, cpu_used, licensed_after, cost_after):
+        placements.append(pd.DataFrame({
+            'Server_Name': licensing['Server_Name'].to_numpy(),
+            'Workload_Group': group,
+            'Target': target,
+            'Target_ID': (prefix + '-' + pd.Series(assignment + 1).astype(str).str.zfill(3)).to_numpy(),
+            'CPU_Demand': cpu,
+            'Memory_Demand': memory,
+        }))
+        cost_before = float(licensing[f'{product}_BYOL'].sum())
+        summary.append([group, len(cpu), target, len(cpu_used), float(cpu_used.sum() / (len(cpu_used) * target_vcpu)),
+                        int(licensing[f'{product}_Licensed_Cores'].sum()), int(licensed_after), round(cost_before, 2),
+                        round(float(cost_after), 2), round(cost_before - float(cost_after), 2)])
+
+    def _demands(self, inventory: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Whole vCPUs each workload needs at the target utilization, and its memory in whole GiB"""
+        cores = self._numeric(inventory, 'CPU_Cores').clip(min=1)
+        memory = np.ceil(self._numeric(inventory, 'Memory_GB')).clip(min=1)
+        if 'Utilization_CPU' not in inventory:
+            return cores, memory
+        utilization = self._numeric(inventory, 'Utilization_CPU') / 100
+        return np.clip(np.ceil(cores * utilization / self.target_cpu_utilization), 1, cores), memory
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df:
+            return np.zeros(len(df))
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
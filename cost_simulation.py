@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Cost Simulation
+P10/P50/P90 monthly cost bands from per-server utilization, sizing-choice, growth and price uncertainty
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, Optional
+
+from server_inventory_analyzer import HOURS_PER_MONTH, WINDOWS_LICENSE_PER_VCPU_HOUR, ServerInventoryAnalyzer
+
+# Peak demand relative to the provisioned size is lognormal, centred on peak utilization over the target fill;
+# servers without a measurement are assumed to peak at a typical on-premises level
+UTILIZATION_SIGMA = 0.35
+TARGET_UTILIZATION = 0.7
+UNMEASURED_PEAK_UTILIZATION = 0.5
+DEMAND_SCALE_RANGE = (0.25, 2.0)
+# Measured utilization is rounded to this many percent so servers with the same shape share one distribution
+UTILIZATION_STEP = 5
+# Share of servers placed on general-purpose m5 instead of the cheapest fit
+GENERAL_PURPOSE_SHARE = 0.2
+GENERAL_PURPOSE_FAMILY = 'm5'
+# Fleet growth over the horizon and price drift are drawn once per trial, so they move every server together
+GROWTH_MEAN = 0.05
+GROWTH_SD = 0.05
+COMPUTE_PRICE_SD = 0.05
+STORAGE_PRICE_SD = 0.08
+# Independent per-server storage growth; only its fleet-wide sum matters, drawn from its normal approximation
+STORAGE_GROWTH_SD = 0.25
+# Equal-probability bins the utilization distribution is discretized into
+UTILIZATION_BINS = 64
+# Trials simulated per chunk; chunks are seeded by their index, so results do not depend on the process count
+CHUNK_TRIALS = 100
+PERCENTILES = [10, 50, 90]
+COMPONENTS = ['Compute', 'License', 'Storage', 'Total']
+
+
+class CostSimulator:
+    """Servers that share a shape (cores, memory, Windows, rounded utilization) share an instance distribution.
+    Drawing how many of a group's servers land on each instance from a multinomial is the same as drawing every
+    server on its own, at the cost of one draw per group."""
+
+    def __init__(self, utilization_sigma: float = UTILIZATION_SIGMA, general_purpose_share: float = GENERAL_PURPOSE_SHARE,
+                 growth_mean: float = GROWTH_MEAN, growth_sd: float = GROWTH_SD):
+        self.utilization_sigma = utilization_sigma
+        self.general_purpose_share = general_purpose_share
+        self.growth_mean = growth_mean
+        self.growth_sd = growth_sd
+        self.analyzer = ServerInventoryAnalyzer()
+
+    def simulate(self, inventory: pd.DataFrame, sizing: Optional[pd.DataFrame] = None, trials: int = 10_000,
+                 processes: int = 1, seed: int = 42) -> Dict:
+        """Fleet monthly cost per trial and component, plus the deterministic sizing estimate for reference"""
+        if sizing is None:
+            sizing = self.analyzer.analyze_inventory_dataframe(inventory)
+        model = self.model(inventory, sizing)
+        chunks = [(model, min(CHUNK_TRIALS, trials - start), np.random.SeedSequence([seed, index]))
+                  for index, start in enumerate(range(0, trials, CHUNK_TRIALS))]
+        if processes > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(_simulate_chunk, chunks))
+        else:
+            results = [_simulate_chunk(chunk) for chunk in chunks]
+
+        samples = np.concatenate(results) if results else np.zeros((0, 3))
+        return {
+            'trials': pd.DataFrame(np.column_stack([samples, samples.sum(axis=1)]), columns=COMPONENTS),
+            'point_estimate': {
+                'Compute': float(sizing['Compute_Monthly_Cost'].sum()),
+                'License': float(sizing['License_Monthly_Cost'].sum()),
+                'Storage': float(sizing['Storage_Monthly_Cost'].sum()),
+                'Total': float(sizing['Estimated_Monthly_Cost'].sum()),
+            },
+            'groups': len(model['counts']),
+        }
+
+    def model(self, inventory: pd.DataFrame, sizing: pd.DataFrame) -> Dict:
+        """Per-group instance probabilities and the per-instance prices a trial multiplies its counts by"""
+        cpu = sizing['CPU_Cores'].to_numpy(dtype=np.float64)
+        memory = sizing['Memory_GB'].to_numpy(dtype=np.float64)
+        is_windows = sizing['OS'].astype(str).str.contains('windows', case=False, regex=False).to_numpy()
+        if 'Utilization_CPU' in inventory:
+            utilization = pd.to_numeric(inventory['Utilization_CPU'], errors='coerce').to_numpy(dtype=np.float64)
+            utilization = np.round(utilization / UTILIZATION_STEP) * UTILIZATION_STEP
+        else:
+            utilization = np.full(len(cpu), np.nan)
+
+        shapes = pd.DataFrame({'cpu': cpu, 'memory': memory, 'windows': is_windows, 'utilization': utilization})
+        groups = shapes.groupby(list(shapes.columns), dropna=False, sort=False).size().reset_index(name='count')
+
+        peak = groups['utilization'].fillna(UNMEASURED_PEAK_UTILIZATION * 100).clip(lower=1) / 100
+        centre = np.log(peak.to_numpy() / TARGET_UTILIZATION)
+        z = np.array([NormalDist().inv_cdf((q + 0.5) / UTILIZATION_BINS) for q in range(UTILIZATION_BINS)])
+        scale = np.clip(np.exp(centre[:, None] + self.utilization_sigma * z), *DEMAND_SCALE_RANGE)
+        demand_cpu = (groups['cpu'].to_numpy()[:, None] * scale).ravel()
+        demand_memory = (groups['memory'].to_numpy()[:, None] * scale).ravel()
+
+        catalog = self.analyzer.catalog
+        cheapest = self.analyzer.recommend_instance_index(demand_cpu, demand_memory)
+        general = catalog.index[catalog['Family'] == GENERAL_PURPOSE_FAMILY].to_numpy()
+        general_fits = (catalog['vCPU'].to_numpy()[general] >= demand_cpu[:, None]) \
+            & (catalog['Memory_GB'].to_numpy()[general] >= demand_memory[:, None])
+        general_pick = np.where(general_fits.any(axis=1), general[general_fits.argmax(axis=1)], cheapest)
+
+        n_groups, n_instances = len(groups), len(catalog)
+        probabilities = np.zeros((n_groups, n_instances))
+        rows = np.repeat(np.arange(n_groups), UTILIZATION_BINS)
+        np.add.at(probabilities, (rows, cheapest), (1 - self.general_purpose_share) / UTILIZATION_BINS)
+        np.add.at(probabilities, (rows, general_pick), self.general_purpose_share / UTILIZATION_BINS)
+        # Instances no group can land on are dropped so each multinomial draw only visits the possible ones
+        used = probabilities.any(axis=0)
+
+        storage_cost = sizing['Storage_Monthly_Cost'].to_numpy(dtype=np.float64)
+        return {
+            'counts': groups['count'].to_numpy(dtype=np.int64),
+            'probabilities': probabilities[:, used] / probabilities[:, used].sum(axis=1, keepdims=True),
+            'windows': groups['windows'].to_numpy(dtype=bool),
+            'compute_price': catalog['Hourly_Price'].to_numpy()[used] * HOURS_PER_MONTH,
+            'license_price': catalog['vCPU'].to_numpy()[used] * WINDOWS_LICENSE_PER_VCPU_HOUR * HOURS_PER_MONTH,
+            'storage_cost': float(storage_cost.sum()),
+            # Relative sd of the fleet's storage when each server's storage grows independently
+            'storage_sd': STORAGE_GROWTH_SD * float(np.sqrt((storage_cost ** 2).sum()) / max(storage_cost.sum(), 1e-9)),
+            'growth': (self.growth_mean, self.growth_sd),
+        }
+
+    @staticmethod
+    def bands(results: Dict) -> pd.DataFrame:
+        """P10/P50/P90 per cost component, then the deterministic sizing estimate for reference; the bands right-size
+        every server to its sampled demand, so the estimate for its current size can fall outside them"""
+        quantiles = results['trials'].quantile([p / 100 for p in PERCENTILES])
+        table = pd.DataFrame({'Component': COMPONENTS})
+        for p, (_, row) in zip(PERCENTILES, quantiles.iterrows()):
+            table[f'P{p}'] = row[COMPONENTS].to_numpy()
+        table['Current Sizing'] = [results['point_estimate'][c] for c in COMPONENTS]
+        return table.round(2)
+
+
+def _simulate_chunk(chunk) -> np.ndarray:
+    """(trials, [compute, license, storage]) fleet monthly costs for one chunk of trials"""
+    model, trials, seed = chunk
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(model['counts'], model['probabilities'], size=(trials, len(model['counts'])))
+    instances = counts.sum(axis=1)
+    windows_instances = counts[:, model['windows']].sum(axis=1)
+
+    growth = 1 + rng.normal(*model['growth'], trials)
+    compute = instances @ model['compute_price'] * rng.normal(1, COMPUTE_PRICE_SD, trials) * growth
+    license_cost = windows_instances @ model['license_price'] * growth
+    storage = model['storage_cost'] * growth * rng.normal(1, STORAGE_PRICE_SD, trials) \
+        * rng.normal(1, model['storage_sd'], trials)
+    return np.column_stack([compute, license_cost, storage])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate P10/P50/P90 monthly AWS cost bands for a server inventory')
+    parser.add_argument('inventory', help='Inventory CSV or Parquet (MAP or OLA layout)')
+    parser.add_argument('--trials', type=int, default=10_000, help='Number of Monte Carlo trials')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    inventory = pd.read_parquet(args.inventory) if args.inventory.endswith('.parquet') else pd.read_csv(args.inventory)
+    start = time.perf_counter()
+    results = CostSimulator().simulate(inventory, trials=args.trials, processes=args.processes, seed=args.seed)
+    print(CostSimulator.bands(results).to_string(index=False))
+    print(f"{args.trials:,} trials over {len(inventory):,} servers ({results['groups']:,} server shapes) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Synthetic Fleet Generator
+Seeded, vectorized server and file-server fleets with realistic correlations, streamable to Parquet
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Dict, Iterator, Optional, Sequence
+
+# (OS, platform category, share of the fleet)
+OPERATING_SYSTEMS = [
+    ("Windows Server 2019", "Windows", 0.30),
+    ("Windows Server 2016", "Windows", 0.20),
+    ("Linux Ubuntu 20.04", "Linux", 0.20),
+    ("Linux CentOS 7", "Linux", 0.12),
+    ("Linux RHEL 8", "Linux", 0.10),
+    ("Container (Docker)", "Container", 0.08),
+]
+
+# The upload CSV only knows these four; the OLA layout adds RHEL and container hosts
+MAP_OPERATING_SYSTEMS = ["Windows Server 2019", "Windows Server 2016", "Linux Ubuntu 20.04", "Linux CentOS 7"]
+
+CPU_CHOICES = np.array([2, 4, 8, 16, 32, 64])
+
+# Per workload: CPU core probabilities (over CPU_CHOICES), GiB-per-core ratio probabilities over (2, 4, 8),
+# log-normal storage median in GB, and Storage_Type probabilities over (SSD, HDD, SAN)
+WORKLOAD_PROFILES = {
+    "Web Server":         {'cpu': [0.30, 0.40, 0.20, 0.08, 0.02, 0.00], 'ratio': [0.50, 0.45, 0.05], 'storage_gb': 150, 'storage_type': [0.60, 0.25, 0.15]},
+    "Application Server": {'cpu': [0.10, 0.35, 0.35, 0.15, 0.05, 0.00], 'ratio': [0.15, 0.65, 0.20], 'storage_gb': 300, 'storage_type': [0.50, 0.20, 0.30]},
+    "Database":           {'cpu': [0.00, 0.10, 0.30, 0.35, 0.20, 0.05], 'ratio': [0.00, 0.30, 0.70], 'storage_gb': 1500, 'storage_type': [0.45, 0.05, 0.50]},
+    "File Server":        {'cpu': [0.35, 0.45, 0.15, 0.05, 0.00, 0.00], 'ratio': [0.40, 0.55, 0.05], 'storage_gb': 3000, 'storage_type': [0.10, 0.50, 0.40]},
+    "Development":        {'cpu': [0.40, 0.40, 0.15, 0.05, 0.00, 0.00], 'ratio': [0.30, 0.60, 0.10], 'storage_gb': 200, 'storage_type': [0.40, 0.50, 0.10]},
+    "Container App":      {'cpu': [0.05, 0.25, 0.40, 0.25, 0.05, 0.00], 'ratio': [0.20, 0.70, 0.10], 'storage_gb': 200, 'storage_type': [0.70, 0.10, 0.20]},
+}
+MEMORY_PER_CORE = np.array([2, 4, 8])
+STORAGE_TYPES = ['SSD', 'HDD', 'SAN']
+
+# Workload mix per platform category, over WORKLOAD_PROFILES order
+WORKLOAD_MIX = {
+    "Windows": [0.25, 0.30, 0.20, 0.15, 0.10, 0.00],
+    "Linux": [0.30, 0.30, 0.20, 0.05, 0.15, 0.00],
+    "Container": [0.00, 0.00, 0.00, 0.00, 0.10, 0.90],
+}
+
+ENVIRONMENTS = ['Production', 'Development', 'Test', 'Staging']
+ENVIRONMENT_MIX = [0.45, 0.20, 0.20, 0.15]
+# Beta(a, b) CPU utilization; production hosts run hotter than non-production
+UTILIZATION_BETA = {'Production': (2.5, 4.0), 'Development': (1.2, 6.0), 'Test': (1.2, 6.0), 'Staging': (1.5, 5.0)}
+
+# SQL Server edition mix on Windows database hosts, over SQL_EDITIONS; non-production mostly runs the free editions
+SQL_EDITIONS = ['Enterprise', 'Standard', 'Web', 'Developer', 'Express']
+SQL_EDITION_MIX = {'Production': [0.35, 0.55, 0.10, 0.00, 0.00], 'Non-Production': [0.05, 0.30, 0.00, 0.50, 0.15]}
+
+# Mean applications per host beyond the first; Windows hosts tend to be shared more
+APPLICATION_MEAN = {"Windows": 2.5, "Linux": 1.2, "Container": 3.0}
+
+# Current on-premises $/month: hardware + power per core and GiB, SAN/NAS per GB, Windows Datacenter per core
+ON_PREM_COST_PER_CORE = 9.0
+ON_PREM_COST_PER_GB_MEMORY = 1.5
+ON_PREM_COST_PER_GB_STORAGE = 0.02
+WINDOWS_LICENSE_PER_CORE = 6.0
+
+# (Server_Type, share, access pattern probabilities over High/Medium/Low, chance of regulated data)
+FILE_SERVER_TYPES = [
+    ("Finance", 0.10, [0.50, 0.40, 0.10], 0.85),
+    ("HR", 0.08, [0.30, 0.50, 0.20], 0.85),
+    ("Engineering", 0.17, [0.60, 0.30, 0.10], 0.20),
+    ("Marketing", 0.10, [0.30, 0.50, 0.20], 0.10),
+    ("Shared", 0.15, [0.40, 0.40, 0.20], 0.25),
+    ("Department", 0.15, [0.30, 0.50, 0.20], 0.30),
+    ("Project", 0.10, [0.40, 0.40, 0.20], 0.20),
+    ("Archive", 0.10, [0.00, 0.10, 0.90], 0.50),
+    ("Backup", 0.05, [0.00, 0.10, 0.90], 0.30),
+]
+FILE_SERVER_CAPACITY_GB = np.array([500, 1000, 2000, 4000, 8000, 16000])
+ACCESS_PATTERNS = ['High', 'Medium', 'Low']
+
+# Per access pattern: median business-hours throughput (MB/s) and I/O bursts started per day
+SHARE_IO_PROFILES = {'High': (120.0, 6.0), 'Medium': (25.0, 3.0), 'Low': (2.0, 1.0)}
+# Outside 08:00-18:00 on weekdays shares see this fraction of their daytime load
+OFF_HOURS_FACTOR = 0.15
+BURST_MINUTES = 15
+BURST_FACTOR = 4.0
+# Average I/O size range (KiB) converting throughput to IOPS; small-file shares run smaller I/Os
+IO_SIZE_KB = (16, 128)
+IO_METRICS_START = '2025-01-01'
+
+# Synthetic Active Directory: objects per user, and the account states an assessment looks for
+DIRECTORY_DOMAIN = 'DC=corp,DC=example,DC=com'
+COMPUTERS_PER_USER = 0.7
+GROUPS_PER_USER = 0.05
+GPOS_PER_USER = 0.035
+USERS_PER_DOMAIN_CONTROLLER = 10_000
+DISABLED_ACCOUNT_SHARE = 0.08
+# Enabled accounts idle for 90-365 days, and ones that never logged on
+STALE_ACCOUNT_SHARE = 0.12
+NEVER_LOGGED_ON_SHARE = 0.03
+# Groups nested inside an earlier group, and users per group (lognormal median)
+NESTED_GROUP_SHARE = 0.4
+GROUP_MEMBERS_MEDIAN = 12
+
+GENERATORS = ('inventory', 'multiplatform', 'file_servers')
+# Random streams that are not a standalone fleet layout
+DERIVED_STREAMS = ('share_io', 'directory')
+
+
+class FleetGenerator:
+    """Reproducible fleets: the same seed and start row always produce the same rows"""
+
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+
+    def server_inventory(self, n_servers: int, start: int = 0) -> pd.DataFrame:
+        """Servers in the MAP upload CSV layout"""
+        rng = self._rng('inventory', start)
+        os_idx = rng.choice(len(MAP_OPERATING_SYSTEMS), n_servers, p=[0.35, 0.25, 0.25, 0.15])
+        category = np.where(os_idx < 2, 'Windows', 'Linux')
+        servers = self._servers(rng, category, n_servers)
+        return pd.DataFrame({
+            'Server_Name': self._names('Server', start, n_servers),
+            'CPU_Cores': servers['cpu'],
+            'Memory_GB': servers['memory'],
+            'Storage_GB': servers['storage'],
+            'OS': self._labels(MAP_OPERATING_SYSTEMS, os_idx),
+            'Application_Count': servers['applications'],
+            'Storage_Type': servers['storage_type'],
+        })
+
+    def multiplatform_inventory(self, n_servers: int, start: int = 0) -> pd.DataFrame:
+        """Servers in the OLA layout, with workload, environment, utilization and current cost"""
+        rng = self._rng('multiplatform', start)
+        os_names, categories, shares = zip(*OPERATING_SYSTEMS)
+        os_idx = rng.choice(len(os_names), n_servers, p=shares)
+        category = np.array(categories)[os_idx]
+        servers = self._servers(rng, category, n_servers)
+
+        environment_idx = rng.choice(len(ENVIRONMENTS), n_servers, p=ENVIRONMENT_MIX)
+        utilization = np.empty(n_servers)
+        for i, env in enumerate(ENVIRONMENTS):
+            mask = environment_idx == i
+            utilization[mask] = rng.beta(*UTILIZATION_BETA[env], mask.sum())
+
+        monthly_cost = (servers['cpu'] * ON_PREM_COST_PER_CORE
+                        + servers['memory'] * ON_PREM_COST_PER_GB_MEMORY
+                        + servers['storage'] * ON_PREM_COST_PER_GB_STORAGE
+                        + np.where(category == 'Windows', servers['cpu'] * WINDOWS_LICENSE_PER_CORE, 0))
+        monthly_cost *= rng.lognormal(0, 0.15, n_servers)
+
+        # Drawn after everything else, so the other columns of a seeded fleet are the same as before it existed
+        sql_cdf = np.cumsum([SQL_EDITION_MIX['Non-Production'], SQL_EDITION_MIX['Production']], axis=1)
+        sql_idx = self._pick(rng, sql_cdf[(environment_idx == 0).astype(np.intp)]) + 1
+        runs_sql = (category == 'Windows') & (servers['workload'] == 'Database').to_numpy()
+
+        return pd.DataFrame({
+            'Server_Name': self._names('Server', start, n_servers),
+            'CPU_Cores': servers['cpu'],
+            'Memory_GB': servers['memory'],
+            'Storage_GB': servers['storage'],
+            'OS': self._labels(os_names, os_idx),
+            'Platform_Category': self._labels(categories, os_idx),
+            'Workload_Type': servers['workload'],
+            'Environment': self._labels(ENVIRONMENTS, environment_idx),
+            'Utilization_CPU': np.clip(np.rint(utilization * 100), 1, 100).astype(np.int64),
+            'Monthly_Cost': np.rint(monthly_cost).astype(np.int64),
+            'Application_Count': servers['applications'],
+            'Storage_Type': servers['storage_type'],
+            'SQL_Edition': self._labels(['None'] + SQL_EDITIONS, np.where(runs_sql, sql_idx, 0)),
+        })
+
+    def file_servers(self, n_servers: int, start: int = 0) -> pd.DataFrame:
+        """Windows file servers for the ONE OLA storage analysis"""
+        rng = self._rng('file_servers', start)
+        types, shares, access_mix, compliance_rate = zip(*FILE_SERVER_TYPES)
+        type_idx = rng.choice(len(types), n_servers, p=shares)
+        is_archive = np.isin(type_idx, [types.index('Archive'), types.index('Backup')])
+        is_backup = type_idx == types.index('Backup')
+
+        capacity = rng.choice(FILE_SERVER_CAPACITY_GB, n_servers, p=[0.15, 0.25, 0.25, 0.20, 0.10, 0.05])
+        # Archives fill up; live shares sit around 70% used
+        used_pct = np.where(is_archive, rng.beta(9, 2, n_servers), rng.beta(6, 2.5, n_servers))
+        used_pct = np.clip(np.rint(used_pct * 100), 30, 98).astype(np.int64)
+        used_gb = capacity * used_pct // 100
+
+        access_idx = self._pick(rng, np.cumsum(access_mix, axis=1)[type_idx])
+        server_type = pa.array(types).take(pa.array(type_idx))
+
+        return pd.DataFrame({
+            'Server_Name': self._names(pc.binary_join_element_wise(server_type, '-FS-', ''), start, n_servers, width=2),
+            'Server_Type': server_type.to_pandas(),
+            'Capacity_GB': capacity,
+            'Used_GB': used_gb,
+            'Free_GB': capacity - used_gb,
+            'Utilization_%': used_pct,
+            'Access_Pattern': self._labels(ACCESS_PATTERNS, access_idx),
+            'Backup_Required': rng.random(n_servers) < np.where(is_backup, 0.0, 0.85),
+            'Compliance_Data': rng.random(n_servers) < np.array(compliance_rate)[type_idx],
+        })
+
+    def share_io_metrics(self, file_servers: pd.DataFrame, days: int = 30, sample_minutes: int = 1,
+                         shares_per_chunk: int = 20) -> Iterator[pd.DataFrame]:
+        """Per-share throughput and IOPS samples, a few shares at a time, with business-hours load and bursts"""
+        timestamps = pd.date_range(IO_METRICS_START, periods=days * 1440 // sample_minutes, freq=f'{sample_minutes}min')
+        minute_of_day = timestamps.hour * 60 + timestamps.minute
+        business_hours = (timestamps.dayofweek < 5) & (minute_of_day >= 8 * 60) & (minute_of_day < 18 * 60)
+        load_shape = np.where(business_hours, 1.0, OFF_HOURS_FACTOR)
+        burst_samples = max(1, BURST_MINUTES // sample_minutes)
+        pattern = file_servers['Access_Pattern'].fillna('Low') if 'Access_Pattern' in file_servers \
+            else pd.Series('Low', index=file_servers.index)
+
+        for start in range(0, len(file_servers), shares_per_chunk):
+            rng = self._rng('share_io', start)
+            chunk = pattern.iloc[start:start + shares_per_chunk]
+            n_shares, n_samples = len(chunk), len(timestamps)
+            median = chunk.map({k: v[0] for k, v in SHARE_IO_PROFILES.items()}).fillna(2.0).to_numpy()
+            bursts_per_day = chunk.map({k: v[1] for k, v in SHARE_IO_PROFILES.items()}).fillna(1.0).to_numpy()
+
+            throughput = (median * rng.lognormal(0, 0.5, n_shares))[:, None] * load_shape * \
+                rng.lognormal(0, 0.25, (n_shares, n_samples))
+            # A burst stays active for burst_samples after each start: a moving count over the start indicators
+            starts = rng.random((n_shares, n_samples)) < (bursts_per_day * sample_minutes / 1440)[:, None]
+            active = np.cumsum(starts, axis=1)
+            active[:, burst_samples:] -= active[:, :-burst_samples].copy()
+            throughput *= np.where(active > 0, BURST_FACTOR, 1.0)
+            io_size_kb = rng.uniform(*IO_SIZE_KB, n_shares)[:, None]
+            iops = throughput * 1024 / io_size_kb * rng.lognormal(0, 0.1, (n_shares, n_samples))
+
+            yield pd.DataFrame({
+                'Server_Name': np.repeat(file_servers['Server_Name'].to_numpy()[start:start + n_shares], n_samples),
+                'Timestamp': np.tile(timestamps.to_numpy(), n_shares),
+                'Throughput_MBps': throughput.ravel().round(2),
+                'IOPS': iops.ravel().round(),
+            })
+
+    def directory_export(self, n_users: int, as_of: float, n_computers: Optional[int] = None,
+                         n_groups: Optional[int] = None, n_gpos: Optional[int] = None,
+                         n_domain_controllers: Optional[int] = None) -> Iterator[str]:
+        """ldifde-style LDIF lines for a directory, with disabled and stale accounts and nested groups;
+        logon times are relative to as_of (Unix seconds)"""
+        rng = self._rng('directory', 0)
+        n_computers = round(n_users * COMPUTERS_PER_USER) if n_computers is None else n_computers
+        n_groups = max(1, round(n_users * GROUPS_PER_USER)) if n_groups is None else n_groups
+        n_gpos = max(2, round(n_users * GPOS_PER_USER)) if n_gpos is None else n_gpos
+        if n_domain_controllers is None:
+            n_domain_controllers = max(2, -(-n_users // USERS_PER_DOMAIN_CONTROLLER))
+
+        def logons(n):
+            """lastLogonTimestamp values (FILETIME, '' for never) and userAccountControl per account"""
+            state = rng.random(n)
+            idle_days = np.where(state < STALE_ACCOUNT_SHARE, rng.uniform(90, 365, n), rng.uniform(0, 14, n))
+            filetime = ((as_of - idle_days * 86_400 + 11_644_473_600) * 1e7).astype(np.int64).astype(str)
+            never = (state >= STALE_ACCOUNT_SHARE) & (state < STALE_ACCOUNT_SHARE + NEVER_LOGGED_ON_SHARE)
+            disabled = rng.random(n) < DISABLED_ACCOUNT_SHARE
+            return np.where(never, '', filetime), np.where(disabled, 514, 512)
+
+        yield 'version: 1'
+        yield ''
+        for ou in ['Users', 'Workstations', 'Groups', 'Domain Controllers']:
+            yield from [f'dn: OU={ou},{DIRECTORY_DOMAIN}', 'objectClass: top', 'objectClass: organizationalUnit', '']
+
+        for i in range(n_gpos):
+            guid = '{%08X-0000-4000-8000-%012X}' % (i, i)
+            yield from [f'dn: CN={guid},CN=Policies,CN=System,{DIRECTORY_DOMAIN}', 'objectClass: top',
+                        'objectClass: container', 'objectClass: groupPolicyContainer', '']
+
+        for i in range(n_domain_controllers):
+            yield from [f'dn: CN=DC{i + 1:02d},OU=Domain Controllers,{DIRECTORY_DOMAIN}', 'objectClass: top',
+                        'objectClass: computer', 'userAccountControl: 532480', '']
+
+        last_logon, uac = logons(n_users)
+        for i in range(n_users):
+            yield f'dn: CN=User{i + 1:06d},OU=Users,{DIRECTORY_DOMAIN}'
+            yield from ['objectClass: top', 'objectClass: person', 'objectClass: organizationalPerson',
+                        'objectClass: user', f'userAccountControl: {uac[i]}']
+            if last_logon[i]:
+                yield f'lastLogonTimestamp: {last_logon[i]}'
+            yield ''
+
+        last_logon, uac = logons(n_computers)
+        for i in range(n_computers):
+            yield f'dn: CN=PC{i + 1:06d},OU=Workstations,{DIRECTORY_DOMAIN}'
+            yield from ['objectClass: top', 'objectClass: computer', f'userAccountControl: {uac[i] + 3584}']
+            if last_logon[i]:
+                yield f'lastLogonTimestamp: {last_logon[i]}'
+            yield ''
+
+        # Each nested group sits inside a random earlier one, so chains grow like a real delegation tree
+        nested = rng.random(n_groups) < NESTED_GROUP_SHARE
+        nested[0] = False
+        parent = (rng.random(n_groups) * np.arange(n_groups)).astype(np.int64)
+        child_groups = pd.Series(np.flatnonzero(nested)).groupby(parent[nested]).agg(list)
+        member_counts = np.minimum(rng.lognormal(np.log(GROUP_MEMBERS_MEDIAN), 1.0, n_groups).astype(np.int64), n_users)
+        for i in range(n_groups):
+            yield from [f'dn: CN=Group{i + 1:05d},OU=Groups,{DIRECTORY_DOMAIN}', 'objectClass: top', 'objectClass: group']
+            for user in rng.choice(n_users, member_counts[i], replace=False) if n_users else []:
+                yield f'member: CN=User{user + 1:06d},OU=Users,{DIRECTORY_DOMAIN}'
+            for group in child_groups.get(i, []):
+                yield f'member: CN=Group{group + 1:05d},OU=Groups,{DIRECTORY_DOMAIN}'
+            yield ''
+
+    def iter_chunks(self, kind: str, n_servers: int, chunk_rows: int = 250_000) -> Iterator[pd.DataFrame]:
+        """Generate a large fleet in bounded-memory chunks"""
+        generate = self._generator(kind)
+        for start in range(0, n_servers, chunk_rows):
+            yield generate(min(chunk_rows, n_servers - start), start=start)
+
+    def write_parquet(self, path: str, kind: str, n_servers: int, chunk_rows: int = 250_000) -> str:
+        """Stream a fleet to Parquet, one row group per chunk"""
+        writer = None
+        try:
+            for chunk in self.iter_chunks(kind, n_servers, chunk_rows):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return path
+
+    def _servers(self, rng: np.random.Generator, category: np.ndarray, n_servers: int) -> Dict[str, np.ndarray]:
+        """Workload-driven hardware: the workload sets the core count, GiB per core, disk size and disk type"""
+        workloads = list(WORKLOAD_PROFILES)
+        workload_idx = np.empty(n_servers, dtype=np.intp)
+        application_mean = np.empty(n_servers)
+        for cat, mix in WORKLOAD_MIX.items():
+            mask = category == cat
+            workload_idx[mask] = rng.choice(len(workloads), mask.sum(), p=mix)
+            application_mean[mask] = APPLICATION_MEAN[cat]
+
+        profiles = list(WORKLOAD_PROFILES.values())
+        cpu_cdf = np.cumsum([p['cpu'] for p in profiles], axis=1)[workload_idx]
+        ratio_cdf = np.cumsum([p['ratio'] for p in profiles], axis=1)[workload_idx]
+        type_cdf = np.cumsum([p['storage_type'] for p in profiles], axis=1)[workload_idx]
+        storage_median = np.array([p['storage_gb'] for p in profiles], dtype=np.float64)[workload_idx]
+
+        cpu = CPU_CHOICES[self._pick(rng, cpu_cdf)]
+        memory = cpu * MEMORY_PER_CORE[self._pick(rng, ratio_cdf)]
+        # Log-normal disk sizes, rounded to 50 GB like provisioned LUNs
+        storage = np.maximum(np.rint(storage_median * rng.lognormal(0, 0.6, n_servers) / 50) * 50, 50).astype(np.int64)
+        applications = 1 + rng.poisson(application_mean)
+
+        return {
+            'workload': self._labels(workloads, workload_idx),
+            'cpu': cpu,
+            'memory': memory,
+            'storage': storage,
+            'storage_type': self._labels(STORAGE_TYPES, self._pick(rng, type_cdf)),
+            'applications': np.minimum(applications, 12),
+        }
+
+    def _generator(self, kind: str):
+        if kind not in GENERATORS:
+            raise ValueError(f"Unknown fleet kind: {kind}")
+        return {'inventory': self.server_inventory, 'multiplatform': self.multiplatform_inventory,
+                'file_servers': self.file_servers}[kind]
+
+    def _rng(self, kind: str, start: int) -> np.random.Generator:
+        # Each chunk gets its own stream, so chunked and parallel generation stay reproducible
+        return np.random.default_rng([self.seed, (GENERATORS + DERIVED_STREAMS).index(kind), start])
+
+    @staticmethod
+    def _labels(options: Sequence[str], idx: np.ndarray) -> pd.Series:
+        # Arrow's take builds the string column in C; a NumPy unicode array costs ~10x more to convert
+        return pa.array(list(options)).take(pa.array(idx)).to_pandas()
+
+    @staticmethod
+    def _pick(rng: np.random.Generator, cdf: np.ndarray) -> np.ndarray:
+        """Row-wise categorical draw from per-row cumulative probabilities"""
+        draws = rng.random(len(cdf))[:, None]
+        return (draws > cdf).sum(axis=1).clip(max=cdf.shape[1] - 1)
+
+    @staticmethod
+    def _names(prefix, start: int, n_servers: int, width: int = 3) -> pd.Series:
+        """Prefix + zero-padded sequence number (Server001, Finance-FS-01, ...)"""
+        numbers = pc.cast(pa.array(np.arange(start + 1, start + n_servers + 1)), pa.string())
+        return pc.binary_join_element_wise(prefix, pc.utf8_lpad(numbers, width, '0'), '').to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic server fleet for load testing')
+    parser.add_argument('--kind', choices=GENERATORS, default='inventory', help='Fleet layout')
+    parser.add_argument('--servers', type=int, default=1_000_000, help='Number of servers')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--chunk-rows', type=int, default=250_000, help='Rows generated per Parquet row group')
+    parser.add_argument('--output', default='fleet.parquet', help='Parquet output file')
+
+    args = parser.parse_args()
+    FleetGenerator(args.seed).write_parquet(args.output, args.kind, args.servers, args.chunk_rows)
+    print(f"Wrote {args.servers:,} {args.kind} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
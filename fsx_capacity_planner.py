@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+FSx Capacity Planner
+Streams per-share I/O samples into fixed-bin histograms and sizes FSx for Windows File Server throughput capacity and storage type from p95 demand
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from typing import Iterable, Iterator, Optional
+
+from storage_analyzer import FSX_ACCESS_PROFILES
+
+METRIC_COLUMNS = ['Server_Name', 'Throughput_MBps', 'IOPS']
+
+# FSx for Windows throughput capacities (MB/s), the SSD IOPS each can drive and the network throughput it can burst to
+THROUGHPUT_CAPACITIES_MBPS = np.array([32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 12288])
+MAX_IOPS = np.array([2_000, 4_000, 8_000, 16_000, 32_000, 40_000, 80_000, 160_000, 300_000, 400_000])
+BURST_THROUGHPUT_MBPS = np.array([600, 600, 1250, 1250, 1250, 1250, 2048, 4096, 8192, 12288])
+# Time a share may spend above its throughput capacity, riding burst credits
+BURST_MINUTES_PER_DAY = 60
+
+# HDD storage serves 12 MB/s and 12 IOPS per TiB at baseline and tops out at 2,048 MB/s throughput capacity;
+# SSD includes 3 IOPS per GiB and more can be provisioned
+HDD_MBPS_PER_TIB = 12
+HDD_IOPS_PER_TIB = 12
+HDD_MAX_THROUGHPUT_MBPS = 2048
+SSD_IOPS_PER_GB = 3
+MIN_STORAGE_GB = {'SSD': 32, 'HDD': 2000}
+# Provisioned storage covers used capacity plus growth
+STORAGE_HEADROOM = 0.25
+
+# $/month: storage per GB, throughput capacity per MB/s, SSD IOPS beyond the included 3 per GiB
+STORAGE_PRICE_PER_GB = {('SSD', 'Single-AZ'): 0.13, ('SSD', 'Multi-AZ'): 0.23,
+                        ('HDD', 'Single-AZ'): 0.013, ('HDD', 'Multi-AZ'): 0.025}
+THROUGHPUT_PRICE_PER_MBPS = {'Single-AZ': 2.20, 'Multi-AZ': 4.50}
+SSD_IOPS_PRICE = 0.012
+
+# Histogram bins are log2-spaced, so a sample's bin is arithmetic rather than a search; 32 bins per octave keep
+# percentiles within ~2%, and the power-of-two capacities fall exactly on bin edges
+BINS_PER_OCTAVE = 32
+THROUGHPUT_OCTAVES = (-7, 17)
+IOPS_OCTAVES = (-3, 24)
+# A share must not exceed its capacity's burst throughput beyond this percentile of its samples
+BURST_PERCENTILE = 99.9
+
+
+def read_metric_chunks(source, file_name: Optional[str] = None, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Stream a CSV or Parquet I/O export (path or file-like) in bounded-memory chunks"""
+    file_name = file_name or getattr(source, 'name', str(source))
+    if os.path.splitext(file_name)[1].lower() == '.parquet':
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=METRIC_COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=METRIC_COLUMNS, chunksize=chunk_rows)
+
+
+class FsxCapacityPlanner:
+    """Keeps a throughput and an IOPS histogram per share, so memory does not grow with the number of samples"""
+
+    def __init__(self, percentile: float = 95, headroom: float = 0.2):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.shares = pd.Index([])
+        self._throughput = np.zeros((0, len(self._edges(THROUGHPUT_OCTAVES))), dtype=np.int64)
+        self._iops = np.zeros((0, len(self._edges(IOPS_OCTAVES))), dtype=np.int64)
+        self._peak = np.zeros(0)
+
+    def add(self, samples: pd.DataFrame):
+        """Fold one chunk of (Server_Name, Throughput_MBps, IOPS) samples into the histograms"""
+        codes, names = pd.factorize(samples['Server_Name'])
+        new = pd.Index(names).difference(self.shares, sort=False)
+        if len(new):
+            self.shares = self.shares.append(new)
+            self._throughput = np.vstack([self._throughput, np.zeros((len(new), self._throughput.shape[1]), np.int64)])
+            self._iops = np.vstack([self._iops, np.zeros((len(new), self._iops.shape[1]), np.int64)])
+            self._peak = np.append(self._peak, np.zeros(len(new)))
+        share = self.shares.get_indexer(names)[codes]
+
+        throughput = pd.to_numeric(samples['Throughput_MBps'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        iops = pd.to_numeric(samples['IOPS'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        self._throughput += self._histogram(share, throughput, THROUGHPUT_OCTAVES, len(self.shares))
+        self._iops += self._histogram(share, iops, IOPS_OCTAVES, len(self.shares))
+        chunk_peak = pd.Series(throughput).groupby(share).max()
+        self._peak[chunk_peak.index] = np.maximum(self._peak[chunk_peak.index], chunk_peak.to_numpy())
+
+    def add_all(self, chunks: Iterable[pd.DataFrame]) -> 'FsxCapacityPlanner':
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    def demand(self) -> pd.DataFrame:
+        """Per-share samples, throughput at the planning and burst percentiles and at peak, IOPS at the planning percentile"""
+        return pd.DataFrame({
+            'Server_Name': self.shares,
+            'Samples': self._throughput.sum(axis=1),
+            'P95_Throughput_MBps': self._quantile(self._throughput, THROUGHPUT_OCTAVES, self.percentile),
+            'Burst_Throughput_MBps': self._quantile(self._throughput, THROUGHPUT_OCTAVES, BURST_PERCENTILE),
+            'Peak_Throughput_MBps': self._peak,
+            'P95_IOPS': self._quantile(self._iops, IOPS_OCTAVES, self.percentile),
+        })
+
+    def plan(self, storage_df: pd.DataFrame) -> pd.DataFrame:
+        """Smallest throughput capacity and cheapest storage type meeting each file server's demand with headroom"""
+        demand = self.demand().set_index('Server_Name').reindex(storage_df['Server_Name'])
+        measured = demand['Samples'].fillna(0).to_numpy() > 0
+        throughput_needed = demand['P95_Throughput_MBps'].fillna(0).to_numpy() * (1 + self.headroom)
+        iops_needed = demand['P95_IOPS'].fillna(0).to_numpy() * (1 + self.headroom)
+        burst = demand['Burst_Throughput_MBps'].fillna(0).to_numpy()
+
+        # Minutes per day above every capacity: the histogram tail from that capacity's edge over all samples
+        rows = self.shares.get_indexer(storage_df['Server_Name'])
+        tail = np.cumsum(self._throughput[:, ::-1], axis=1)[:, ::-1]
+        above = np.zeros((len(rows), len(THROUGHPUT_CAPACITIES_MBPS)))
+        capacity_bins = np.searchsorted(self._edges(THROUGHPUT_OCTAVES), THROUGHPUT_CAPACITIES_MBPS)
+        above[measured] = tail[rows[measured]][:, capacity_bins]
+        burst_minutes = above / np.maximum(demand['Samples'].fillna(0).to_numpy(), 1)[:, None] * 1440
+
+        fits = ((THROUGHPUT_CAPACITIES_MBPS >= throughput_needed[:, None]) & (MAX_IOPS >= iops_needed[:, None])
+                & (burst_minutes <= BURST_MINUTES_PER_DAY) & (BURST_THROUGHPUT_MBPS >= burst[:, None]))
+        tier = np.where(fits.any(axis=1), fits.argmax(axis=1), len(THROUGHPUT_CAPACITIES_MBPS) - 1)
+
+        pattern = storage_df['Access_Pattern'].fillna('Low') if 'Access_Pattern' in storage_df \
+            else pd.Series('Low', index=storage_df.index)
+        deployment = pattern.map({k: v[0] for k, v in FSX_ACCESS_PROFILES.items()}).fillna('Single-AZ').to_numpy()
+        # Servers without samples keep the access-pattern estimate, raised to the smallest capacity on offer
+        profile_throughput = pattern.map({k: v[1] for k, v in FSX_ACCESS_PROFILES.items()}).fillna(16).to_numpy()
+        tier = np.where(measured, tier, np.searchsorted(THROUGHPUT_CAPACITIES_MBPS, profile_throughput))
+        capacity = THROUGHPUT_CAPACITIES_MBPS[tier]
+
+        used_gb = pd.to_numeric(storage_df['Used_GB'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        needed_gb = np.ceil(used_gb * (1 + STORAGE_HEADROOM))
+        multi_az = deployment == 'Multi-AZ'
+        ssd_gb = np.maximum(needed_gb, MIN_STORAGE_GB['SSD'])
+        ssd_cost = (ssd_gb * np.where(multi_az, STORAGE_PRICE_PER_GB[('SSD', 'Multi-AZ')], STORAGE_PRICE_PER_GB[('SSD', 'Single-AZ')])
+                    + np.maximum(iops_needed - ssd_gb * SSD_IOPS_PER_GB, 0) * SSD_IOPS_PRICE)
+        hdd_gb = np.maximum(needed_gb, MIN_STORAGE_GB['HDD'])
+        hdd_cost = hdd_gb * np.where(multi_az, STORAGE_PRICE_PER_GB[('HDD', 'Multi-AZ')], STORAGE_PRICE_PER_GB[('HDD', 'Single-AZ')])
+        # HDD only where measured demand fits its baseline disk performance, and only when it is the cheaper one
+        use_hdd = (measured & (throughput_needed <= hdd_gb / 1024 * HDD_MBPS_PER_TIB)
+                   & (iops_needed <= hdd_gb / 1024 * HDD_IOPS_PER_TIB) & (capacity <= HDD_MAX_THROUGHPUT_MBPS)
+                   & (hdd_cost < ssd_cost))
+        throughput_price = np.where(multi_az, THROUGHPUT_PRICE_PER_MBPS['Multi-AZ'], THROUGHPUT_PRICE_PER_MBPS['Single-AZ'])
+        monthly_cost = np.where(use_hdd, hdd_cost, ssd_cost) + capacity * throughput_price
+
+        return pd.DataFrame({
+            'File Server': storage_df['Server_Name'].to_numpy(),
+            'Current Storage (GB)': used_gb,
+            'Recommended FSx': deployment,
+            'Storage Type': np.where(use_hdd, 'HDD', 'SSD'),
+            'Provisioned (GB)': np.where(use_hdd, hdd_gb, ssd_gb),
+            'P95 Throughput (MB/s)': demand['P95_Throughput_MBps'].fillna(0).round(1).to_numpy(),
+            'Throughput Capacity (MB/s)': capacity,
+            'P95 IOPS': demand['P95_IOPS'].fillna(0).round().to_numpy(),
+            'Burst Min/Day': burst_minutes[np.arange(len(tier)), tier].round(1),
+            'Measured': measured,
+            'Est. Monthly Cost': monthly_cost.round(),
+        }, index=storage_df.index)
+
+    @classmethod
+    def _quantile(cls, histogram: np.ndarray, octaves, percentile: float) -> np.ndarray:
+        """Upper edge of the bin holding the percentile, so it errs high by at most one bin"""
+        cumulative = np.cumsum(histogram, axis=1)
+        bins = (cumulative < cumulative[:, -1:] * percentile / 100).sum(axis=1)
+        edges = cls._edges(octaves)
+        return np.append(edges[1:], edges[-1])[bins]
+
+    @staticmethod
+    def _edges(octaves) -> np.ndarray:
+        """Lower edge of every bin: 0 for the zero/underflow bin, then 2**(i / BINS_PER_OCTAVE)"""
+        low, high = octaves
+        return np.concatenate([[0.0], 2.0 ** (np.arange(low * BINS_PER_OCTAVE, high * BINS_PER_OCTAVE) / BINS_PER_OCTAVE)])
+
+    @classmethod
+    def _histogram(cls, share: np.ndarray, values: np.ndarray, octaves, n_shares: int) -> np.ndarray:
+        n_bins = len(cls._edges(octaves))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = np.floor(np.log2(values) * BINS_PER_OCTAVE) - octaves[0] * BINS_PER_OCTAVE + 1
+        # Zero, negative and missing samples land in bin 0, anything past the top octave in the last bin
+        bins = np.nan_to_num(position, nan=0.0, neginf=0.0).clip(0, n_bins - 1).astype(np.intp)
+        return np.bincount(share * n_bins + bins, minlength=n_shares * n_bins).reshape(n_shares, n_bins)
+
+def main():
+    parser = argparse.ArgumentParser(description='Size FSx throughput capacity from per-share I/O samples')
+    parser.add_argument('metrics', help='CSV or Parquet with Server_Name, Throughput_MBps, IOPS samples')
+    parser.add_argument('--file-servers', required=True, help='CSV of file servers with Server_Name and Used_GB')
+    parser.add_argument('--output', default='fsx_plan.csv', help='Plan CSV')
+    args = parser.parse_args()
+
+    planner = FsxCapacityPlanner().add_all(read_metric_chunks(args.metrics))
+    planner.plan(pd.read_csv(args.file_servers)).to_csv(args.output, index=False)
+    print(f"Planned {len(planner.shares):,} shares to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Hostname Reconciliation
+Character n-gram blocking index that scores likely matches between host names from different inventory sources
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from source_join import normalize_host
+
+# EC2 / CUR style "i-0abc123 Name=web01" or "...;name=web01"
+NAME_TAG_PATTERN = r"(?i)(?:^|[\s,;|])name[=:]\s*([^\s,;|]+)"
+# Separators dropped before matching, so WEB-01, web_01 and web01 are the same host
+SEPARATOR_PATTERN = r"[\s\-_]"
+
+# Candidate pairs expanded per batch (the summed length of the posting lists looked up); bounds memory
+POSTINGS_PER_BATCH = 2_000_000
+# Grams shared by more hosts than this are not used for blocking, at least this many and at least ~sqrt(hosts)
+MIN_BLOCKING_DF = 256
+
+
+def canonical_host(names: pd.Series) -> pd.Series:
+    """Name tag if present, then the short normalized host name without separators"""
+    names = names.astype(str)
+    tagged = names.str.extract(NAME_TAG_PATTERN, expand=False)
+    names = names.where(tagged.isna(), tagged)
+    return normalize_host(names).str.replace(SEPARATOR_PATTERN, "", regex=True)
+
+
+def host_ngrams(canonical: pd.Series, n: int = 3) -> pd.DataFrame:
+    """Distinct (row, gram) pairs of each padded name; '^web01$' yields '^we', 'web', ..., '01$'"""
+    padded = ('^' + canonical + '$').reset_index(drop=True)
+    longest = int(padded.str.len().max()) if len(padded) else 0
+    parts = []
+    for start in range(max(longest - n + 1, 0)):
+        gram = padded.str[start:start + n]
+        parts.append(gram[gram.str.len() == n])
+    if not parts:
+        return pd.DataFrame({'row': np.empty(0, dtype=np.intp), 'gram': pd.Series([], dtype=str)})
+    grams = pd.concat(parts)
+    return pd.DataFrame({'row': grams.index.to_numpy(dtype=np.intp), 'gram': grams.to_numpy()}).drop_duplicates()
+
+
+class HostnameIndex:
+    """Inverted n-gram index over reference host names (the server inventory)"""
+
+    def __init__(self, hosts, n: int = 3, prefix_grams: int = 6, max_df: Optional[int] = None):
+        self.hosts = pd.Index(hosts)
+        self.n = n
+        self.prefix_grams = prefix_grams
+        self.max_df = max_df or max(MIN_BLOCKING_DF, int(np.sqrt(len(self.hosts))))
+        self.canonical = canonical_host(pd.Series(self.hosts, dtype=str)).reset_index(drop=True)
+
+        # First host for each canonical name, for exact matches
+        first = ~self.canonical.duplicated()
+        self._exact = pd.Series(np.flatnonzero(first), index=self.canonical[first].to_numpy())
+
+        grams = host_ngrams(self.canonical, n)
+        gram_ids, vocabulary = pd.factorize(grams['gram'])
+        self.vocabulary = pd.Index(vocabulary)
+        order = np.argsort(gram_ids, kind='stable')
+        self._postings = grams['row'].to_numpy()[order]
+        self._offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        self._offsets[1:] = np.cumsum(np.bincount(gram_ids, minlength=len(self.vocabulary)))
+        self._names = self.canonical.tolist()
+        self._gram_sets: Dict[int, frozenset] = {}
+
+    def candidates(self, queries, top_k: int = 3, min_score: float = 0.5) -> pd.DataFrame:
+        """Best-scoring hosts for each query name: exact canonical matches first, then n-gram Dice"""
+        queries = pd.Series(pd.Index(queries).unique(), dtype=str)
+        canonical = canonical_host(queries).reset_index(drop=True)
+
+        exact_rows = self._exact.reindex(canonical.to_numpy()).to_numpy()
+        is_exact = ~np.isnan(exact_rows)
+        results = [pd.DataFrame({
+            'Query': queries[is_exact].to_numpy(),
+            'Candidate': self.hosts[exact_rows[is_exact].astype(np.intp)],
+            'Score': 1.0,
+            'Method': 'exact',
+        })]
+
+        fuzzy = np.flatnonzero(~is_exact)
+        if len(fuzzy):
+            matches = self._score(canonical.iloc[fuzzy].reset_index(drop=True), top_k, min_score)
+            matches['Query'] = queries.to_numpy()[fuzzy][matches.pop('query_row').to_numpy()]
+            results.append(matches)
+
+        columns = ['Query', 'Candidate', 'Score', 'Method']
+        return pd.concat([r[columns] for r in results], ignore_index=True)
+
+    def _score(self, canonical: pd.Series, top_k: int, min_score: float) -> pd.DataFrame:
+        grams = host_ngrams(canonical, self.n)
+        query_sets = grams.groupby('row')['gram'].agg(frozenset).to_dict()
+        gram_ids = self.vocabulary.get_indexer(grams['gram'])
+        df = self._offsets[gram_ids + 1] - self._offsets[gram_ids]
+        # Block on each query's rarest grams (prefix filtering), skipping grams such as 'srv' or '000' that
+        # would pair the query with a large part of the fleet, which is the O(n^2) this index avoids
+        usable = (gram_ids >= 0) & (df <= self.max_df)
+        rows, gram_ids, df = grams['row'].to_numpy()[usable], gram_ids[usable], df[usable]
+        keep = self._top_per_query(rows, df, self.prefix_grams)
+        rows, gram_ids, df = rows[keep], gram_ids[keep], df[keep]
+
+        if not len(rows):
+            return pd.DataFrame({'query_row': np.empty(0, dtype=np.int64), 'Candidate': self.hosts[:0],
+                                 'Score': np.empty(0), 'Method': 'ngram'})
+
+        # Rows are grouped by query, so batches split on query boundaries by the postings they expand to
+        query_ends = np.flatnonzero(np.r_[rows[1:] != rows[:-1], True]) + 1
+        batch = np.cumsum(df)[query_ends - 1] // POSTINGS_PER_BATCH
+        bounds = np.r_[0, query_ends[np.flatnonzero(np.r_[batch[1:] != batch[:-1], True])]]
+        shortlisted = [self._shortlist(rows[lo:hi], gram_ids[lo:hi], df[lo:hi], top_k)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+        query_rows = np.concatenate([pair[0] for pair in shortlisted])
+        host_rows = np.concatenate([pair[1] for pair in shortlisted])
+
+        # Dice coefficient on the full gram sets, only for the short-listed pairs
+        scores = np.fromiter(
+            (self._dice(query_sets[q], self._host_grams(h)) for q, h in zip(query_rows.tolist(), host_rows.tolist())),
+            dtype=np.float64, count=len(query_rows)).round(3)
+        passing = scores >= min_score
+        query_rows, host_rows, scores = query_rows[passing], host_rows[passing], scores[passing]
+        best = self._top_per_query(query_rows, -scores, top_k)
+        return pd.DataFrame({
+            'query_row': query_rows[best],
+            'Candidate': self.hosts[host_rows[best]],
+            'Score': scores[best],
+            'Method': 'ngram',
+        })
+
+    def _shortlist(self, rows: np.ndarray, gram_ids: np.ndarray, df: np.ndarray, top_k: int):
+        """Hosts sharing the most blocking grams with each query, as (query rows, host rows)"""
+        # Expand the kept posting lists into (query row, host row) pairs and count shared grams
+        starts = np.repeat(self._offsets[gram_ids] - np.cumsum(df) + df, df)
+        hosts = self._postings[np.arange(int(df.sum())) + starts]
+        pairs = np.repeat(rows, df).astype(np.int64) * len(self.hosts) + hosts
+        pair_codes, shared = np.unique(pairs, return_counts=True)
+        query_rows, host_rows = pair_codes // len(self.hosts), pair_codes % len(self.hosts)
+
+        # Pairs sharing a single rare gram are noise whenever the query has better-connected candidates
+        starts = np.flatnonzero(np.r_[True, query_rows[1:] != query_rows[:-1]])
+        best_shared = np.repeat(np.maximum.reduceat(shared, starts), np.diff(np.r_[starts, len(shared)]))
+        strong = shared >= np.minimum(best_shared, 2)
+        query_rows, host_rows, shared = query_rows[strong], host_rows[strong], shared[strong]
+        shortlist = self._top_per_query(query_rows, -shared, top_k * 3)
+        return query_rows[shortlist], host_rows[shortlist]
+
+    @staticmethod
+    def _top_per_query(query_rows: np.ndarray, sort_key: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k smallest sort_key values within each query, grouped by query"""
+        order = np.lexsort((sort_key, query_rows))
+        grouped = query_rows[order]
+        rank = np.arange(len(order)) - np.searchsorted(grouped, grouped)
+        return order[rank < k]
+
+    def _host_grams(self, row: int) -> frozenset:
+        if row not in self._gram_sets:
+            padded = f"^{self._names[row]}$"
+            self._gram_sets[row] = frozenset(padded[i:i + self.n] for i in range(len(padded) - self.n + 1))
+        return self._gram_sets[row]
+
+    @staticmethod
+    def _dice(a: frozenset, b: frozenset) -> float:
+        return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class HostnameReconciler:
+    def __init__(self, n: int = 3, top_k: int = 3, min_score: float = 0.5):
+        self.n = n
+        self.top_k = top_k
+        self.min_score = min_score
+
+    def reconcile(self, server_keys, unmatched: Dict[str, pd.Index]) -> pd.DataFrame:
+        """Scored server candidates for every source host the exact join left unmatched"""
+        index = HostnameIndex(server_keys, self.n)
+        matches = []
+        for source, hosts in unmatched.items():
+            if len(hosts):
+                found = index.candidates(hosts, self.top_k, self.min_score)
+                matches.append(found.rename(columns={'Query': 'Source Host', 'Candidate': 'Server'}).assign(Source=source.title()))
+        if not matches:
+            return pd.DataFrame(columns=['Source', 'Source Host', 'Server', 'Score', 'Method'])
+        return pd.concat(matches, ignore_index=True)[['Source', 'Source Host', 'Server', 'Score', 'Method']]
+
+    @staticmethod
+    def aliases(matches: pd.DataFrame, link_score: float) -> Dict[str, Dict[str, str]]:
+        """Best candidate per source host at or above link_score, as {source: {source host: server key}}"""
+        best = matches[matches['Score'] >= link_score].sort_values('Score', ascending=False, kind='stable')
+        best = best.drop_duplicates(['Source', 'Source Host'])
+        return {source.lower(): dict(zip(group['Source Host'], group['Server'])) for source, group in best.groupby('Source')}
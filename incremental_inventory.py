@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Incremental Inventory
+Keeps per-server sizing, pricing and portfolio totals in sync with row-level inventory edits
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, Iterable, List, Optional
+
+from inventory_validation import REQUIRED_COLUMNS
+from server_inventory_analyzer import ServerInventoryAnalyzer
+
+COST_COLUMNS = ['Compute_Monthly_Cost', 'License_Monthly_Cost', 'Storage_Monthly_Cost', 'Estimated_Monthly_Cost']
+# Odd 64-bit multiplier that folds per-column hashes into one row hash
+ROW_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def latest_rows(keys: pd.Series) -> np.ndarray:
+    """True for the last row of each key"""
+    if len(pc.unique(pa.array(keys.astype(str)))) == len(keys):
+        return np.ones(len(keys), dtype=bool)
+    return ~keys.duplicated(keep='last').to_numpy()
+
+
+def row_fingerprints(rows: pd.DataFrame, exclude: Iterable[str] = ()) -> np.ndarray:
+    """64-bit content hash per row over every column but the excluded ones; numbers are compared as floats so 4 and
+    4.0 hash alike, and text is hashed once per distinct value"""
+    combined = np.zeros(len(rows), dtype=np.uint64)
+    for column in rows.columns.drop(list(exclude), errors='ignore'):
+        values = rows[column]
+        if pd.api.types.is_numeric_dtype(values):
+            hashed = pd.util.hash_array(values.to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            codes, uniques = pd.factorize(values)
+            distinct = np.append(np.asarray(uniques, dtype=object).astype(str), None)
+            hashed = pd.util.hash_array(distinct)[codes]
+        combined = combined * ROW_HASH_MULTIPLIER + hashed
+    return combined
+
+
+class IncrementalInventory:
+    def __init__(self, inventory: pd.DataFrame, analyzer: Optional[ServerInventoryAnalyzer] = None):
+        self.analyzer = analyzer or ServerInventoryAnalyzer()
+        self.base = inventory.reset_index(drop=True)
+        self.current = self._row_mutable(self.base)
+        self.recommendations = self._row_mutable(self.analyzer.analyze_inventory_dataframe(self.current))
+        self._row_stats = self._compute_row_stats(self.current, self.recommendations)
+        self.totals = self._row_stats.sum().to_dict()
+        self.family_counts = self.recommendations['Instance_Family'].value_counts().to_dict()
+        self.rows_recomputed = 0
+
+        # Editor deltas already applied, relative to self.base (st.data_editor reports them cumulatively)
+        self._applied_edits: Dict[int, Dict] = {}
+        self._applied_added: List[Dict] = []
+        self._applied_deleted: set = set()
+        # Content hash of each current row, kept from the last refresh until a row changes
+        self._stored_hashes: Optional[np.ndarray] = None
+
+    def sync_editor_state(self, editor_state: Dict) -> List[int]:
+        """Apply the changes in an st.data_editor delta that are new since the last sync"""
+        edits = {int(row): dict(values) for row, values in editor_state.get('edited_rows', {}).items()}
+        added = [dict(row) for row in editor_state.get('added_rows', [])]
+        deleted = {int(row) for row in editor_state.get('deleted_rows', [])}
+
+        changed_rows = {row for row in set(edits) | set(self._applied_edits) if edits.get(row) != self._applied_edits.get(row)}
+        newly_deleted = deleted - self._applied_deleted
+        restored = self._applied_deleted - deleted
+        added_changed = [i for i in range(max(len(added), len(self._applied_added)))
+                         if i >= len(added) or i >= len(self._applied_added) or added[i] != self._applied_added[i]]
+
+        upserts = {}
+        for row in (changed_rows | restored) - deleted:
+            values = self.base.loc[row].to_dict()
+            values.update(edits.get(row, {}))
+            upserts[row] = values
+        for i in added_changed:
+            if i < len(added):
+                upserts[len(self.base) + i] = added[i]
+        removals = list(newly_deleted) + [len(self.base) + i for i in added_changed if i >= len(added)]
+
+        self._applied_edits, self._applied_added, self._applied_deleted = edits, added, deleted
+        self.delete_rows(removals)
+        self.upsert_rows(pd.DataFrame.from_dict(upserts, orient='index', columns=self.base.columns) if upserts else None)
+        return sorted(upserts) + sorted(removals)
+
+    def upsert_rows(self, rows: Optional[pd.DataFrame]):
+        """Insert or replace rows by index label, re-sizing and re-pricing only those rows"""
+        if rows is None or rows.empty:
+            return
+        self._stored_hashes = None
+        existing = rows.index.intersection(self.current.index)
+        inserted = rows.index.difference(self.current.index)
+        self._subtract(existing)
+
+        new_recs = self.analyzer.analyze_inventory_dataframe(rows)
+        new_stats = self._compute_row_stats(rows, new_recs)
+        if len(existing):
+            self.current.loc[existing] = rows.loc[existing, self.current.columns]
+            self.recommendations.loc[existing] = new_recs.loc[existing]
+            self._row_stats.loc[existing] = new_stats.loc[existing]
+        if len(inserted):
+            self.current = pd.concat([self.current, rows.loc[inserted, self.current.columns]])
+            self.recommendations = pd.concat([self.recommendations, new_recs.loc[inserted]])
+            self._row_stats = pd.concat([self._row_stats, new_stats.loc[inserted]])
+        self._add(new_stats, new_recs['Instance_Family'])
+        self.rows_recomputed += len(rows)
+
+    def refresh(self, inventory: pd.DataFrame, key: str = 'Server_Name') -> Dict[str, int]:
+        """Apply a re-exported inventory as a delta, matching rows on key; only inserted, changed and removed servers
+        are re-sized and re-priced, and the portfolio totals are adjusted by their difference"""
+        if key not in inventory or key not in self.current:
+            raise ValueError(f"Both inventories need a {key} column to be matched")
+        latest = latest_rows(inventory[key])
+        incoming = inventory if latest.all() else inventory[latest]
+        if list(incoming.columns) != list(self.current.columns):
+            incoming = incoming.reindex(columns=self.current.columns)
+
+        # Arrow hash lookup from key to current row position; a name repeated in the stored inventory keeps its last row
+        stored_latest = latest_rows(self.current[key])
+        stored_keys = pa.array(self.current[key].astype(str)).filter(pa.array(stored_latest))
+        lookup = pc.index_in(pa.array(incoming[key].astype(str)), value_set=stored_keys)
+        lookup = lookup.to_numpy(zero_copy_only=False)
+        matched = ~np.isnan(lookup) if lookup.dtype.kind == 'f' else np.ones(len(lookup), dtype=bool)
+        positions = np.flatnonzero(stored_latest)[lookup[matched].astype(np.intp)]
+        incoming_hashes = row_fingerprints(incoming, exclude=[key])
+        stored_hashes = self._stored_hashes if self._stored_hashes is not None else row_fingerprints(self.current, exclude=[key])
+        changed = stored_hashes[positions] != incoming_hashes[matched]
+
+        updates = incoming.iloc[np.flatnonzero(matched)[changed]].set_axis(self.current.index[positions[changed]])
+        next_label = int(self.current.index.max()) + 1 if len(self.current) else 0
+        inserts = incoming.iloc[np.flatnonzero(~matched)]
+        inserts = inserts.set_axis(pd.RangeIndex(next_label, next_label + len(inserts)))
+        kept = np.zeros(len(self.current), dtype=bool)
+        kept[positions] = True
+        removed = self.current.index[~kept]
+
+        self.delete_rows(removed)
+        changes = [frame for frame in (updates, inserts) if len(frame)]
+        self.upsert_rows(pd.concat(changes) if changes else None)
+        self._rebase()
+        # Kept rows stay in order with the inserts after them, so the incoming hashes line up without another lookup
+        self._stored_hashes = np.concatenate([incoming_hashes[matched][np.argsort(positions, kind='stable')],
+                                              incoming_hashes[~matched]])
+        return {
+            'inserted': len(inserts),
+            'updated': int(changed.sum()),
+            'deleted': len(removed),
+            'unchanged': int((~changed).sum()),
+            'duplicates': int((~latest).sum()),
+        }
+
+    def delete_rows(self, labels: Iterable):
+        labels = self.current.index.intersection(pd.Index(list(labels)))
+        if not len(labels):
+            return
+        self._stored_hashes = None
+        self._subtract(labels)
+        self.current = self.current.drop(labels)
+        self.recommendations = self.recommendations.drop(labels)
+        self._row_stats = self._row_stats.drop(labels)
+
+    def summary(self) -> Dict:
+        """Portfolio totals kept up to date without rescanning the inventory"""
+        return {
+            'total_servers': len(self.current),
+            'windows_servers': int(self.totals['is_windows']),
+            'linux_servers': int(self.totals['is_linux']),
+            'missing_data_points': int(self.totals['missing_total']),
+            'missing_by_column': {column: int(self.totals[f"missing_{column}"]) for column in REQUIRED_COLUMNS},
+            'total_estimated_cost': float(self.totals['Estimated_Monthly_Cost']),
+            'compute_cost': float(self.totals['Compute_Monthly_Cost']),
+            'license_cost': float(self.totals['License_Monthly_Cost']),
+            'storage_cost': float(self.totals['Storage_Monthly_Cost']),
+            'servers_by_family': {family: count for family, count in self.family_counts.items() if count},
+        }
+
+    def _subtract(self, labels: pd.Index):
+        if not len(labels):
+            return
+        for key, value in self._row_stats.loc[labels].sum().items():
+            self.totals[key] -= value
+        for family, count in self.recommendations.loc[labels, 'Instance_Family'].value_counts().items():
+            self.family_counts[family] -= count
+
+    def _add(self, stats: pd.DataFrame, families: pd.Series):
+        for key, value in stats.sum().items():
+            self.totals[key] += value
+        for family, count in families.value_counts().items():
+            self.family_counts[family] = self.family_counts.get(family, 0) + count
+
+    def _rebase(self):
+        """Renumber rows 0..n-1 and make the current inventory the editor's base, so later editor deltas line up"""
+        self.current = self.current.reset_index(drop=True)
+        self.recommendations = self.recommendations.reset_index(drop=True)
+        self._row_stats = self._row_stats.reset_index(drop=True)
+        self.base = self.current.copy()
+        self._applied_edits, self._applied_added, self._applied_deleted = {}, [], set()
+
+    @staticmethod
+    def _row_mutable(frame: pd.DataFrame) -> pd.DataFrame:
+        """Copy with text columns as object dtype; Arrow-backed strings rewrite the whole column on each .loc update"""
+        text_columns = frame.select_dtypes(include=['string', 'object']).columns
+        return frame.astype({column: object for column in text_columns})
+
+    @staticmethod
+    def _compute_row_stats(rows: pd.DataFrame, recommendations: pd.DataFrame) -> pd.DataFrame:
+        """Per-row contributions to the portfolio totals"""
+        os_name = rows['OS'] if 'OS' in rows else pd.Series('', index=rows.index)
+        stats = pd.DataFrame({
+            'is_windows': os_name.str.contains('Windows', na=False, case=False).astype(np.int64),
+            'is_linux': os_name.str.contains('Linux', na=False, case=False).astype(np.int64),
+            'missing_total': rows.isnull().sum(axis=1).astype(np.int64),
+        }, index=rows.index)
+        for column in REQUIRED_COLUMNS:
+            stats[f"missing_{column}"] = rows[column].isnull().astype(np.int64) if column in rows else 1
+        for column in COST_COLUMNS:
+            stats[column] = recommendations[column].to_numpy()
+        return stats
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Performance Instrumentation
+Page and stage timers, rerun counts, cache hit rates and session memory, exported as Prometheus text
+"""
+
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Recent durations kept per timer for the quantiles; older runs only count towards _count/_sum
+TIMER_WINDOW = 500
+QUANTILES = (0.5, 0.95, 0.99)
+# A session without a memory sample for this many sample intervals is taken to have ended
+SESSION_EXPIRY_INTERVALS = 4
+
+
+def estimate_size(obj, _seen: set = None) -> int:
+    """Approximate bytes held by an object, following containers and instance attributes"""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes) if obj.base is None else sys.getsizeof(obj)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+class CacheLookup:
+    """Handed to a cached function; calling miss() from its body marks the lookup as a miss"""
+
+    def __init__(self):
+        self.hit = True
+
+    def miss(self):
+        self.hit = False
+
+
+class PerformanceMonitor:
+    """Process-wide metrics shared by every Streamlit session"""
+
+    def __init__(self, metrics_path: str = '.toolkit_cache/metrics/toolkit.prom',
+                 flush_interval: float = 15.0, memory_sample_interval: float = 30.0):
+        self.metrics_path = metrics_path
+        self.flush_interval = flush_interval
+        self.memory_sample_interval = memory_sample_interval
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._timers: Dict[tuple, Dict] = {}
+        self._reruns: Dict[str, int] = defaultdict(int)
+        self._cache: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._observed: Dict[tuple, tuple] = {}
+        self._session_memory: Dict[str, tuple] = {}
+        self._last_flush = 0.0
+
+    @contextmanager
+    def timer(self, kind: str, name: str) -> Iterator[None]:
+        """Time a 'page' or 'stage' block; st.rerun()/st.stop() exits still count"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_duration(kind, name, time.perf_counter() - start)
+
+    def record_duration(self, kind: str, name: str, seconds: float):
+        with self._lock:
+            timer = self._timers.get((kind, name))
+            if timer is None:
+                timer = self._timers[(kind, name)] = {'count': 0, 'sum': 0.0, 'max': 0.0,
+                                                      'recent': deque(maxlen=TIMER_WINDOW)}
+            timer['count'] += 1
+            timer['sum'] += seconds
+            timer['max'] = max(timer['max'], seconds)
+            timer['recent'].append(seconds)
+
+    def record_rerun(self, page: str):
+        with self._lock:
+            self._reruns[page] += 1
+
+    def record_cache(self, cache: str, hit: bool):
+        with self._lock:
+            self._cache[cache]['hits' if hit else 'misses'] += 1
+
+    @contextmanager
+    def cache_lookup(self, cache: str) -> Iterator[CacheLookup]:
+        """Count a call into an st.cache_data function that reports its own misses"""
+        lookup = CacheLookup()
+        yield lookup
+        self.record_cache(cache, lookup.hit)
+
+    def observe_cache(self, cache: str, source: str, hits: int, misses: int):
+        """Fold in cumulative hit/miss counters kept by an object (exporter, scenario graph)"""
+        with self._lock:
+            last_hits, last_misses = self._observed.get((cache, source), (0, 0))
+            if hits < last_hits or misses < last_misses:
+                # The source was rebuilt and its counters restarted
+                last_hits, last_misses = 0, 0
+            self._cache[cache]['hits'] += hits - last_hits
+            self._cache[cache]['misses'] += misses - last_misses
+            self._observed[(cache, source)] = (hits, misses)
+
+    def memory_sample_due(self, session_id: str) -> bool:
+        sample = self._session_memory.get(session_id)
+        return sample is None or time.time() - sample[1] >= self.memory_sample_interval
+
+    def record_session_memory(self, session_id: str, nbytes: int):
+        with self._lock:
+            self._session_memory[session_id] = (nbytes, time.time())
+
+    def _expire_sessions(self) -> Dict[str, int]:
+        """Drop sessions whose last sample is too old to still be running; bytes per remaining session. Caller holds
+        the lock"""
+        cutoff = time.time() - SESSION_EXPIRY_INTERVALS * self.memory_sample_interval
+        for session_id in [sid for sid, (_, sampled) in self._session_memory.items() if sampled < cutoff]:
+            del self._session_memory[session_id]
+        return {session_id: nbytes for session_id, (nbytes, _) in self._session_memory.items()}
+
+    def snapshot(self) -> Dict:
+        """Current metrics as tables for the sidebar panel"""
+        with self._lock:
+            timers = pd.DataFrame([
+                {'Kind': kind, 'Name': name, 'Calls': t['count'], 'Mean (ms)': t['sum'] / t['count'] * 1000,
+                 'P95 (ms)': float(np.quantile(t['recent'], 0.95)) * 1000, 'Max (ms)': t['max'] * 1000}
+                for (kind, name), t in sorted(self._timers.items())
+            ], columns=['Kind', 'Name', 'Calls', 'Mean (ms)', 'P95 (ms)', 'Max (ms)'])
+            caches = pd.DataFrame([
+                {'Cache': cache, 'Hits': c['hits'], 'Misses': c['misses'],
+                 'Hit Rate': c['hits'] / (c['hits'] + c['misses']) if c['hits'] + c['misses'] else 0.0}
+                for cache, c in sorted(self._cache.items())
+            ], columns=['Cache', 'Hits', 'Misses', 'Hit Rate'])
+            memory = self._expire_sessions()
+            return {
+                'timers': timers.round(1),
+                'caches': caches,
+                'reruns': dict(self._reruns),
+                'sessions': len(memory),
+                'session_memory_bytes': sum(memory.values()),
+            }
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for kind in ('page', 'stage'):
+                metric = f"toolkit_{kind}_seconds"
+                lines += [f"# HELP {metric} Wall time per {kind}", f"# TYPE {metric} summary"]
+                for (timer_kind, name), t in sorted(self._timers.items()):
+                    if timer_kind != kind:
+                        continue
+                    label = f'{kind}="{self._escape(name)}"'
+                    for q, value in zip(QUANTILES, np.quantile(t['recent'], QUANTILES)):
+                        lines.append(f'{metric}{{{label},quantile="{q}"}} {value:.6f}')
+                    lines.append(f"{metric}_sum{{{label}}} {t['sum']:.6f}")
+                    lines.append(f"{metric}_count{{{label}}} {t['count']}")
+
+            lines += ["# HELP toolkit_reruns_total Script reruns by page", "# TYPE toolkit_reruns_total counter"]
+            lines += [f'toolkit_reruns_total{{page="{self._escape(page)}"}} {count}'
+                      for page, count in sorted(self._reruns.items())]
+
+            lines += ["# HELP toolkit_cache_requests_total Cache lookups by result",
+                      "# TYPE toolkit_cache_requests_total counter"]
+            for cache, c in sorted(self._cache.items()):
+                lines.append(f'toolkit_cache_requests_total{{cache="{self._escape(cache)}",result="hit"}} {c["hits"]}')
+                lines.append(f'toolkit_cache_requests_total{{cache="{self._escape(cache)}",result="miss"}} {c["misses"]}')
+
+            memory = list(self._expire_sessions().values())
+            lines += ["# HELP toolkit_sessions Sessions with a recent memory sample", "# TYPE toolkit_sessions gauge",
+                      f"toolkit_sessions {len(memory)}",
+                      "# HELP toolkit_session_memory_bytes Estimated session_state size across sessions",
+                      "# TYPE toolkit_session_memory_bytes gauge",
+                      f'toolkit_session_memory_bytes{{stat="total"}} {sum(memory)}',
+                      f'toolkit_session_memory_bytes{{stat="max"}} {max(memory, default=0)}',
+                      "# HELP toolkit_uptime_seconds Seconds since the monitor started",
+                      "# TYPE toolkit_uptime_seconds gauge",
+                      f"toolkit_uptime_seconds {time.time() - self.started:.0f}"]
+        return '\n'.join(lines) + '\n'
+
+    def flush(self, force: bool = False) -> bool:
+        """Rewrite the metrics file at most once per flush_interval; returns True if written"""
+        now = time.time()
+        if not force and now - self._last_flush < self.flush_interval:
+            return False
+        self._last_flush = now
+        os.makedirs(os.path.dirname(self.metrics_path) or '.', exist_ok=True)
+        tmp_path = f"{self.metrics_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as fh:
+            fh.write(self.prometheus_text())
+        # Scrapers (node_exporter's textfile collector) never see a half-written file
+        os.replace(tmp_path, self.metrics_path)
+        return True
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
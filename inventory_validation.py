@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Inventory Validation
+Data quality checks run on an uploaded server inventory before analysis
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+# Columns every sizing decision depends on, with the wording used in issue messages
+REQUIRED_COLUMNS = {
+    'CPU_Cores': 'CPU',
+    'Memory_GB': 'memory',
+    'Storage_GB': 'storage',
+}
+
+# Values no real server has; beyond them the column was almost certainly exported in the wrong unit
+MAX_CPU_CORES = 448
+MAX_MEMORY_GB_PER_CORE = 128
+MIN_MEMORY_GB_PER_CORE = 0.25
+MAX_STORAGE_GB = 1_000_000
+BYTES_PER_GB = 1024 ** 3
+
+# Robust outliers: modified z-score 0.6745 * |x - median| / MAD of log values, within OS platform and role
+ANOMALY_Z_THRESHOLD = 3.5
+# Floor on the log MAD, so a group where most servers share one size still tolerates a few doublings
+MIN_LOG_MAD = np.log(2) / 2
+# Groups smaller than this are compared with their whole platform instead
+MIN_GROUP_SIZE = 20
+# Measures compared within each group; the ratio catches a memory column in MB even when cores are plausible
+ANOMALY_MEASURES = ['CPU_Cores', 'Memory_GB', 'Storage_GB', 'GB_Per_Core']
+PLATFORMS = ['Windows', 'Linux', 'Other']
+ANOMALY_COLUMNS = ['Server_Name', 'Column', 'Value', 'Check', 'Group', 'Group_Median', 'Explanation']
+
+
+class InventoryValidator:
+    def validate(self, df: pd.DataFrame) -> Dict:
+        """Count servers by platform, report missing required values and count anomalies by check"""
+        os_name = df['OS'] if 'OS' in df else pd.Series('', index=df.index)
+        missing_by_column = {
+            column: int(df[column].isnull().sum()) if column in df else len(df)
+            for column in REQUIRED_COLUMNS
+        }
+        return {
+            'total_servers': len(df),
+            'windows_servers': int(os_name.str.contains('Windows', na=False, case=False).sum()),
+            'linux_servers': int(os_name.str.contains('Linux', na=False, case=False).sum()),
+            'missing_data_points': int(df.isnull().sum().sum()),
+            'missing_by_column': missing_by_column,
+            'issues': self.describe_missing(missing_by_column),
+            'anomalies_by_check': {check: int(count) for check, count in
+                                   self.detect_anomalies(df)['Check'].value_counts().items()},
+        }
+
+    def detect_anomalies(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One row per suspicious value: unit and range rules first, then robust outliers within OS platform and role"""
+        cpu = self._numeric(df, 'CPU_Cores')
+        memory = self._numeric(df, 'Memory_GB')
+        storage = self._numeric(df, 'Storage_GB')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_core = np.where(cpu > 0, memory / cpu, np.nan)
+        measures = {'CPU_Cores': cpu, 'Memory_GB': memory, 'Storage_GB': storage, 'GB_Per_Core': per_core}
+
+        rules = [
+            ('CPU_Cores', cpu <= 0, 'Invalid', "CPU_Cores is {value:,.0f}; every server needs at least one core"),
+            ('CPU_Cores', cpu > MAX_CPU_CORES, 'Invalid',
+             f"CPU_Cores {{value:,.0f}} is above the {MAX_CPU_CORES} of the largest instances; check for a threads or host total"),
+            ('Memory_GB', memory <= 0, 'Invalid', "Memory_GB is {value:,.0f}; every server needs memory"),
+            ('Storage_GB', storage < 0, 'Invalid', "Storage_GB is negative ({value:,.0f})"),
+            ('GB_Per_Core', per_core > MAX_MEMORY_GB_PER_CORE, 'Unit mismatch',
+             f"{{value:,.0f}} GB of memory per core is above {MAX_MEMORY_GB_PER_CORE}; Memory_GB looks like MB"),
+            ('GB_Per_Core', per_core < MIN_MEMORY_GB_PER_CORE, 'Unit mismatch',
+             f"{{value:,.2f}} GB of memory per core is below {MIN_MEMORY_GB_PER_CORE}; Memory_GB looks like TB, or CPU_Cores counts threads"),
+            ('Storage_GB', storage >= BYTES_PER_GB, 'Unit mismatch', "Storage_GB {value:,.0f} looks like bytes"),
+            ('Storage_GB', (storage > MAX_STORAGE_GB) & (storage < BYTES_PER_GB), 'Unit mismatch',
+             f"Storage_GB {{value:,.0f}} is above {MAX_STORAGE_GB:,} GB for one server; looks like MB"),
+        ]
+        names = df['Server_Name'] if 'Server_Name' in df else None
+        flagged = {column: np.zeros(len(df), dtype=bool) for column in ANOMALY_MEASURES}
+        found = []
+        for column, mask, check, message in rules:
+            flagged[column] |= mask
+            rows = np.flatnonzero(mask)
+            found.append(self._anomaly_rows(names, rows, column, measures[column][rows], check, None, None,
+                                            [message.format(value=value) for value in measures[column][rows]]))
+
+        # Log scale: sizes are multiplicative, so a 10x error is equally far out whether the median is 4 or 400
+        group_labels, codes, platform_codes = self._groups(df)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = pd.DataFrame({column: np.log(np.where(values > 0, values, np.nan)) for column, values in measures.items()})
+        # Values already explained by a rule would only drag the group statistics
+        for column in ANOMALY_MEASURES:
+            logs.loc[flagged[column], column] = np.nan
+        median = logs.groupby(codes).transform('median')
+        mad = (logs - median).abs().groupby(codes).transform('median')
+        small = np.bincount(codes)[codes] < MIN_GROUP_SIZE
+        if small.any():
+            platform_median = logs.groupby(platform_codes).transform('median')
+            platform_mad = (logs - platform_median).abs().groupby(platform_codes).transform('median')
+            median[small], mad[small] = platform_median[small], platform_mad[small]
+        z = 0.6745 * (logs - median).abs() / np.maximum(mad, MIN_LOG_MAD)
+
+        for column in ANOMALY_MEASURES:
+            rows = np.flatnonzero((z[column] > ANOMALY_Z_THRESHOLD).to_numpy())
+            if not len(rows):
+                continue
+            values = measures[column][rows]
+            typical = np.exp(median[column].to_numpy()[rows])
+            groups = np.where(small[rows], np.array(PLATFORMS)[platform_codes[rows]], group_labels.to_numpy()[codes[rows]])
+            ratio = np.where(values >= typical, values / typical, typical / values)
+            direction = np.where(values >= typical, 'above', 'below')
+            explanations = [f"{column} {self._format(value)} is {r:,.0f}x {d} the {group} median of {self._format(med)}"
+                            for value, r, d, group, med in zip(values, ratio, direction, groups, typical)]
+            found.append(self._anomaly_rows(names, rows, column, values, 'Outlier', groups, typical, explanations))
+
+        anomalies = pd.concat(found, ignore_index=True)
+        # Reported by index label, which the inventory editor shows, rather than position
+        anomalies = anomalies.sort_values('Row', kind='stable').reset_index(drop=True)
+        anomalies['Row'] = df.index.to_numpy()[anomalies['Row'].to_numpy()]
+        return anomalies
+
+    @staticmethod
+    def describe_anomalies(anomalies: pd.DataFrame, examples: int = 3) -> List[str]:
+        """One issue line per column and check, with the first few offending servers"""
+        lines = []
+        for (column, check), group in anomalies.groupby(['Column', 'Check'], sort=False):
+            names = ', '.join(group['Server_Name'].astype(str).head(examples))
+            more = f" and {len(group) - examples:,} more" if len(group) > examples else ""
+            lines.append(f"• {len(group):,} servers with {check.lower()} {column} ({names}{more}): "
+                         f"{group['Explanation'].iloc[0]}")
+        return lines
+
+    def _groups(self, df: pd.DataFrame):
+        """'Platform / role' label per group, each row's group code and its platform code; Workload_Type is the role"""
+        os_codes, os_names = pd.factorize(df['OS'] if 'OS' in df else pd.Series('', index=df.index))
+        os_names = pd.Series(os_names, dtype=object).astype(str)
+        platform_names = np.select([os_names.str.contains('windows', case=False, regex=False),
+                                    os_names.str.contains('linux|ubuntu|rhel|red hat|centos|suse|debian', case=False)],
+                                   [0, 1], 2)
+        platform_codes = np.append(platform_names, 2)[os_codes]
+        if 'Workload_Type' in df:
+            role_codes, roles = pd.factorize(df['Workload_Type'], use_na_sentinel=False)
+            roles = pd.Series(roles, dtype=object).fillna('Unknown').astype(str)
+        else:
+            role_codes, roles = np.zeros(len(df), dtype=np.intp), pd.Series(['All'])
+        # Integer pair keys factorize far faster than a MultiIndex of strings
+        codes, keys = pd.factorize(platform_codes * len(roles) + role_codes)
+        labels = pd.Series([f"{PLATFORMS[key // len(roles)]} / {roles[key % len(roles)]}" for key in keys])
+        return labels, codes, platform_codes
+
+    @staticmethod
+    def _anomaly_rows(names, rows, column, values, check, groups, medians, explanations) -> pd.DataFrame:
+        return pd.DataFrame({
+            'Row': rows,
+            'Server_Name': names.take(rows).to_numpy() if names is not None else rows.astype(str),
+            'Column': column,
+            'Value': values,
+            'Check': check,
+            'Group': groups,
+            'Group_Median': medians,
+            'Explanation': explanations,
+        }, columns=['Row'] + ANOMALY_COLUMNS)
+
+    @staticmethod
+    def _format(value: float) -> str:
+        return f"{value:,.0f}" if abs(value) >= 10 else f"{value:.2g}"
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def describe_missing(missing_by_column: Dict[str, int]) -> List[str]:
+        """One issue line per required column with missing values"""
+        return [
+            f"• {count} servers missing {REQUIRED_COLUMNS[column]} information"
+            for column, count in missing_by_column.items() if count
+        ]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Local Job Queue
+SQLite-backed queue and worker processes for long-running, resumable assessment jobs
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+import pandas as pd
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Job kind -> 'module:attribute' of its [(label, stage function)] list, imported when a job of that kind runs
+JOB_KINDS = {
+    'map_assessment': 'assessment_jobs:MAP_ASSESSMENT_STAGES',
+}
+
+# A running job whose worker has not checked in for this long is requeued and resumes at its next stage
+STALE_AFTER_SECONDS = 30
+HEARTBEAT_SECONDS = 5
+WORKER_IDLE_EXIT_SECONDS = 60
+MAX_WORKERS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    stages_total INTEGER NOT NULL,
+    stages_done INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    worker_pid INTEGER,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+def load_stages(kind: str) -> List[Tuple[str, Callable]]:
+    """(label, function(job_dir, params)) pairs for a job kind"""
+    module_name, attribute = JOB_KINDS[kind].split(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class JobQueue:
+    def __init__(self, db_path: str = '.toolkit_cache/jobs/jobs.sqlite'):
+        self.db_path = db_path
+        self.jobs_dir = os.path.dirname(db_path) or '.'
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def submit(self, kind: str, params: Dict, inputs: Optional[Dict[str, pd.DataFrame]] = None) -> str:
+        """Queue a job; input frames are written to its directory before it becomes claimable"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        for name, frame in (inputs or {}).items():
+            frame.to_parquet(os.path.join(job_dir, f"{name}.parquet"), index=False)
+
+        stages_total = len(load_stages(kind))
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT INTO jobs (id, kind, status, params, stages_total, message, created, updated) "
+                       "VALUES (?, ?, 'queued', ?, ?, 'Queued', ?, ?)",
+                       (job_id, kind, json.dumps(params), stages_total, now, now))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['progress'] = job['stages_done'] / job['stages_total'] if job['stages_total'] else 1.0
+        return job
+
+    def retry(self, job_id: str):
+        """Requeue a failed job; it resumes after its last completed stage"""
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = 'queued', error = NULL, updated = ? WHERE id = ? AND status = 'failed'",
+                       (time.time(), job_id))
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def load_frame(self, job_id: str, name: str) -> Optional[pd.DataFrame]:
+        path = os.path.join(self.job_dir(job_id), f"{name}.parquet")
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def load_json(self, job_id: str, name: str) -> Optional[Dict]:
+        path = os.path.join(self.job_dir(job_id), f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as fh:
+            return json.load(fh)
+
+    def ensure_workers(self):
+        """Start worker processes for pending jobs, up to MAX_WORKERS alive at once"""
+        with self._connect() as db:
+            cutoff = time.time() - STALE_AFTER_SECONDS
+            db.execute("DELETE FROM workers WHERE heartbeat < ?", (cutoff,))
+            alive = db.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+            pending = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                                 "OR (status = 'running' AND heartbeat < ?)", (cutoff,)).fetchone()[0]
+        for _ in range(min(pending, MAX_WORKERS) - alive):
+            # Detached, so a Streamlit restart does not take running jobs down with it
+            worker = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', '--db', self.db_path],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            # Registered now rather than when it starts up, so the next rerun does not spawn another
+            self._worker_heartbeat(worker.pid)
+
+    def claim(self, worker_pid: int) -> Optional[Dict]:
+        """Atomically take the oldest queued job, or a running one whose worker stopped heartbeating"""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                             "ORDER BY created LIMIT 1", (now - STALE_AFTER_SECONDS,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status = 'running', worker_pid = ?, heartbeat = ?, updated = ? WHERE id = ?",
+                           (worker_pid, now, now, row['id']))
+            db.execute("COMMIT")
+        return self.get(row['id']) if row is not None else None
+
+    def run_job(self, job: Dict):
+        """Run the job's remaining stages, recording progress after each one"""
+        stages = load_stages(job['kind'])
+        job_dir = self.job_dir(job['id'])
+        for stage_index in range(job['stages_done'], len(stages)):
+            label, stage = stages[stage_index]
+            self._update(job['id'], message=label, heartbeat=time.time())
+            try:
+                stage(job_dir, job['params'])
+            except Exception as e:
+                self._update(job['id'], status='failed', error=f"{label} {type(e).__name__}: {e}",
+                             message=traceback.format_exc(limit=3))
+                return
+            self._update(job['id'], stages_done=stage_index + 1, heartbeat=time.time())
+        self._update(job['id'], status='done', message='Complete')
+
+    def work(self, idle_exit: float = WORKER_IDLE_EXIT_SECONDS):
+        """Worker loop: claim and run jobs until the queue has been empty for idle_exit seconds"""
+        pid = os.getpid()
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(HEARTBEAT_SECONDS):
+                self._worker_heartbeat(pid)
+
+        self._worker_heartbeat(pid)
+        threading.Thread(target=heartbeat, daemon=True).start()
+        idle_since = time.time()
+        try:
+            while time.time() - idle_since < idle_exit:
+                job = self.claim(pid)
+                if job is None:
+                    time.sleep(0.5)
+                    continue
+                self.run_job(job)
+                idle_since = time.time()
+        finally:
+            stop.set()
+            with self._connect() as db:
+                db.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+    def _worker_heartbeat(self, pid: int):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO workers (pid, heartbeat) VALUES (?, ?)", (pid, now))
+            db.execute("UPDATE jobs SET heartbeat = ? WHERE worker_pid = ? AND status = 'running'", (now, pid))
+
+    def _update(self, job_id: str, **fields):
+        fields['updated'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Autocommit connection, closed on exit; claim() opens its own write transaction"""
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Assessment job worker')
+    parser.add_argument('--worker', action='store_true', help='Run a worker until the queue is idle')
+    parser.add_argument('--db', default='.toolkit_cache/jobs/jobs.sqlite', help='Queue database')
+    parser.add_argument('--idle-exit', type=float, default=WORKER_IDLE_EXIT_SECONDS,
+                        help='Seconds without work before the worker exits')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if args.worker:
+        JobQueue(args.db).work(args.idle_exit)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
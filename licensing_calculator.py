@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Windows and SQL Server Licensing Calculator
+Per-server license cost under License Included, BYOL with Hybrid Benefit, and Dedicated Host, computed for the whole fleet at once
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+from server_inventory_analyzer import HOURS_PER_MONTH, WINDOWS_LICENSE_PER_VCPU_HOUR
+
+# Core-based licensing: every VM licenses at least this many cores, sold in 2-core packs
+WINDOWS_CORE_MINIMUM = 8
+SQL_CORE_MINIMUM = 4
+CORE_PACK_SIZE = 2
+
+# License-included SQL Server surcharge on EC2 $/vCPU-hour, charged on at least SQL_CORE_MINIMUM vCPUs
+SQL_LICENSE_PER_VCPU_HOUR = {
+    'Enterprise': 0.375,
+    'Standard': 0.12,
+    'Web': 0.017,
+    'Developer': 0.0,
+    'Express': 0.0,
+}
+
+# Software Assurance $/month per 2-core pack, the ongoing cost of bringing an owned license;
+# SQL Web has no BYOL path and stays license-included, Developer and Express are free
+SOFTWARE_ASSURANCE_PER_PACK = {
+    ('Windows', 'Standard'): 3.06,
+    ('Windows', 'Datacenter'): 17.63,
+    ('SQL', 'Standard'): 82.19,
+    ('SQL', 'Enterprise'): 315.06,
+}
+
+# Physical cores per Dedicated Host (m5, two sockets); Datacenter licenses the host and covers every VM on it
+DEDICATED_HOST_PHYSICAL_CORES = 48
+VCPU_PER_PHYSICAL_CORE = 2
+
+LICENSING_MODELS = ['License Included', 'BYOL', 'Dedicated Host']
+WINDOWS_EDITIONS = ['Standard', 'Datacenter']
+SQL_EDITIONS = list(SQL_LICENSE_PER_VCPU_HOUR)
+
+
+class LicensingCalculator:
+    def license_costs(self, inventory: pd.DataFrame, sizing: pd.DataFrame) -> pd.DataFrame:
+        """Monthly Windows and SQL Server license cost of every server under each licensing model"""
+        # Text columns are matched once per distinct value and mapped back to rows through the codes
+        os_codes, os_names = pd.factorize(self._text(inventory, 'OS'))
+        os_names = pd.Series(os_names, dtype=object)
+        is_windows = os_names.str.contains('windows', case=False, regex=False).to_numpy()[os_codes]
+        is_datacenter = is_windows & os_names.str.contains('datacenter', case=False, regex=False).to_numpy()[os_codes]
+        windows_edition = pd.Categorical.from_codes(is_windows.astype(np.int8) + is_datacenter, ['None'] + WINDOWS_EDITIONS)
+
+        # SQL Server only runs on the Windows hosts here; anything unrecognised is treated as no SQL Server
+        sql_codes, sql_names = pd.factorize(self._text(inventory, 'SQL_Edition'))
+        sql_idx = pd.Index(SQL_EDITIONS).get_indexer(pd.Series(sql_names, dtype=object).str.strip().str.title())
+        sql_idx = np.where(is_windows, sql_idx[sql_codes], -1)
+        has_sql = sql_idx >= 0
+        sql_edition = pd.Categorical.from_codes(sql_idx + 1, ['None'] + SQL_EDITIONS)
+
+        # Licenses follow the recommended instance's vCPUs; the on-premises core count stands in without sizing
+        vcpu = sizing['Instance_vCPU'] if 'Instance_vCPU' in sizing else inventory.get('CPU_Cores', pd.Series(0, index=inventory.index))
+        vcpu = pd.to_numeric(vcpu, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        physical_cores = np.ceil(vcpu / VCPU_PER_PHYSICAL_CORE)
+
+        windows_cores = np.where(is_windows, self._licensed_cores(vcpu, WINDOWS_CORE_MINIMUM), 0.0)
+        sql_cores = np.where(has_sql, self._licensed_cores(vcpu, SQL_CORE_MINIMUM), 0.0)
+
+        windows_li = np.where(is_windows, vcpu * WINDOWS_LICENSE_PER_VCPU_HOUR * HOURS_PER_MONTH, 0.0)
+        sql_rate = np.append(np.array(list(SQL_LICENSE_PER_VCPU_HOUR.values())), 0.0)[sql_idx]
+        sql_li = np.maximum(vcpu, SQL_CORE_MINIMUM) * sql_rate * HOURS_PER_MONTH * has_sql
+
+        windows_pack = np.where(is_datacenter, SOFTWARE_ASSURANCE_PER_PACK[('Windows', 'Datacenter')],
+                                np.where(is_windows, SOFTWARE_ASSURANCE_PER_PACK[('Windows', 'Standard')], 0.0))
+        windows_byol = windows_cores / CORE_PACK_SIZE * windows_pack
+        sql_pack = np.array([SOFTWARE_ASSURANCE_PER_PACK.get(('SQL', name), 0.0) for name in SQL_EDITIONS] + [0.0])[sql_idx]
+        sql_byol_eligible = sql_pack > 0
+        sql_byol = np.where(sql_byol_eligible, sql_cores / CORE_PACK_SIZE * sql_pack, sql_li)
+
+        # Dedicated Hosts are packed fleet-wide; each host's Datacenter licenses are shared by vCPU
+        windows_vcpu = np.where(is_windows, vcpu, 0.0)
+        hosts = np.ceil(np.ceil(windows_vcpu / VCPU_PER_PHYSICAL_CORE).sum() / DEDICATED_HOST_PHYSICAL_CORES)
+        host_license = hosts * DEDICATED_HOST_PHYSICAL_CORES / CORE_PACK_SIZE \
+            * SOFTWARE_ASSURANCE_PER_PACK[('Windows', 'Datacenter')]
+        windows_total_vcpu = windows_vcpu.sum()
+        windows_dedicated = windows_vcpu / windows_total_vcpu * host_license if windows_total_vcpu else windows_vcpu
+        # On a host SQL Server is licensed per physical core the VM uses, with no per-VM minimum
+        sql_dedicated = np.where(sql_byol_eligible,
+                                 np.ceil(physical_cores / CORE_PACK_SIZE) * sql_pack, sql_li)
+
+        costs = pd.DataFrame({
+            'Server_Name': self._text(inventory, 'Server_Name'),
+            'Windows_Edition': windows_edition,
+            'SQL_Edition': sql_edition,
+            'vCPU': vcpu,
+            'Windows_Licensed_Cores': windows_cores,
+            'SQL_Licensed_Cores': sql_cores,
+            'Windows_License_Included': windows_li.round(2),
+            'Windows_BYOL': windows_byol.round(2),
+            'Windows_Dedicated_Host': windows_dedicated.round(2),
+            'SQL_License_Included': sql_li.round(2),
+            'SQL_BYOL': sql_byol.round(2),
+            'SQL_Dedicated_Host': sql_dedicated.round(2),
+        }, index=inventory.index)
+        totals = np.column_stack([windows_li + sql_li, windows_byol + sql_byol, windows_dedicated + sql_dedicated])
+        costs['License_Included_Monthly'] = totals[:, 0].round(2)
+        costs['BYOL_Monthly'] = totals[:, 1].round(2)
+        costs['Dedicated_Host_Monthly'] = totals[:, 2].round(2)
+        # Ties (including servers with nothing to license) keep the simplest model
+        costs['Best_Model'] = pd.Categorical.from_codes(np.where(is_windows | has_sql, totals.argmin(axis=1) + 1, 0),
+                                                        ['None'] + LICENSING_MODELS)
+        costs['Hybrid_Benefit_Savings'] = (totals[:, 0] - totals[:, 1]).round(2)
+        return costs
+
+    def savings_by_license(self, costs: pd.DataFrame) -> pd.DataFrame:
+        """Hybrid Benefit savings per Windows and SQL Server edition, for the licensing review tables"""
+        rows = []
+        for product, editions, prefix in [('Windows Server', WINDOWS_EDITIONS, 'Windows'),
+                                          ('SQL Server', SQL_EDITIONS, 'SQL')]:
+            edition = costs[f'{prefix}_Edition']
+            grouped = costs.groupby(edition, sort=False)[[f'{prefix}_Licensed_Cores', f'{prefix}_License_Included',
+                                                          f'{prefix}_BYOL']].sum()
+            counts = edition.value_counts()
+            for name in editions:
+                if name not in grouped.index:
+                    continue
+                included, byol = grouped.at[name, f'{prefix}_License_Included'], grouped.at[name, f'{prefix}_BYOL']
+                rows.append({
+                    'License Type': f'{product} {name}',
+                    'Servers': int(counts[name]),
+                    'Licensed Cores': int(grouped.at[name, f'{prefix}_Licensed_Cores']),
+                    'License Included': round(float(included), 2),
+                    'With Hybrid Benefit': round(float(byol), 2),
+                    'Monthly Savings': round(float(included - byol), 2),
+                })
+        return pd.DataFrame(rows, columns=['License Type', 'Servers', 'Licensed Cores', 'License Included',
+                                           'With Hybrid Benefit', 'Monthly Savings'])
+
+    def summarize(self, costs: pd.DataFrame) -> Dict:
+        """Fleet totals per licensing model"""
+        return {
+            'license_included': float(costs['License_Included_Monthly'].sum()),
+            'byol': float(costs['BYOL_Monthly'].sum()),
+            'dedicated_host': float(costs['Dedicated_Host_Monthly'].sum()),
+            'hybrid_benefit_savings': float(costs['Hybrid_Benefit_Savings'].sum()),
+            'servers_by_model': {model: int(count) for model, count in costs['Best_Model'].value_counts().items()
+                                 if model != 'None' and count},
+        }
+
+    @staticmethod
+    def _licensed_cores(vcpu: np.ndarray, minimum: int) -> np.ndarray:
+        """vCPUs rounded up to whole 2-core packs, never below the per-VM minimum"""
+        return np.maximum(np.ceil(vcpu / CORE_PACK_SIZE) * CORE_PACK_SIZE, minimum)
+
+    @staticmethod
+    def _text(df: pd.DataFrame, column: str) -> pd.Series:
+        if column not in df:
+            return pd.Series('', index=df.index)
+        return df[column].fillna('').astype(str)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Paged Result Tables
+Server-side sort, filter and paging over a result frame using per-column sort orders built once
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence, Tuple
+
+# Text columns with at most this many distinct values get a value filter; the rest get a search box
+MAX_FACET_VALUES = 50
+# Search results kept per table, so paging through a search does not rescan the column
+SEARCH_CACHE_SIZE = 16
+
+
+class PagedTable:
+    """Read-only view over one result frame; only the requested page is ever copied out of it"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._codes: Dict[str, Tuple[np.ndarray, pd.Index]] = {}
+        self._searches: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def numeric_columns(self) -> list:
+        return [column for column in self.df.columns if pd.api.types.is_numeric_dtype(self.df[column])
+                and not pd.api.types.is_bool_dtype(self.df[column])]
+
+    def facet_columns(self) -> Dict[str, pd.Index]:
+        """Low-cardinality non-numeric columns and their values"""
+        numeric = set(self.numeric_columns())
+        facets = {}
+        for column in self.df.columns:
+            if column in numeric:
+                continue
+            _, uniques = self._factorized(column)
+            if len(uniques) <= MAX_FACET_VALUES:
+                facets[column] = uniques
+        return facets
+
+    def search_columns(self) -> list:
+        facets = self.facet_columns()
+        numeric = set(self.numeric_columns())
+        return [column for column in self.df.columns if column not in facets and column not in numeric]
+
+    def value_range(self, column: str) -> Tuple[float, float]:
+        """(min, max) of a numeric column, read from the ends of its sort order"""
+        values = self.df[column].to_numpy()
+        order = self.sort_order(column)
+        present = order[~pd.isna(values[order])]
+        if not len(present):
+            return 0.0, 0.0
+        return values[present[0]].item(), values[present[-1]].item()
+
+    def sort_order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Row positions in order of the column, missing values last either way; built on first use"""
+        if (column, ascending) not in self._orders:
+            if ascending:
+                values = self.df[column].reset_index(drop=True)
+                self._orders[(column, True)] = values.sort_values(kind='stable', na_position='last').index.to_numpy()
+            else:
+                order = self.sort_order(column)
+                present = len(order) - int(self.df[column].isna().sum())
+                self._orders[(column, False)] = np.concatenate([order[:present][::-1], order[present:]])
+        return self._orders[(column, ascending)]
+
+    def mask(self, facets: Optional[Dict[str, Sequence]] = None, ranges: Optional[Dict[str, Tuple]] = None,
+             search: Optional[Tuple[Sequence[str], str]] = None) -> Optional[np.ndarray]:
+        """Boolean row mask for the filters, or None when nothing is filtered; the search text matches a row when it
+        is found in any of the search columns"""
+        mask = None
+        for column, selected in (facets or {}).items():
+            codes, uniques = self._factorized(column)
+            keep = np.zeros(len(uniques) + 1, dtype=bool)
+            keep[uniques.get_indexer(pd.Index(list(selected)))] = True
+            # Code -1 (missing) lands on the spare last slot, which stays False
+            mask = self._and(mask, keep[codes])
+
+        for column, (low, high) in (ranges or {}).items():
+            # Rows in range are one contiguous run of the column's sort order
+            values = self.df[column].to_numpy()
+            order = self.sort_order(column)
+            present = order[~pd.isna(values[order])]
+            sorted_values = values[present]
+            start = np.searchsorted(sorted_values, low, side='left')
+            stop = np.searchsorted(sorted_values, high, side='right')
+            in_range = np.zeros(len(self.df), dtype=bool)
+            in_range[present[start:stop]] = True
+            mask = self._and(mask, in_range)
+
+        if search and search[1]:
+            columns, text = search
+            hits = np.zeros(len(self.df), dtype=bool)
+            for column in columns:
+                hits |= self._search(column, text)
+            mask = self._and(mask, hits)
+        return mask
+
+    def query(self, sort_by: Optional[str] = None, ascending: bool = True, mask: Optional[np.ndarray] = None,
+              page: int = 0, page_size: int = 50) -> Tuple[pd.DataFrame, int]:
+        """One page of the filtered, sorted frame and the number of rows matching the filters"""
+        if sort_by is not None:
+            positions = self.sort_order(sort_by, ascending)
+            if mask is not None:
+                positions = positions[mask[positions]]
+        elif mask is not None:
+            positions = np.flatnonzero(mask)
+        else:
+            positions = None
+
+        total = len(self.df) if positions is None else len(positions)
+        start = min(max(page, 0) * page_size, max(total - 1, 0) // page_size * page_size)
+        if positions is None:
+            return self.df.iloc[start:start + page_size], total
+        return self.df.iloc[positions[start:start + page_size]], total
+
+    def _factorized(self, column: str) -> Tuple[np.ndarray, pd.Index]:
+        if column not in self._codes:
+            codes, uniques = pd.factorize(self.df[column], sort=True)
+            self._codes[column] = (codes, pd.Index(uniques))
+        return self._codes[column]
+
+    def _search(self, column: str, text: str) -> np.ndarray:
+        key = (column, text.lower())
+        if key not in self._searches:
+            if len(self._searches) >= SEARCH_CACHE_SIZE:
+                self._searches.pop(next(iter(self._searches)))
+            # Substring match over the distinct values, then mapped back to rows through the codes
+            codes, uniques = self._factorized(column)
+            hits = pd.Series(uniques.astype(str)).str.contains(text, case=False, regex=False).to_numpy()
+            self._searches[key] = np.append(hits, False)[codes]
+        return self._searches[key]
+
+    @staticmethod
+    def _and(mask: Optional[np.ndarray], other: np.ndarray) -> np.ndarray:
+        return other if mask is None else mask & other
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Amazon Q Local Retrieval Index
+Offline BM25 search over the toolkit guides, memory-mapped for fast answers
+"""
+
+import glob
+import json
+import os
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how', 'i', 'if',
+    'in', 'into', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'our', 'should', 'so', 'that', 'the',
+    'their', 'these', 'this', 'to', 'us', 'was', 'we', 'what', 'when', 'which', 'with', 'you', 'your'
+}
+
+# Passages longer than this many lines are split so answers stay focused
+MAX_PASSAGE_LINES = 40
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens with stopwords and trailing plural 's' removed"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class QKnowledgeIndex:
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self.passages: List[Dict] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.offsets = self.doc_ids = self.term_freqs = self.doc_lengths = None
+        self._length_norm = None
+
+    @classmethod
+    def open_or_build(cls, source_paths: List[str], index_dir: str) -> 'QKnowledgeIndex':
+        """Load the on-disk index, rebuilding it first if any source guide has changed"""
+        index = cls(index_dir)
+        manifest = cls._manifest(source_paths)
+        manifest_path = os.path.join(index_dir, 'manifest.json')
+        try:
+            with open(manifest_path) as fh:
+                current = json.load(fh) == manifest
+        except (OSError, ValueError):
+            current = False
+        if not current:
+            index.build(source_paths)
+            with open(manifest_path, 'w') as fh:
+                json.dump(manifest, fh)
+        index.load()
+        return index
+
+    def build(self, source_paths: List[str]):
+        """Split the guides into passages and write the inverted index as .npy arrays"""
+        passages = []
+        for path in source_paths:
+            with open(path, encoding='utf-8') as fh:
+                passages.extend(self._split_passages(fh.read(), os.path.basename(path)))
+
+        vocabulary: Dict[str, int] = {}
+        postings: List[Dict[int, int]] = []
+        doc_lengths = np.zeros(len(passages), dtype=np.int32)
+        for doc_id, passage in enumerate(passages):
+            tokens = tokenize(f"{passage['heading']} {passage['text']}")
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_id = vocabulary.setdefault(token, len(vocabulary))
+                if term_id == len(postings):
+                    postings.append({})
+                postings[term_id][doc_id] = postings[term_id].get(doc_id, 0) + 1
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.float32)
+        for term_id, posting in enumerate(postings):
+            start = offsets[term_id]
+            doc_ids[start:start + len(posting)] = list(posting.keys())
+            term_freqs[start:start + len(posting)] = list(posting.values())
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        for name, array in [('offsets', offsets), ('doc_ids', doc_ids), ('term_freqs', term_freqs), ('doc_lengths', doc_lengths)]:
+            np.save(os.path.join(self.index_dir, f"{name}.npy"), array)
+        with open(os.path.join(self.index_dir, 'vocabulary.json'), 'w') as fh:
+            json.dump(vocabulary, fh)
+        with open(os.path.join(self.index_dir, 'passages.json'), 'w') as fh:
+            json.dump(passages, fh)
+
+    def load(self):
+        """Memory-map the postings arrays; only the touched pages are read per query"""
+        for name in ('offsets', 'doc_ids', 'term_freqs', 'doc_lengths'):
+            setattr(self, name, np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode='r'))
+        with open(os.path.join(self.index_dir, 'vocabulary.json')) as fh:
+            self.vocabulary = json.load(fh)
+        with open(os.path.join(self.index_dir, 'passages.json')) as fh:
+            self.passages = json.load(fh)
+        avg_doc_length = max(float(np.mean(self.doc_lengths)), 1.0) if len(self.doc_lengths) else 1.0
+        self._length_norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_lengths, dtype=np.float32) / avg_doc_length)
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[Dict, float]]:
+        """Rank passages for the query with Okapi BM25"""
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+
+        n_docs = len(self.passages)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term_id in term_ids:
+            start, stop = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:stop]
+            tf = self.term_freqs[start:stop]
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        if top_k == 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.passages[i], float(scores[i])) for i in best]
+
+    def answer(self, question: str, assessment_facts: Dict[str, str], top_k: int = 3) -> Optional[Dict]:
+        """Combine the best-matching guide passages with the assessment's computed numbers"""
+        hits = self.search(question, top_k)
+        if not hits:
+            return None
+
+        question_terms = set(tokenize(question))
+        relevant_facts = {label: value for label, value in assessment_facts.items() if question_terms & set(tokenize(label))}
+        return {
+            'facts': relevant_facts or assessment_facts,
+            'passages': [
+                {'source': passage['source'], 'heading': passage['heading'],
+                 'snippet': self._snippet(passage['text'], question_terms), 'score': score}
+                for passage, score in hits
+            ]
+        }
+
+    @staticmethod
+    def _snippet(text: str, question_terms: set, max_lines: int = 4) -> str:
+        lines = [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith('```')]
+        matching = [line for line in lines if question_terms & set(tokenize(line))]
+        return '\n'.join((matching or lines)[:max_lines])
+
+    @staticmethod
+    def _split_passages(markdown: str, source: str) -> List[Dict]:
+        """One passage per markdown section, with long sections cut into line windows"""
+        passages = []
+        heading, lines = source, []
+
+        def flush():
+            for start in range(0, len(lines), MAX_PASSAGE_LINES):
+                text = '\n'.join(lines[start:start + MAX_PASSAGE_LINES]).strip()
+                if text:
+                    passages.append({'source': source, 'heading': heading, 'text': text})
+
+        in_code = False
+        for line in markdown.splitlines():
+            if line.strip().startswith('```'):
+                in_code = not in_code
+            if not in_code and line.startswith('#'):
+                flush()
+                heading, lines = line.lstrip('#').strip(), []
+            else:
+                lines.append(line)
+        flush()
+        return passages
+
+    @staticmethod
+    def _manifest(source_paths: List[str]) -> List:
+        return [[os.path.basename(p), os.path.getsize(p), int(os.path.getmtime(p))] for p in sorted(source_paths)]
+
+
+# Docs about the app itself rather than AWS programs guidance
+NON_GUIDE_DOCS = {'DEPLOYMENT-CHECKLIST.md', 'GITHUB-SETUP.md', 'README-STREAMLIT.md', 'UI-CONCEPT.md', 'UI-SETUP.md'}
+
+
+def default_guide_paths() -> List[str]:
+    """Markdown guides shipped next to the app"""
+    paths = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.md'))
+    return sorted(p for p in paths if os.path.basename(p) not in NON_GUIDE_DOCS)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Report Export Engine
+Streams assessment results to CSV, Parquet and XLSX files in row chunks
+"""
+
+import hashlib
+import os
+import re
+import zipfile
+import pandas as pd
+from typing import BinaryIO, Dict
+
+EXPORT_FORMATS = {
+    'csv': {'extension': '.csv', 'mime': 'text/csv'},
+    'parquet': {'extension': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+    'xlsx': {'extension': '.xlsx', 'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+}
+
+# Excel caps a sheet at 1,048,576 rows including the header
+XLSX_MAX_DATA_ROWS = 1_048_575
+
+
+class ReportExporter:
+    def __init__(self, cache_dir: str = '.toolkit_cache/exports', chunk_rows: int = 50_000):
+        self.cache_dir = cache_dir
+        self.chunk_rows = chunk_rows
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def file_name(self, report_name: str, frames: Dict[str, pd.DataFrame], fmt: str) -> str:
+        """Download file name; multi-table CSV and Parquet reports ship as a zip"""
+        extension = '.zip' if self._is_archive(frames, fmt) else EXPORT_FORMATS[fmt]['extension']
+        return f"{self._slug(report_name)}{extension}"
+
+    def mime_type(self, frames: Dict[str, pd.DataFrame], fmt: str) -> str:
+        return 'application/zip' if self._is_archive(frames, fmt) else EXPORT_FORMATS[fmt]['mime']
+
+    def export(self, report_name: str, frames: Dict[str, pd.DataFrame], fmt: str) -> str:
+        """Write the report to the cache directory and return its path, reusing unchanged exports"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        path = os.path.join(self.cache_dir, f"{self.fingerprint(frames, fmt)}-{self.file_name(report_name, frames, fmt)}")
+        if os.path.exists(path):
+            self.cache_hits += 1
+            return path
+
+        self.cache_misses += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            if fmt == 'xlsx':
+                self._write_xlsx(frames, tmp_path)
+            elif self._is_archive(frames, fmt):
+                self._write_archive(frames, fmt, tmp_path)
+            else:
+                with open(tmp_path, 'wb') as fh:
+                    self._write_table(next(iter(frames.values())), fmt, fh)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def open(self, report_name: str, frames: Dict[str, pd.DataFrame], fmt: str) -> BinaryIO:
+        """Return a readable handle on the exported file, suitable for st.download_button"""
+        return open(self.export(report_name, frames, fmt), 'rb')
+
+    def fingerprint(self, frames: Dict[str, pd.DataFrame], fmt: str) -> str:
+        """Content hash of every table in the report, used as the cache key"""
+        digest = hashlib.blake2b(fmt.encode(), digest_size=16)
+        for name, df in frames.items():
+            digest.update(name.encode())
+            digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+            for start in range(0, len(df), self.chunk_rows):
+                chunk = df.iloc[start:start + self.chunk_rows]
+                try:
+                    hashed = pd.util.hash_pandas_object(chunk, index=False)
+                except TypeError:
+                    hashed = pd.util.hash_pandas_object(chunk.astype(str), index=False)
+                digest.update(hashed.to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _write_table(self, df: pd.DataFrame, fmt: str, fh: BinaryIO):
+        if fmt == 'csv':
+            self._write_csv(df, fh)
+        else:
+            self._write_parquet(df, fh)
+
+    def _write_csv(self, df: pd.DataFrame, fh: BinaryIO):
+        """Write CSV one chunk at a time so the full text is never held in memory"""
+        if df.empty:
+            fh.write(df.to_csv(index=False).encode('utf-8'))
+        for start in range(0, len(df), self.chunk_rows):
+            chunk = df.iloc[start:start + self.chunk_rows]
+            fh.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+
+    def _write_parquet(self, df: pd.DataFrame, fh: BinaryIO):
+        """Append each chunk as its own Parquet row group"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(df.head(self.chunk_rows), preserve_index=False)
+        with pq.ParquetWriter(fh, schema) as writer:
+            for start in range(0, len(df), self.chunk_rows):
+                chunk = df.iloc[start:start + self.chunk_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+    def _write_archive(self, frames: Dict[str, pd.DataFrame], fmt: str, path: str):
+        extension = EXPORT_FORMATS[fmt]['extension']
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, df in frames.items():
+                with archive.open(f"{self._slug(name)}{extension}", 'w', force_zip64=True) as fh:
+                    self._write_table(df, fmt, fh)
+
+    def _write_xlsx(self, frames: Dict[str, pd.DataFrame], path: str):
+        """Stream rows through openpyxl's write-only workbook, one sheet per table"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        for name, df in frames.items():
+            sheet_count = max(1, -(-len(df) // XLSX_MAX_DATA_ROWS))
+            for part in range(sheet_count):
+                title = self._sheet_title(name, part if sheet_count > 1 else None)
+                sheet = workbook.create_sheet(title=title)
+                sheet.append([str(column) for column in df.columns])
+                part_end = min(len(df), (part + 1) * XLSX_MAX_DATA_ROWS)
+                for start in range(part * XLSX_MAX_DATA_ROWS, part_end, self.chunk_rows):
+                    chunk = df.iloc[start:min(start + self.chunk_rows, part_end)]
+                    chunk = chunk.astype(object).where(chunk.notna(), None)
+                    for row in chunk.itertuples(index=False, name=None):
+                        sheet.append(row)
+        workbook.save(path)
+
+    @staticmethod
+    def _is_archive(frames: Dict[str, pd.DataFrame], fmt: str) -> bool:
+        return fmt != 'xlsx' and len(frames) > 1
+
+    @staticmethod
+    def _slug(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_').lower() or 'report'
+
+    @staticmethod
+    def _sheet_title(name: str, part=None) -> str:
+        title = re.sub(r'[\[\]:*?/\\]', ' ', name).strip() or 'Sheet'
+        if part is not None:
+            suffix = f" ({part + 1})"
+            return title[:31 - len(suffix)] + suffix
+        return title[:31]
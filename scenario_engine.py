@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+What-if Scenario Engine
+Memoized dependency graph that recomputes only the cost tables affected by a changed input
+"""
+
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from licensing_calculator import LicensingCalculator
+from server_inventory_analyzer import REGION_PRICE_MULTIPLIERS, ServerInventoryAnalyzer
+
+# Effective compute discount versus On-Demand for Standard Reserved Instances (partial upfront)
+RI_TERM_DISCOUNTS = {
+    'On-Demand': 0.0,
+    '1-year': 0.36,
+    '3-year': 0.56,
+}
+
+
+class DependencyGraph:
+    def __init__(self):
+        self._inputs: Dict[str, object] = {}
+        self._nodes: Dict[str, tuple] = {}
+        self._values: Dict[str, object] = {}
+        self._dependents: Dict[str, set] = defaultdict(set)
+        self.compute_counts: Dict[str, int] = defaultdict(int)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add_input(self, name: str, value):
+        self._inputs[name] = value
+
+    def add_node(self, name: str, func: Callable, deps: List[str]):
+        """Register a derived value computed as func(*deps)"""
+        self._nodes[name] = (func, deps)
+        for dep in deps:
+            self._dependents[dep].add(name)
+
+    def set_input(self, name: str, value) -> bool:
+        """Update an input and drop cached values downstream of it; returns True if anything changed"""
+        if name in self._inputs and self._same(self._inputs[name], value):
+            return False
+        self._inputs[name] = value
+        self._invalidate(name)
+        return True
+
+    def get(self, name: str):
+        """Return a node's value, computing it and any stale dependencies on demand"""
+        if name in self._inputs:
+            return self._inputs[name]
+        if name in self._values:
+            self.cache_hits += 1
+            return self._values[name]
+        func, deps = self._nodes[name]
+        self._values[name] = func(*(self.get(dep) for dep in deps))
+        self.compute_counts[name] += 1
+        self.cache_misses += 1
+        return self._values[name]
+
+    def _invalidate(self, name: str):
+        pending = list(self._dependents[name])
+        while pending:
+            node = pending.pop()
+            if node in self._values:
+                del self._values[node]
+                pending.extend(self._dependents[node])
+
+    @staticmethod
+    def _same(old, new) -> bool:
+        if old is new:
+            return True
+        if isinstance(old, (pd.DataFrame, pd.Series, np.ndarray)) or isinstance(new, (pd.DataFrame, pd.Series, np.ndarray)):
+            return False
+        return old == new
+
+
+class CostScenarioEngine(DependencyGraph):
+    """Fleet cost model driven by region, RI term, Hybrid Benefit coverage and negotiated discount"""
+
+    def __init__(self, inventory: pd.DataFrame, region: str = 'us-east-1', ri_term: str = 'On-Demand',
+                 hybrid_benefit_coverage: float = 0.0, enterprise_discount: float = 0.0):
+        super().__init__()
+        analyzer = ServerInventoryAnalyzer()
+
+        self.add_input('inventory', inventory)
+        self.add_input('region', region)
+        self.add_input('ri_term', ri_term)
+        self.add_input('hybrid_benefit_coverage', hybrid_benefit_coverage)
+        self.add_input('enterprise_discount', enterprise_discount)
+
+        # Sizing is the only step that touches every inventory column; nothing but a new inventory invalidates it
+        self.add_node('sizing', analyzer.analyze_inventory_dataframe, ['inventory'])
+        self.add_node('licensing', LicensingCalculator().license_costs, ['inventory', 'sizing'])
+        self.add_node('region_multiplier', lambda region: REGION_PRICE_MULTIPLIERS[region], ['region'])
+        self.add_node('on_demand_compute', lambda sizing, m: sizing['Compute_Monthly_Cost'].to_numpy() * m,
+                      ['sizing', 'region_multiplier'])
+        self.add_node('license_included', lambda licensing, m: licensing['License_Included_Monthly'].to_numpy() * m,
+                      ['licensing', 'region_multiplier'])
+        # Software Assurance on owned licenses is not priced by region
+        self.add_node('byol_license', lambda licensing: licensing['BYOL_Monthly'].to_numpy(), ['licensing'])
+        self.add_node('storage', lambda sizing, m: sizing['Storage_Monthly_Cost'].to_numpy() * m,
+                      ['sizing', 'region_multiplier'])
+        self.add_node('reserved_compute', lambda compute, term: compute * (1 - RI_TERM_DISCOUNTS[term]),
+                      ['on_demand_compute', 'ri_term'])
+        self.add_node('hybrid_benefit_license',
+                      lambda license_cost, byol, coverage: license_cost * (1 - coverage) + byol * coverage,
+                      ['license_included', 'byol_license', 'hybrid_benefit_coverage'])
+        self.add_node('cost_model', self._cost_model,
+                      ['on_demand_compute', 'license_included', 'storage', 'reserved_compute',
+                       'hybrid_benefit_license', 'enterprise_discount'])
+        self.add_node('server_costs', self._server_costs,
+                      ['sizing', 'on_demand_compute', 'license_included', 'storage', 'reserved_compute',
+                       'hybrid_benefit_license', 'enterprise_discount'])
+
+    def update(self, **inputs) -> List[str]:
+        """Apply several input changes at once; returns the names that actually changed"""
+        return [name for name, value in inputs.items() if self.set_input(name, value)]
+
+    def cost_model_for(self, rows: np.ndarray) -> pd.DataFrame:
+        """Cost model of a slice of the inventory (row positions), from the cached per-server arrays"""
+        arrays = [self.get(name)[rows] for name in
+                  ('on_demand_compute', 'license_included', 'storage', 'reserved_compute', 'hybrid_benefit_license')]
+        return self._cost_model(*arrays, self.get('enterprise_discount'))
+
+    def totals(self, cost_model: Optional[pd.DataFrame] = None) -> Dict[str, float]:
+        """Lift-and-shift versus optimized monthly totals, for the whole fleet or a cost_model_for() slice"""
+        cost_model = (self.get('cost_model') if cost_model is None else cost_model).set_index('Scenario')['Total Monthly Cost']
+        baseline = float(cost_model.iloc[0])
+        optimized = float(cost_model.iloc[-1])
+        return {
+            'lift_and_shift': baseline,
+            'optimized': optimized,
+            'monthly_savings': baseline - optimized,
+            'savings_pct': (baseline - optimized) / baseline * 100 if baseline else 0.0,
+        }
+
+    @staticmethod
+    def _cost_model(on_demand, license_included, storage, reserved, hybrid_license, discount) -> pd.DataFrame:
+        rows = [
+            ('Lift & Shift (On-Demand, License Included)', on_demand.sum(), license_included.sum(), storage.sum()),
+            ('With Hybrid Benefit', on_demand.sum(), hybrid_license.sum(), storage.sum()),
+            ('Optimized (Hybrid Benefit + RI + Discount)',
+             reserved.sum() * (1 - discount), hybrid_license.sum() * (1 - discount), storage.sum() * (1 - discount)),
+        ]
+        model = pd.DataFrame(rows, columns=['Scenario', 'Monthly Compute', 'Monthly License', 'Monthly Storage'])
+        model['Total Monthly Cost'] = model[['Monthly Compute', 'Monthly License', 'Monthly Storage']].sum(axis=1)
+        model['vs Lift & Shift'] = model['Total Monthly Cost'] / model['Total Monthly Cost'].iloc[0] - 1
+        return model.round(2)
+
+    @staticmethod
+    def _server_costs(sizing, on_demand, license_included, storage, reserved, hybrid_license, discount) -> pd.DataFrame:
+        return pd.DataFrame({
+            'Server_Name': sizing['Server_Name'].to_numpy(),
+            'Recommended_Instance': sizing['Recommended_Instance'].to_numpy(),
+            'Lift_And_Shift_Monthly_Cost': (on_demand + license_included + storage).round(2),
+            'Optimized_Monthly_Cost': ((reserved + hybrid_license + storage) * (1 - discount)).round(2),
+        }, index=sizing.index)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Server Inventory Analysis Tool
+Analyzes on-premises server inventory and recommends AWS equivalents
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+HOURS_PER_MONTH = 730
+
+# (instance type, vCPU, memory GiB, us-east-1 Linux on-demand $/hour)
+EC2_INSTANCE_CATALOG = [
+    ("t3.small", 2, 2, 0.0208),
+    ("t3.medium", 2, 4, 0.0416),
+    ("t3.large", 2, 8, 0.0832),
+    ("t3.xlarge", 4, 16, 0.1664),
+    ("t3.2xlarge", 8, 32, 0.3328),
+    ("c5.large", 2, 4, 0.085),
+    ("c5.xlarge", 4, 8, 0.17),
+    ("c5.2xlarge", 8, 16, 0.34),
+    ("c5.4xlarge", 16, 32, 0.68),
+    ("c5.9xlarge", 36, 72, 1.53),
+    ("c5.18xlarge", 72, 144, 3.06),
+    ("m5.large", 2, 8, 0.096),
+    ("m5.xlarge", 4, 16, 0.192),
+    ("m5.2xlarge", 8, 32, 0.384),
+    ("m5.4xlarge", 16, 64, 0.768),
+    ("m5.8xlarge", 32, 128, 1.536),
+    ("m5.12xlarge", 48, 192, 2.304),
+    ("m5.16xlarge", 64, 256, 3.072),
+    ("m5.24xlarge", 96, 384, 4.608),
+    ("r5.large", 2, 16, 0.126),
+    ("r5.xlarge", 4, 32, 0.252),
+    ("r5.2xlarge", 8, 64, 0.504),
+    ("r5.4xlarge", 16, 128, 1.008),
+    ("r5.8xlarge", 32, 256, 2.016),
+    ("r5.12xlarge", 48, 384, 3.024),
+    ("r5.16xlarge", 64, 512, 4.032),
+    ("r5.24xlarge", 96, 768, 6.048),
+]
+
+# On-demand price relative to us-east-1, applied to compute, license and storage
+REGION_PRICE_MULTIPLIERS = {
+    'us-east-1': 1.0,
+    'us-east-2': 1.0,
+    'us-west-2': 1.0,
+    'us-west-1': 1.17,
+    'ca-central-1': 1.11,
+    'eu-west-1': 1.11,
+    'eu-west-2': 1.16,
+    'eu-central-1': 1.16,
+    'ap-south-1': 1.05,
+    'ap-southeast-1': 1.25,
+    'ap-southeast-2': 1.25,
+    'ap-northeast-1': 1.29,
+    'sa-east-1': 1.59,
+}
+
+EBS_PRICE_PER_GB = {"gp3": 0.08, "st1": 0.045}
+
+# License-included surcharge for Windows Server on EC2
+WINDOWS_LICENSE_PER_VCPU_HOUR = 0.046
+
+# Rows sized per broadcast so the server x catalog match matrix stays small
+SIZING_CHUNK_ROWS = 250_000
+
+
+class ServerInventoryAnalyzer:
+    def __init__(self):
+        catalog = pd.DataFrame(EC2_INSTANCE_CATALOG, columns=['Instance_Type', 'vCPU', 'Memory_GB', 'Hourly_Price'])
+        # Cheapest first, so the first instance that fits is the recommendation
+        self.catalog = catalog.sort_values(['Hourly_Price', 'vCPU'], kind='stable').reset_index(drop=True)
+        self.catalog['Family'] = self.catalog['Instance_Type'].str.split('.').str[0]
+        self._vcpu = self.catalog['vCPU'].to_numpy(dtype=np.float64)
+        self._memory = self.catalog['Memory_GB'].to_numpy(dtype=np.float64)
+        self._largest = int(self.catalog['Hourly_Price'].idxmax())
+
+    def analyze_inventory(self, csv_file: str) -> Dict:
+        """Analyze server inventory CSV and recommend AWS instances"""
+        recommendations = self.analyze_inventory_dataframe(pd.read_csv(csv_file))
+        summary = self.summarize(recommendations)
+        summary['recommendations'] = recommendations.to_dict('records')
+        return summary
+
+    def analyze_inventory_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Size every server in one vectorized pass and return per-server recommendations"""
+        cpu = self._numeric(df, 'CPU_Cores')
+        memory = self._numeric(df, 'Memory_GB')
+        storage = self._numeric(df, 'Storage_GB')
+        os_name = self._text(df, 'OS')
+        is_windows = os_name.str.contains('windows', case=False, regex=False).to_numpy()
+
+        instance_idx = self.recommend_instance_index(cpu, memory)
+        instance_vcpu = self._vcpu[instance_idx]
+        compute_cost = self.catalog['Hourly_Price'].to_numpy()[instance_idx] * HOURS_PER_MONTH
+        license_cost = np.where(is_windows, instance_vcpu * WINDOWS_LICENSE_PER_VCPU_HOUR * HOURS_PER_MONTH, 0.0)
+
+        storage_type = self.recommend_storage_type(storage, self._text(df, 'Storage_Type'))
+        storage_cost = storage * np.where(storage_type == 'st1', EBS_PRICE_PER_GB['st1'], EBS_PRICE_PER_GB['gp3'])
+
+        return pd.DataFrame({
+            'Server_Name': self._text(df, 'Server_Name').to_numpy(),
+            'OS': os_name.to_numpy(),
+            'CPU_Cores': cpu,
+            'Memory_GB': memory,
+            'Storage_GB': storage,
+            'Recommended_Instance': self.catalog['Instance_Type'].to_numpy()[instance_idx],
+            'Instance_Family': self.catalog['Family'].to_numpy()[instance_idx],
+            'Instance_vCPU': instance_vcpu,
+            'Instance_Memory_GB': self._memory[instance_idx],
+            'Recommended_Storage': storage_type,
+            'Compute_Monthly_Cost': compute_cost.round(2),
+            'License_Monthly_Cost': license_cost.round(2),
+            'Storage_Monthly_Cost': storage_cost.round(2),
+            'Estimated_Monthly_Cost': (compute_cost + license_cost + storage_cost).round(2),
+            'Migration_Complexity': self._assess_migration_complexity(is_windows, self._numeric(df, 'Application_Count')),
+        }, index=df.index)
+
+    def recommend_instance_index(self, cpu: np.ndarray, memory: np.ndarray) -> np.ndarray:
+        """Return the catalog row of the cheapest instance covering each CPU/memory pair"""
+        result = np.empty(len(cpu), dtype=np.intp)
+        for start in range(0, len(cpu), SIZING_CHUNK_ROWS):
+            stop = start + SIZING_CHUNK_ROWS
+            fits = (self._vcpu >= cpu[start:stop, None]) & (self._memory >= memory[start:stop, None])
+            result[start:stop] = np.where(fits.any(axis=1), fits.argmax(axis=1), self._largest)
+        return result
+
+    def region_price_matrix(self, regions: Optional[List[str]] = None) -> np.ndarray:
+        """(regions, catalog instances) monthly compute price, rounded as a single server's compute cost is"""
+        multipliers = np.array([REGION_PRICE_MULTIPLIERS[region] for region in (regions or REGION_PRICE_MULTIPLIERS)])
+        return (multipliers[:, None] * self.catalog['Hourly_Price'].to_numpy() * HOURS_PER_MONTH).round(2)
+
+    def region_cost_matrix(self, recommendations: pd.DataFrame, regions: Optional[List[str]] = None) -> pd.DataFrame:
+        """Servers x regions monthly cost of the recommended instances, license and storage"""
+        regions = list(regions or REGION_PRICE_MULTIPLIERS)
+        multipliers = np.array([REGION_PRICE_MULTIPLIERS[region] for region in regions])
+        instance_idx = self._instance_index(recommendations)
+        other = (recommendations['License_Monthly_Cost'] + recommendations['Storage_Monthly_Cost']).to_numpy()
+        costs = self.region_price_matrix(regions)[:, instance_idx].T + other[:, None] * multipliers
+        return pd.DataFrame(costs.round(2), index=recommendations.index, columns=regions)
+
+    def compare_regions(self, recommendations: pd.DataFrame, primary_region: str = 'us-east-1',
+                        regions: Optional[List[str]] = None) -> pd.DataFrame:
+        """Fleet monthly cost in every region, cheapest first, with the difference from the primary region
+
+        Sizing does not depend on the region, so the fleet is reduced to a count per catalog instance once and every
+        region is priced from those counts in one matrix product instead of re-sizing the inventory per region."""
+        regions = list(regions or REGION_PRICE_MULTIPLIERS)
+        if primary_region not in regions:
+            regions.append(primary_region)
+        multipliers = np.array([REGION_PRICE_MULTIPLIERS[region] for region in regions])
+        counts = np.bincount(self._instance_index(recommendations), minlength=len(self.catalog))
+
+        comparison = pd.DataFrame({
+            'Region': regions,
+            'Monthly Compute': self.region_price_matrix(regions) @ counts,
+            'Monthly License': recommendations['License_Monthly_Cost'].sum() * multipliers,
+            'Monthly Storage': recommendations['Storage_Monthly_Cost'].sum() * multipliers,
+        })
+        comparison['Total Monthly Cost'] = comparison[['Monthly Compute', 'Monthly License', 'Monthly Storage']].sum(axis=1)
+        primary = comparison.loc[comparison['Region'] == primary_region, 'Total Monthly Cost'].iloc[0]
+        comparison['vs Primary Region'] = comparison['Total Monthly Cost'] - primary
+        comparison['vs Primary Region (%)'] = comparison['vs Primary Region'] / primary * 100 if primary else 0.0
+        comparison = comparison.sort_values(['Total Monthly Cost', 'Region'], kind='stable').reset_index(drop=True)
+        comparison.insert(0, 'Rank', np.arange(1, len(comparison) + 1))
+        return comparison.round(2)
+
+    def summarize(self, recommendations: pd.DataFrame) -> Dict:
+        """Roll per-server recommendations up to portfolio totals"""
+        return {
+            'total_servers': len(recommendations),
+            'total_estimated_cost': float(recommendations['Estimated_Monthly_Cost'].sum()),
+            'compute_cost': float(recommendations['Compute_Monthly_Cost'].sum()),
+            'license_cost': float(recommendations['License_Monthly_Cost'].sum()),
+            'storage_cost': float(recommendations['Storage_Monthly_Cost'].sum()),
+            'servers_by_family': recommendations['Instance_Family'].value_counts().to_dict(),
+        }
+
+    def recommend_storage_type(self, storage_gb: np.ndarray, current_type: pd.Series) -> np.ndarray:
+        """Recommend EBS volume type"""
+        is_ssd = current_type.str.upper().str.contains('SSD', regex=False).to_numpy()
+        throughput_candidate = (storage_gb > 1000) & ~is_ssd
+        return np.where(throughput_candidate, 'st1', 'gp3')
+
+    def _assess_migration_complexity(self, is_windows: np.ndarray, app_count: np.ndarray) -> np.ndarray:
+        """Assess migration complexity based on server characteristics"""
+        return np.select(
+            [is_windows & (app_count > 5), app_count > 3],
+            ['High', 'Medium'],
+            default='Low'
+        )
+
+    def _instance_index(self, recommendations: pd.DataFrame) -> np.ndarray:
+        """Catalog rows of the recommended instances"""
+        return pd.Index(self.catalog['Instance_Type']).get_indexer(recommendations['Recommended_Instance'])
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df:
+            return np.zeros(len(df))
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _text(df: pd.DataFrame, column: str) -> pd.Series:
+        if column not in df:
+            return pd.Series('', index=df.index)
+        return df[column].fillna('').astype(str)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Multi-Source Join
+Combines server, cost, license and performance exports into one per-server fact table via hashed host keys
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Host key columns seen in CMDB, CUR, license and monitoring exports, in order of preference
+HOST_KEY_CANDIDATES = [
+    'Server_Name', 'Hostname', 'Host_Name', 'HostName', 'Host', 'Computer_Name', 'ComputerName',
+    'Resource_Name', 'resource_tags_user_name', 'Name',
+]
+
+# How repeated rows for one host combine: CUR line items add up, performance samples
+# give an average and a peak, license records describe the host once
+SOURCE_AGGREGATIONS = {
+    'costs': ['sum'],
+    'licenses': ['first'],
+    'performance': ['mean', 'max'],
+}
+
+SOURCE_PREFIXES = {'costs': 'Cost', 'licenses': 'License', 'performance': 'Perf'}
+
+IPV4_PATTERN = r"\d{1,3}(?:\.\d{1,3}){3}"
+
+
+def normalize_host(names: pd.Series) -> pd.Series:
+    """Lowercase, trimmed short host names; 'WEB01' and 'web01.corp.local' both become 'web01'"""
+    names = names.astype(str).str.strip().str.strip('"\'').str.lower()
+    is_ip = names.str.fullmatch(IPV4_PATTERN)
+    return names.where(is_ip, names.str.replace(r"\..*$", "", regex=True))
+
+
+def find_host_column(df: pd.DataFrame) -> str:
+    """The column holding host names; matched case-insensitively against HOST_KEY_CANDIDATES"""
+    by_lower = {str(column).lower(): column for column in df.columns}
+    for candidate in HOST_KEY_CANDIDATES:
+        if candidate.lower() in by_lower:
+            return by_lower[candidate.lower()]
+    raise ValueError(f"No host name column found; expected one of: {', '.join(HOST_KEY_CANDIDATES)}")
+
+
+def read_source(uploaded_file, file_name: Optional[str] = None) -> pd.DataFrame:
+    """Read a CSV, XLSX or JSON export (path or file-like) into a DataFrame"""
+    file_name = file_name or getattr(uploaded_file, 'name', str(uploaded_file))
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == '.xlsx':
+        return pd.read_excel(uploaded_file)
+    if extension == '.json':
+        return pd.read_json(uploaded_file)
+    return pd.read_csv(uploaded_file)
+
+
+class SourceIndex:
+    """One source collapsed to a row per normalized host key; the key index is a hash table"""
+
+    def __init__(self, name: str, df: pd.DataFrame, host_column: Optional[str] = None,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.prefix = SOURCE_PREFIXES.get(name, name.title())
+        self.host_column = host_column or find_host_column(df)
+        self.records = len(df)
+
+        keys = normalize_host(df[self.host_column])
+        if aliases:
+            # Reconciled names (see hostname_reconciliation) are grouped under the server's key
+            keys = keys.map(aliases).fillna(keys)
+        values = df.drop(columns=[self.host_column])
+        aggregations = SOURCE_AGGREGATIONS.get(name, ['first'])
+        numeric = values.select_dtypes(include='number').columns
+        spec = {column: aggregations if column in numeric else ['first'] for column in values.columns}
+
+        grouped = values.groupby(keys.to_numpy(), sort=False)
+        table = grouped.agg(spec) if spec else pd.DataFrame(index=grouped.size().index)
+        table.columns = [self._column_name(column, agg, len(spec[column])) for column, agg in table.columns]
+        table[f"{self.prefix}_Records"] = grouped.size()
+        self.table = table
+
+    def lookup(self, host_keys: pd.Index) -> np.ndarray:
+        """Row position in self.table for each unique host key, -1 where the source has no such host"""
+        return self.table.index.get_indexer(host_keys)
+
+    def _column_name(self, column: str, agg: str, n_aggs: int) -> str:
+        return f"{self.prefix}_{column}" if n_aggs == 1 else f"{self.prefix}_{column}_{agg.title()}"
+
+
+class SourceJoiner:
+    def join(self, servers: pd.DataFrame, sources: Dict[str, Optional[pd.DataFrame]],
+             aliases: Optional[Dict[str, Dict[str, str]]] = None) -> Dict:
+        """Left-join every source onto the server inventory by normalized host name"""
+        host_column = find_host_column(servers)
+        facts = servers.reset_index(drop=True)
+        # Factorize once; every source is then matched by one hash pass over its own unique hosts
+        server_codes, server_keys = pd.factorize(normalize_host(facts[host_column]))
+        server_keys = pd.Index(server_keys)
+
+        coverage: List[Dict] = []
+        unmatched: Dict[str, pd.Index] = {}
+        joined = [facts]
+        for name, df in sources.items():
+            if df is None:
+                continue
+            index = SourceIndex(name, df, aliases=(aliases or {}).get(name))
+            source_codes = server_keys.get_indexer(index.table.index)
+            known = source_codes >= 0
+            row_for_key = np.full(len(server_keys), -1, dtype=np.intp)
+            row_for_key[source_codes[known]] = np.flatnonzero(known)
+            positions = row_for_key[server_codes]
+            matched = positions >= 0
+
+            columns = pd.DataFrame({
+                column: pd.api.extensions.take(index.table[column].array, positions, allow_fill=True)
+                for column in index.table.columns
+            }, index=facts.index)
+            records = f"{index.prefix}_Records"
+            columns[records] = columns[records].fillna(0).astype(np.int64)
+            joined.append(columns)
+            joined.append(pd.DataFrame({f"Has_{index.prefix}": matched}, index=facts.index))
+
+            # Hosts the source knows about that no server matched; candidates for fuzzy reconciliation
+            unmatched[name] = index.table.index[~known]
+            coverage.append({
+                'Source': name.title(),
+                'Records': index.records,
+                'Hosts': len(index.table),
+                'Servers Matched': int(matched.sum()),
+                'Coverage': matched.mean() if len(matched) else 0.0,
+                'Unmatched Source Hosts': int((~known).sum()),
+            })
+
+        return {
+            'facts': pd.concat(joined, axis=1),
+            'coverage': pd.DataFrame(coverage, columns=['Source', 'Records', 'Hosts', 'Servers Matched',
+                                                        'Coverage', 'Unmatched Source Hosts']),
+            'unmatched': unmatched,
+            'server_keys': server_keys,
+            'duplicate_server_keys': int(len(server_codes) - len(server_keys)),
+        }
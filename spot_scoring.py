@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Spot and Off-Hours Scheduling Scoring
+Per-server Spot suitability and dev/test scheduling scores from environment, workload, utilization and interruption tolerance, with the savings they unlock
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict
+
+from server_inventory_analyzer import HOURS_PER_MONTH, ServerInventoryAnalyzer
+
+# How well each environment tolerates being interrupted or switched off, 0 (not at all) to 1
+ENVIRONMENT_TOLERANCE = {
+    'Production': 0.1,
+    'Staging': 0.7,
+    'Test': 1.0,
+    'Development': 1.0,
+}
+# Environment tokens recognised in the Environment column, or in host names when the inventory has none
+ENVIRONMENT_NAME_PATTERNS = [
+    ('Development', r'(^|[-_.])(dev|sbx|sandbox)'),
+    ('Test', r'(^|[-_.])(test|tst|qa|uat)'),
+    ('Staging', r'(^|[-_.])(stg|stage|staging|preprod)'),
+    ('Production', r'(^|[-_.])(prd|prod)'),
+]
+# Stateless and batch workloads recover from a reclaimed instance; stateful ones do not
+WORKLOAD_TOLERANCE = {
+    'Container App': 0.9,
+    'Development': 1.0,
+    'Web Server': 0.7,
+    'Application Server': 0.5,
+    'File Server': 0.1,
+    'Database': 0.0,
+}
+# An explicit Interruption_Tolerance column overrides the workload default
+STATED_TOLERANCE = {'High': 1.0, 'Medium': 0.5, 'Low': 0.0}
+# Neither known: treated as mostly intolerant, so unknown servers need strong evidence elsewhere
+UNKNOWN_TOLERANCE = 0.3
+
+# Score weights (environment, interruption tolerance, idle headroom); each score is out of 100
+SPOT_WEIGHTS = (0.35, 0.45, 0.20)
+SCHEDULE_WEIGHTS = (0.70, 0.10, 0.20)
+SCORE_THRESHOLD = 60
+# Spot discount on compute versus On-Demand; license-included surcharges are charged in full
+SPOT_DISCOUNT = 0.70
+# Office hours a scheduled server runs (12 hours, 5 days a week), as a share of the month
+SCHEDULED_HOURS_PER_MONTH = 12 * 5 * 52 / 12
+SCHEDULED_SHARE = SCHEDULED_HOURS_PER_MONTH / HOURS_PER_MONTH
+# Sustained CPU above this average means the server is busy around the clock
+BUSY_UTILIZATION = 60
+
+RECOMMENDATIONS = ['Keep On-Demand', 'Spot', 'Off-Hours Schedule', 'Spot + Schedule']
+
+
+class SpotScorer:
+    """Scores every server in one columnar pass; text columns are resolved once per distinct value"""
+
+    def score(self, inventory: pd.DataFrame, sizing: pd.DataFrame) -> pd.DataFrame:
+        """Spot and scheduling scores, the better of the options they qualify for, and its monthly savings"""
+        environment = self._environment(inventory)
+        environment_fit = self._lookup(environment, ENVIRONMENT_TOLERANCE, UNKNOWN_TOLERANCE)
+        tolerance = self._lookup(self._text(inventory, 'Workload_Type'), WORKLOAD_TOLERANCE, UNKNOWN_TOLERANCE)
+        if 'Interruption_Tolerance' in inventory:
+            stated = self._lookup(self._text(inventory, 'Interruption_Tolerance'), STATED_TOLERANCE, np.nan)
+            tolerance = np.where(np.isnan(stated), tolerance, stated)
+
+        # Headroom: how far the average sits below busy; a spiky peak over a low average still leaves idle hours
+        average = self._numeric(inventory, 'Utilization_CPU')
+        peak = self._numeric(inventory, 'Utilization_CPU_Peak')
+        average = np.where(np.isnan(average), BUSY_UTILIZATION / 2, average)
+        headroom = np.clip(1 - average / BUSY_UTILIZATION, 0, 1)
+        variance = np.where(np.isnan(peak), 0.0, np.clip((peak - average) / 100, 0, 1))
+
+        spot_score = 100 * (SPOT_WEIGHTS[0] * environment_fit + SPOT_WEIGHTS[1] * tolerance
+                            + SPOT_WEIGHTS[2] * headroom * (1 - variance))
+        schedule_score = 100 * (SCHEDULE_WEIGHTS[0] * environment_fit + SCHEDULE_WEIGHTS[1] * tolerance
+                                + SCHEDULE_WEIGHTS[2] * np.maximum(headroom, variance))
+        # Production never qualifies for an off-hours schedule, whatever its other factors
+        schedule_score = np.where(np.asarray(environment == 'Production'),
+                                  np.minimum(schedule_score, SCORE_THRESHOLD - 1), schedule_score)
+
+        compute = sizing['Compute_Monthly_Cost'].to_numpy(dtype=np.float64)
+        license_cost = sizing['License_Monthly_Cost'].to_numpy(dtype=np.float64)
+        spot_ok = spot_score >= SCORE_THRESHOLD
+        schedule_ok = schedule_score >= SCORE_THRESHOLD
+        savings = np.column_stack([
+            np.zeros(len(compute)),
+            np.where(spot_ok, compute * SPOT_DISCOUNT, 0.0),
+            np.where(schedule_ok, (compute + license_cost) * (1 - SCHEDULED_SHARE), 0.0),
+            np.where(spot_ok & schedule_ok,
+                     compute * (1 - (1 - SPOT_DISCOUNT) * SCHEDULED_SHARE) + license_cost * (1 - SCHEDULED_SHARE), 0.0),
+        ])
+        choice = savings.argmax(axis=1)
+
+        return pd.DataFrame({
+            'Server_Name': self._text(inventory, 'Server_Name'),
+            'Environment': environment,
+            'Spot_Score': np.rint(spot_score).astype(np.int64),
+            'Schedule_Score': np.rint(schedule_score).astype(np.int64),
+            'Recommendation': pd.Categorical.from_codes(choice, RECOMMENDATIONS),
+            'Current_Monthly_Cost': (compute + license_cost).round(2),
+            'Monthly_Savings': savings[np.arange(len(choice)), choice].round(2),
+        }, index=inventory.index)
+
+    def summarize(self, scores: pd.DataFrame) -> Dict:
+        """Fleet totals per recommendation"""
+        by_option = scores.groupby('Recommendation', observed=False)['Monthly_Savings'].agg(['size', 'sum'])
+        eligible_cost = float(scores.loc[scores['Monthly_Savings'] > 0, 'Current_Monthly_Cost'].sum())
+        savings = float(scores['Monthly_Savings'].sum())
+        return {
+            'servers_by_recommendation': {name: int(count) for name, count in by_option['size'].items()},
+            'savings_by_recommendation': {name: round(float(total), 2) for name, total in by_option['sum'].items()},
+            'eligible_servers': int((scores['Monthly_Savings'] > 0).sum()),
+            'monthly_savings': savings,
+            'savings_pct': savings / eligible_cost * 100 if eligible_cost else 0.0,
+        }
+
+    def _environment(self, inventory: pd.DataFrame) -> pd.Series:
+        """Environment per server as a category: the Environment column, else the host name, else 'Unknown'"""
+        column = 'Environment' if 'Environment' in inventory else 'Server_Name'
+        codes, uniques = pd.factorize(self._text(inventory, column))
+        names = pc.utf8_lower(pa.array(pd.Series(uniques, dtype=object).astype(str)))
+        labels = [label for label, _ in ENVIRONMENT_NAME_PATTERNS] + ['Unknown']
+        # Patterns are matched per distinct value; the first listed pattern wins when a value carries several tokens
+        matched = np.full(len(names), len(labels) - 1, dtype=np.intp)
+        for i, (_, pattern) in reversed(list(enumerate(ENVIRONMENT_NAME_PATTERNS))):
+            matched[pc.match_substring_regex(names, pattern).to_numpy(zero_copy_only=False)] = i
+        codes = np.append(matched, len(labels) - 1)[codes]
+        return pd.Series(pd.Categorical.from_codes(codes, labels), index=inventory.index)
+
+    @staticmethod
+    def _lookup(values: pd.Series, table: Dict[str, float], default: float) -> np.ndarray:
+        """Table value per row, matched once per distinct value after trimming and title-casing"""
+        codes, uniques = pd.factorize(values)
+        keys = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        normalized = {key.title(): value for key, value in table.items()}
+        mapped = np.array([normalized.get(key.title(), default) for key in keys] + [default], dtype=np.float64)
+        return mapped[codes]
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _text(df: pd.DataFrame, column: str) -> pd.Series:
+        if column not in df:
+            return pd.Series('', index=df.index)
+        return df[column].fillna('').astype(str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score servers for Spot Instances and off-hours scheduling')
+    parser.add_argument('inventory', help='Inventory CSV or Parquet (MAP or OLA layout)')
+    parser.add_argument('--output', help='Write per-server scores to this CSV')
+    args = parser.parse_args()
+
+    inventory = pd.read_parquet(args.inventory) if args.inventory.endswith('.parquet') else pd.read_csv(args.inventory)
+    scorer = SpotScorer()
+    scores = scorer.score(inventory, ServerInventoryAnalyzer().analyze_inventory_dataframe(inventory))
+    summary = scorer.summarize(scores)
+    for name in RECOMMENDATIONS:
+        print(f"{name:<20}{summary['servers_by_recommendation'][name]:>10,} servers"
+              f"{summary['savings_by_recommendation'][name]:>16,.2f} $/month")
+    print(f"Total savings: ${summary['monthly_savings']:,.2f}/month ({summary['savings_pct']:.0f}% of eligible servers' cost)")
+    if args.output:
+        scores.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Storage Analysis Tool
+Recommends Amazon FSx for Windows File Server configurations for file servers
+"""
+
+import numpy as np
+import pandas as pd
+
+FSX_PRICE_PER_GB = 0.13
+
+# Access pattern -> (deployment type, throughput capacity MB/s)
+FSX_ACCESS_PROFILES = {
+    'High': ('Multi-AZ', 512),
+    'Medium': ('Single-AZ', 64),
+    'Low': ('Single-AZ', 16),
+}
+
+
+class StorageAnalyzer:
+    def recommend_fsx(self, storage_df: pd.DataFrame) -> pd.DataFrame:
+        """Map every file server to an FSx deployment in one vectorized pass"""
+        pattern = storage_df['Access_Pattern'].fillna('Low')
+        deployment = pattern.map({k: v[0] for k, v in FSX_ACCESS_PROFILES.items()}).fillna('Single-AZ')
+        throughput = pattern.map({k: v[1] for k, v in FSX_ACCESS_PROFILES.items()}).fillna(16).astype(int)
+        used_gb = storage_df['Used_GB'].to_numpy()
+
+        return pd.DataFrame({
+            'File Server': storage_df['Server_Name'].to_numpy(),
+            'Current Storage (GB)': used_gb,
+            'Recommended FSx': deployment.to_numpy(),
+            'Throughput': throughput.astype(str).to_numpy(dtype=object) + ' MB/s',
+            'Est. Monthly Cost': np.round(used_gb * FSX_PRICE_PER_GB),
+            'Migration Strategy': 'AWS DataSync + Cutover'
+        }, index=storage_df.index)
@@ -9,7 +9,36 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import io
 import json
+import os
+import uuid
+
+from ad_export_parser import DirectoryExportParser, recommend_directory_service
+from assessment_diff import AssessmentDiff
+from bitmap_index import BitmapIndex
+from cashflow_engine import (DISCOUNT_RATE, GROWTH_RATE, HORIZON_YEARS, MIGRATION_COST_PER_SERVER, MIGRATION_MONTHS,
+                             RI_TERM_MONTHS, CashflowEngine)
+from chart_data import COST_COLUMNS, category_counts, cost_by_family, counts_frame
+from checkpoint_store import CheckpointStore
+from consolidation_planner import ConsolidationPlanner
+from cost_simulation import CostSimulator
+from fleet_generator import FleetGenerator
+from fsx_capacity_planner import FsxCapacityPlanner, read_metric_chunks
+from hostname_reconciliation import HostnameReconciler
+from incremental_inventory import IncrementalInventory
+from instrumentation import PerformanceMonitor, estimate_size
+from inventory_validation import InventoryValidator
+from job_queue import JobQueue
+from licensing_calculator import LicensingCalculator
+from paged_table import PagedTable
+from q_retrieval import QKnowledgeIndex, default_guide_paths
+from report_export import ReportExporter
+from scenario_engine import RI_TERM_DISCOUNTS, CostScenarioEngine, DependencyGraph
+from server_inventory_analyzer import REGION_PRICE_MULTIPLIERS, ServerInventoryAnalyzer
+from source_join import SourceJoiner, find_host_column, read_source
+from spot_scoring import SpotScorer
+from storage_analyzer import FSX_ACCESS_PROFILES
 
 # Page configuration
 st.set_page_config(
@@ -52,6 +81,15 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def main():
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'assessment_id' not in st.session_state:
+        # A refreshed tab or a shared link names its assessment in the URL
+        requested = st.query_params.get('assessment')
+        if not (requested and open_assessment(requested)):
+            st.session_state.assessment_id = uuid.uuid4().hex[:12]
+    st.session_state.rerun_count = st.session_state.get('rerun_count', 0) + 1
+    
     # Header
     st.markdown('<h1 class="main-header">🎯 Amazon Q AWS Programs Toolkit</h1>', unsafe_allow_html=True)
     st.markdown("Transform your AWS migration and optimization assessments with AI-powered insights")
@@ -177,12 +215,17 @@ def main():
         if st.button("Reset All Sessions"):
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
+            # Saved checkpoints stay on disk and can be reopened below
+            st.query_params.clear()
             st.success("All sessions reset!")
             st.rerun()
         
-        st.write("Current session state:")
-        for key, value in st.session_state.items():
-            st.write(f"- {key}: {value}")
+        # Filled in after the page renders, and only while switched on
+        show_metrics = st.toggle("Show performance metrics", key="show_performance_metrics")
+        metrics_panel = st.container()
+    
+    with st.sidebar.expander("💾 Saved Assessments"):
+        show_checkpoint_controls()
     
     with st.sidebar.expander("📋 About This Tool"):
         st.markdown("""
@@ -208,16 +251,27 @@ def main():
     if 'page' in st.session_state:
         page = st.session_state.page
     
-    if page == "🏠 Home":
-        show_home_page()
-    elif page == "📊 MAP Assessment":
-        show_map_assessment()
-    elif page == "💰 OLA Analysis":
-        show_ola_analysis()
-    elif page == "🖥️ ONE OLA (Windows & Storage)":
-        show_one_ola()
-    elif page == "📈 Results Dashboard":
-        show_results_dashboard()
+    monitor = get_performance_monitor()
+    monitor.record_rerun(page)
+    try:
+        with monitor.timer('page', page):
+            if page == "🏠 Home":
+                show_home_page()
+            elif page == "📊 MAP Assessment":
+                show_map_assessment()
+            elif page == "💰 OLA Analysis":
+                show_ola_analysis()
+            elif page == "🖥️ ONE OLA (Windows & Storage)":
+                show_one_ola()
+            elif page == "📈 Results Dashboard":
+                show_results_dashboard()
+    finally:
+        save_checkpoint()
+        record_session_metrics(monitor)
+    
+    if show_metrics:
+        with metrics_panel:
+            show_performance_panel(monitor)
     
     # Footer
     st.markdown("---")
@@ -338,6 +392,11 @@ def show_map_assessment():
     progress_steps = ["Project Setup", "Data Upload", "Validation", "Analysis", "Results"]
     current_step = st.session_state.map_step
     
+    # A refreshed browser only keeps the URL; pick the analysis job back up from it
+    if 'server_data' not in st.session_state and 'map_job' in st.query_params:
+        restore_map_job(st.query_params['map_job'])
+        current_step = st.session_state.map_step
+    
     # Debug info (remove in production)
     st.sidebar.write(f"Debug: Current step = {current_step}")
     
@@ -375,7 +434,7 @@ def show_project_setup():
     with col1:
         customer_name = st.text_input("Customer Name", placeholder="Enter customer name")
         project_type = st.selectbox("Assessment Type", ["MAP - Full Assessment", "MAP - Quick Assessment"])
-        region = st.selectbox("Primary AWS Region", ["us-east-1", "us-west-2", "eu-west-1", "ap-southeast-1"])
+        region = st.selectbox("Primary AWS Region", list(REGION_PRICE_MULTIPLIERS))
     
     with col2:
         timeline = st.selectbox("Project Timeline", ["Q1 2025", "Q2 2025", "Q3 2025", "Q4 2025"])
@@ -438,14 +497,32 @@ FileServer01,4,16,1000,Windows Server 2019,2,SSD"""
             
             # Preview data
             st.subheader("📋 Data Preview")
-            st.dataframe(df.head(), use_container_width=True)
+            show_paged_table(df, "upload_preview", page_size=10)
             
-            # Store data in session
-            st.session_state.server_data = df
+            # A re-export of an inventory that is already loaded can be applied as a delta instead of a fresh start
+            inventory = st.session_state.get('inventory_state')
+            update = inventory is not None and st.radio(
+                "This upload", ["Replace the current inventory", "Update the current inventory (match on Server_Name)"],
+                key="upload_mode", horizontal=True).startswith("Update")
             
-            if st.button("Next: Validate Data"):
-                st.session_state.map_step = 2
-                st.rerun()
+            if update:
+                st.caption(f"Servers are matched on Server_Name against the {len(inventory.current):,} loaded ones. "
+                           "Only new, changed and removed servers are re-sized and re-priced.")
+                if st.button("Apply Update →"):
+                    with timed_stage("inventory_refresh"):
+                        st.session_state.inventory_refresh = inventory.refresh(df)
+                    st.session_state.server_data = inventory.current
+                    # Editor deltas are relative to the inventory before the update
+                    st.session_state.pop('inventory_editor', None)
+                    st.session_state.map_step = 4
+                    st.rerun()
+            else:
+                # Store data in session
+                st.session_state.server_data = df
+                
+                if st.button("Next: Validate Data"):
+                    st.session_state.map_step = 2
+                    st.rerun()
                 
         except Exception as e:
             st.error(f"❌ Error reading file: {str(e)}")
@@ -467,33 +544,32 @@ def show_data_validation():
     st.subheader("Step 3: Data Validation")
     
     if 'server_data' in st.session_state:
-        df = st.session_state.server_data
+        with timed_stage("inventory_sync"):
+            inventory = get_incremental_inventory()
+            # Apply grid edits from the previous interaction before anything reads the inventory
+            if 'inventory_editor' in st.session_state:
+                inventory.sync_editor_state(st.session_state.inventory_editor)
+                st.session_state.server_data = inventory.current
+        df = inventory.current
+        summary = inventory.summary()
         
         # Validation metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Servers", len(df))
+            st.metric("Total Servers", summary['total_servers'])
         with col2:
-            windows_count = len(df[df['OS'].str.contains('Windows', na=False, case=False)])
-            st.metric("Windows Servers", windows_count)
+            st.metric("Windows Servers", summary['windows_servers'])
         with col3:
-            linux_count = len(df[df['OS'].str.contains('Linux', na=False, case=False)])
-            st.metric("Linux Servers", linux_count)
+            st.metric("Linux Servers", summary['linux_servers'])
         with col4:
-            missing_data = df.isnull().sum().sum()
-            st.metric("Missing Data Points", missing_data)
+            st.metric("Missing Data Points", summary['missing_data_points'])
         
         # Data quality issues
         st.subheader("🔍 Data Quality Analysis")
         
-        issues = []
-        if df['CPU_Cores'].isnull().any():
-            issues.append(f"• {df['CPU_Cores'].isnull().sum()} servers missing CPU information")
-        if df['Memory_GB'].isnull().any():
-            issues.append(f"• {df['Memory_GB'].isnull().sum()} servers missing memory information")
-        if df['Storage_GB'].isnull().any():
-            issues.append(f"• {df['Storage_GB'].isnull().sum()} servers missing storage information")
+        anomalies = get_inventory_anomalies(df)
+        issues = InventoryValidator.describe_missing(summary['missing_by_column']) + InventoryValidator.describe_anomalies(anomalies)
         
         if issues:
             st.markdown('<div class="warning-box">', unsafe_allow_html=True)
@@ -506,8 +582,22 @@ def show_data_validation():
             st.markdown("✅ **Data quality looks good! No issues found.**")
             st.markdown('</div>', unsafe_allow_html=True)
         
+        if len(anomalies):
+            with st.expander(f"🔎 Suspicious Values ({len(anomalies):,})"):
+                st.caption("Unit and range checks, then robust outliers (median/MAD of log values) within each OS "
+                           "platform and workload role. Row numbers match the editor's index below.")
+                show_paged_table(anomalies, "map_anomalies")
+        
+        # In-app fixes instead of editing the CSV and re-uploading
+        with st.expander("✏️ Edit Inventory", expanded=bool(issues)):
+            st.caption("Fix, add or delete rows here. Only the changed rows are re-sized and re-priced; "
+                       f"{inventory.rows_recomputed} rows recomputed so far. "
+                       f"Est. AWS monthly cost: ${summary['total_estimated_cost']:,.0f}")
+            # The index is shown so the Suspicious Values rows can be found
+            st.data_editor(inventory.base, key="inventory_editor", num_rows="dynamic", use_container_width=True)
+        
         # Visualization
-        fig = px.histogram(df, x='OS', title="Server Distribution by Operating System")
+        fig = px.bar(category_counts(df['OS'], 'OS'), x='OS', y='Servers', title="Server Distribution by Operating System")
         st.plotly_chart(fig, use_container_width=True)
         
         col1, col2 = st.columns(2)
@@ -523,34 +613,50 @@ def show_data_validation():
 def show_analysis_progress():
     st.subheader("Step 4: Running Analysis")
     
-    # Simulate analysis progress
-    if 'analysis_progress' not in st.session_state:
-        st.session_state.analysis_progress = 0
-    
-    progress_bar = st.progress(st.session_state.analysis_progress)
-    status_text = st.empty()
+    if 'server_data' not in st.session_state:
+        st.warning("No server inventory loaded.")
+        if st.button("← Back to Data Upload"):
+            st.session_state.map_step = 1
+            st.rerun()
+        return
     
-    analysis_steps = [
-        "Analyzing server inventory...",
-        "Mapping to AWS services...",
-        "Calculating cost estimates...",
-        "Generating recommendations...",
-        "Creating reports..."
-    ]
+    # The analysis runs in a worker process, so it survives reruns, refreshes and app restarts
+    job = get_map_job()
+    if job is None or not is_map_job_current(st.session_state.server_data):
+        with timed_stage("map_job_submit"):
+            submit_map_job(st.session_state.server_data)
+        job = get_map_job()
     
-    if st.session_state.analysis_progress < 100:
-        current_step_idx = min(int(st.session_state.analysis_progress / 20), len(analysis_steps) - 1)
-        status_text.text(analysis_steps[current_step_idx])
-        
-        # Auto-increment progress (in real app, this would be actual analysis)
-        if st.button("Continue Analysis"):
-            st.session_state.analysis_progress = min(100, st.session_state.analysis_progress + 20)
-            st.rerun()
+    if job['status'] in ('queued', 'running'):
+        show_map_job_progress()
     else:
-        status_text.text("✅ Analysis complete!")
-        if st.button("View Results →"):
-            st.session_state.map_step = 4
-            st.rerun()
+        st.progress(job['progress'])
+        st.caption(f"Job {job['id']}")
+        if job['status'] == 'failed':
+            st.error(f"Analysis stopped: {job['error']}")
+            if st.button("Resume Analysis"):
+                queue = get_job_queue()
+                queue.retry(job['id'])
+                queue.ensure_workers()
+                st.rerun()
+        else:
+            st.text("✅ Analysis complete!")
+            if st.button("View Results →"):
+                st.session_state.map_step = 4
+                st.rerun()
+
+@st.fragment(run_every=1.0)
+def show_map_job_progress():
+    """Poll the analysis job; only this fragment reruns while the worker is busy"""
+    queue = get_job_queue()
+    job = get_map_job()
+    if job['status'] not in ('queued', 'running'):
+        st.rerun()
+    # Restarts a worker if the one running this job died; the job resumes at its next stage
+    queue.ensure_workers()
+    st.progress(job['progress'])
+    st.text(job['message'])
+    st.caption(f"Job {job['id']} · stage {min(job['stages_done'] + 1, job['stages_total'])} of {job['stages_total']}")
 
 def show_assessment_results():
     st.subheader("Step 5: Assessment Results")
@@ -558,26 +664,66 @@ def show_assessment_results():
     if 'server_data' in st.session_state:
         df = st.session_state.server_data
         
+        refresh = st.session_state.pop('inventory_refresh', None)
+        if refresh is not None:
+            st.success(f"✅ Inventory updated: {refresh['inserted']:,} added, {refresh['updated']:,} changed, "
+                       f"{refresh['deleted']:,} removed, {refresh['unchanged']:,} unchanged servers kept as they were.")
+            if refresh['duplicates']:
+                st.warning(f"⚠️ {refresh['duplicates']:,} repeated Server_Name rows in the upload; the last of each was used.")
+        
+        # Everything below follows the slice; rows come from the bitmap index, not a scan
+        facet_index = get_bitmap_index(df, "map")
+        selection = show_slice_filter(facet_index, "map")
+        fleet_recommendations = server_recommendations = get_server_recommendations(df)
+        spot_scores = get_spot_scores(df, server_recommendations, "map")
+        if selection is not None:
+            server_recommendations = server_recommendations.iloc[facet_index.rows(selection)]
+            spot_scores = spot_scores.iloc[facet_index.rows(selection)]
+        summary = get_inventory_analyzer().summarize(server_recommendations)
+        spot_summary = SpotScorer().summarize(spot_scores)
+        
         # Executive summary
         st.subheader("📊 Executive Summary")
         
+        windows_count = facet_match_count(facet_index, selection, server_recommendations, 'OS', 'Windows')
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            simulate = st.toggle("🎲 Simulation mode: P10/P50/P90 cost bands", key="map_simulation")
+        with col2:
+            trials = st.selectbox("Trials", [1_000, 10_000], index=1, key="map_simulation_trials",
+                                  disabled=not simulate)
+        simulation = None
+        if simulate:
+            rows = None if selection is None else facet_index.rows(selection)
+            simulation = get_cost_simulation(df, server_recommendations, rows, trials)
+            total_bands = simulation['trials']['Total'].quantile([0.1, 0.5, 0.9])
+        
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Servers", len(df))
+            st.metric("Total Servers", f"{summary['total_servers']:,}")
         with col2:
-            st.metric("Est. Monthly Cost", "$12,450", delta="-35%")
+            # The bands right-size to sampled demand, so they are headlined by their own median, not the sizing estimate
+            if simulation is None:
+                st.metric("Est. Monthly Cost", f"${summary['total_estimated_cost']:,.0f}")
+            else:
+                st.metric("Est. Monthly Cost (P50)", f"${total_bands.iloc[1]:,.0f}",
+                          delta=f"P10-P90: ${total_bands.iloc[0]:,.0f} - ${total_bands.iloc[2]:,.0f}", delta_color="off")
         with col3:
             st.metric("Migration Ready", "89%", delta="Good")
         with col4:
             st.metric("Timeline", "8-12 months")
         
+        if simulation is not None:
+            show_cost_simulation(simulation)
+        
         # Key recommendations
         st.subheader("🎯 Key Recommendations")
         recommendations = [
             "Right-size 23 over-provisioned servers → Save $2,100/month",
             "Apply Hybrid Benefit to Windows servers → Save 40%",
             "Migrate file servers to Amazon FSx → Save $1,800/month",
-            "Convert dev/test servers to Spot Instances → Save 70%"
+            spot_recommendation(spot_summary)
         ]
         
         for rec in recommendations:
@@ -586,7 +732,7 @@ def show_assessment_results():
         # Charts
         st.subheader("📈 Analysis Charts")
         
-        tab1, tab2, tab3 = st.tabs(["Cost Analysis", "Server Distribution", "Migration Timeline"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Cost Analysis", "Server Distribution", "Migration Timeline", "Region Comparison"])
         
         with tab1:
             # Cost comparison chart
@@ -594,13 +740,14 @@ def show_assessment_results():
                 'Category': ['Current On-Premises', 'AWS (No Optimization)', 'AWS (Optimized)'],
                 'Monthly Cost': [18000, 15000, 12450]
             })
-            fig = px.bar(cost_data, x='Category', y='Monthly Cost', 
-                        title="Cost Comparison Analysis")
+            fig = build_figure('bar', cost_data, x='Category', y='Monthly Cost', 
+                               title="Cost Comparison Analysis")
             st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
             # Server distribution
-            fig = px.pie(df, names='OS', title="Server Distribution by OS")
+            fig = build_figure('pie', facet_counts(facet_index, selection, server_recommendations, 'OS'),
+                               names='OS', values='Servers', title="Server Distribution by OS")
             st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
@@ -610,44 +757,50 @@ def show_assessment_results():
                 'Duration': [2, 3, 4, 3],
                 'Servers': [32, 45, 35, 15]
             })
-            fig = px.bar(timeline_data, x='Phase', y=['Duration', 'Servers'],
-                        title="Migration Timeline and Server Distribution")
+            fig = build_figure('bar', timeline_data, x='Phase', y=['Duration', 'Servers'],
+                               title="Migration Timeline and Server Distribution")
             st.plotly_chart(fig, use_container_width=True)
         
+        with tab4:
+            show_region_comparison(server_recommendations)
+        
+        # Per-server results; sorted, filtered and paged server-side
+        st.subheader("🖥️ Server Recommendations")
+        show_paged_table(server_recommendations, "map_recommendations",
+                         column_config={column: st.column_config.NumberColumn(format="$%.2f") for column in COST_COLUMNS})
+        
+        with st.expander("🔀 Compare with a Saved Assessment"):
+            show_assessment_diff(fleet_recommendations)
+        
         # Amazon Q integration
         st.subheader("🤖 Ask Amazon Q")
-        user_question = st.text_input("Ask about these results...", 
-                                    placeholder="e.g., How can I reduce costs further?")
-        
-        if user_question:
-            # Simulate Amazon Q response
-            q_responses = {
-                "cost": "Based on your assessment, you can achieve additional savings by: 1) Implementing auto-scaling for variable workloads, 2) Using S3 Intelligent Tiering for storage, 3) Considering Aurora Serverless for databases with unpredictable usage patterns.",
-                "timeline": "Your migration timeline can be optimized by: 1) Starting with stateless applications first, 2) Running pilot migrations in parallel, 3) Using AWS Application Migration Service for faster server migrations.",
-                "default": "I can help you customize this analysis further. Would you like me to focus on specific areas like security, compliance, or performance optimization?"
-            }
-            
-            response_key = "default"
-            if "cost" in user_question.lower():
-                response_key = "cost"
-            elif "timeline" in user_question.lower():
-                response_key = "timeline"
-            
-            st.markdown(f"**Amazon Q:** {q_responses[response_key]}")
+        show_q_chat("Ask about these results...", "e.g., How can I reduce costs further?", {
+            'Total servers': f"{summary['total_servers']:,}",
+            'Windows servers': f"{windows_count:,}",
+            'Estimated AWS monthly cost': f"${summary['total_estimated_cost']:,.0f}",
+            'Windows license cost': f"${summary['license_cost']:,.0f}/month",
+            'Storage cost': f"${summary['storage_cost']:,.0f}/month",
+            'Spot and off-hours scheduling savings': f"${spot_summary['monthly_savings']:,.0f}/month "
+                                                     f"on {spot_summary['eligible_servers']:,} servers",
+            'Migration timeline': "8-12 months"
+        }, fallback="I can help you customize this analysis further. Would you like me to focus on specific areas like security, compliance, or performance optimization?")
         
         # Export options
         st.subheader("📄 Export Results")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("📊 Executive Report"):
-                st.success("Executive report generated! (Download would start here)")
-        with col2:
-            if st.button("📋 Technical Details"):
-                st.success("Technical report generated! (Download would start here)")
-        with col3:
-            if st.button("💰 Cost Model"):
-                st.success("Cost model exported! (Download would start here)")
+        executive_summary = pd.DataFrame({
+            'Metric': ['Total Servers', 'Est. Monthly Cost', 'Compute', 'Windows Licensing', 'Storage',
+                       'Spot and Scheduling Savings'],
+            'Value': [summary['total_servers'], round(summary['total_estimated_cost'], 2), round(summary['compute_cost'], 2),
+                      round(summary['license_cost'], 2), round(summary['storage_cost'], 2),
+                      round(spot_summary['monthly_savings'], 2)]
+        })
+        show_export_buttons([
+            ("📊 Executive Report", "Executive Report",
+             {'Executive Summary': executive_summary, 'Recommendations': pd.DataFrame({'Recommendation': recommendations})}),
+            ("📋 Technical Details", "Technical Details", {'Server Recommendations': server_recommendations,
+                                                            'Spot and Scheduling': spot_scores}),
+            ("💰 Cost Model", "Cost Model", {'Server Costs': server_recommendations, 'Cost by Family': cost_by_family(server_recommendations)}),
+        ], key="map_export")
 
 def show_ola_analysis():
     st.subheader("💰 Optimization and Licensing Assessment (OLA)")
@@ -751,6 +904,29 @@ def show_ola_multiplatform_analysis():
         st.markdown("**Performance Data (Optional)**")
         perf_file = st.file_uploader("Performance Metrics", type=['json', 'csv'], key="ola_perf")
     
+    if server_file is not None:
+        uploads = {'costs': cost_file, 'licenses': license_file, 'performance': perf_file}
+        server_upload = (server_file.name, server_file.getvalue())
+        source_uploads = {name: (f.name, f.getvalue()) for name, f in uploads.items() if f is not None}
+        try:
+            with timed_stage("source_join"):
+                result = join_ola_sources(server_upload, source_uploads)
+            aliases = show_hostname_reconciliation(server_upload, source_uploads, result)
+            if aliases:
+                with timed_stage("source_join"):
+                    result = join_ola_sources(server_upload, source_uploads, aliases)
+        except ValueError as e:
+            st.error(f"❌ Could not combine the uploaded files: {e}")
+        else:
+            # Keep the same frame across reruns so the cost scenario is not recomputed
+            upload_key = tuple(f.file_id for f in [server_file, *uploads.values()] if f is not None)
+            upload_key += (st.session_state.get('ola_link_score'),)
+            if st.session_state.get('ola_upload_key') != upload_key:
+                st.session_state.ola_upload_key = upload_key
+                st.session_state.ola_data = result['facts']
+            st.success(f"✅ {len(result['facts']):,} servers loaded")
+            show_source_coverage(result)
+    
     # Sample data option
     if st.button("Use Sample Multi-Platform Data"):
         sample_data = create_multiplatform_sample_data()
@@ -759,30 +935,75 @@ def show_ola_multiplatform_analysis():
         
         # Show data preview
         st.subheader("📋 Environment Overview")
+        facet_index = get_bitmap_index(sample_data, "ola")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric("Total Servers", len(sample_data))
         with col2:
-            windows_count = len(sample_data[sample_data['OS'].str.contains('Windows', na=False, case=False)])
-            st.metric("Windows Servers", windows_count)
+            st.metric("Windows Servers", facet_match_count(facet_index, None, sample_data, 'OS', 'Windows'))
         with col3:
-            linux_count = len(sample_data[sample_data['OS'].str.contains('Linux', na=False, case=False)])
-            st.metric("Linux Servers", linux_count)
+            st.metric("Linux Servers", facet_match_count(facet_index, None, sample_data, 'OS', 'Linux'))
         with col4:
-            container_count = len(sample_data[sample_data['Workload_Type'].str.contains('Container', na=False, case=False)])
-            st.metric("Containerized", container_count)
+            st.metric("Containerized", facet_match_count(facet_index, None, sample_data, 'Workload_Type', 'Container'))
         
         # Platform distribution chart
-        platform_dist = sample_data['Platform_Category'].value_counts()
-        fig = px.pie(values=platform_dist.values, names=platform_dist.index, 
-                    title="Platform Distribution")
+        platform_dist = facet_counts(facet_index, None, sample_data, 'Platform_Category')
+        fig = build_figure('pie', platform_dist, values='Servers', names='Platform_Category',
+                           title="Platform Distribution")
         st.plotly_chart(fig, use_container_width=True)
         
         if st.button("Next: Cost Optimization Analysis"):
             st.session_state.ola_step = 2
             st.rerun()
 
+@st.cache_data
+def join_ola_sources(server_upload, source_uploads, aliases=None):
+    """Read and join the uploaded exports; keyed on file contents, so reruns reuse the fact table"""
+    servers = read_source(io.BytesIO(server_upload[1]), server_upload[0])
+    sources = {name: read_source(io.BytesIO(data), file_name) for name, (file_name, data) in source_uploads.items()}
+    return SourceJoiner().join(servers, sources, aliases)
+
+@st.cache_data
+def reconcile_ola_hosts(server_upload, source_uploads):
+    """Candidate matches for the hosts the exact join left over; keyed on the uploads like the join"""
+    result = join_ola_sources(server_upload, source_uploads)
+    return HostnameReconciler().reconcile(result['server_keys'], result['unmatched'])
+
+def show_hostname_reconciliation(server_upload, source_uploads, result):
+    """Fuzzy-match source hosts the exact join missed; returns the accepted {source: {host: server}} links"""
+    unmatched_count = sum(len(hosts) for hosts in result['unmatched'].values())
+    if not unmatched_count:
+        return {}
+    
+    with timed_stage("hostname_reconciliation"):
+        matches = reconcile_ola_hosts(server_upload, source_uploads)
+    with st.expander(f"🧩 Hostname Reconciliation ({unmatched_count:,} source hosts matched no server)"):
+        st.caption("Names are compared on character trigrams (WEB-01, web01.corp.local and "
+                   "'i-0abc Name=web01' all resolve to web01). The best candidate above the threshold is linked.")
+        link_score = st.slider("Link matches scoring at least", 0.5, 1.0, 0.85, 0.05, key="ola_link_score")
+        show_paged_table(matches, "ola_host_matches",
+                         column_config={'Score': st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f")})
+    return HostnameReconciler.aliases(matches, link_score)
+
+def show_source_coverage(result):
+    """Per-source match rates and the servers that are missing cost, license or performance data"""
+    if result['coverage'].empty:
+        return
+    
+    st.subheader("🔗 Data Source Coverage")
+    st.dataframe(result['coverage'], use_container_width=True, hide_index=True,
+                 column_config={'Coverage': st.column_config.ProgressColumn(min_value=0, max_value=1, format="percent")})
+    if result['duplicate_server_keys']:
+        st.warning(f"⚠️ {result['duplicate_server_keys']:,} servers share a host name with another server")
+    
+    facts = result['facts']
+    flags = [column for column in facts.columns if column.startswith('Has_')]
+    incomplete = facts[~facts[flags].all(axis=1)]
+    if len(incomplete):
+        with st.expander(f"Servers missing data ({len(incomplete):,})"):
+            show_paged_table(incomplete[[find_host_column(facts), *flags]], "ola_incomplete")
+
 def show_ola_cost_optimization():
     st.subheader("Step 3: Cost Optimization Analysis")
     
@@ -846,16 +1067,26 @@ def show_ola_licensing_review():
     
     with tab1:
         st.markdown("#### 🖥️ Windows Server Licensing")
-        windows_license_data = pd.DataFrame({
-            'License Type': ['Windows Server Standard', 'Windows Server Datacenter', 'SQL Server Standard', 'SQL Server Enterprise'],
-            'Current Count': [45, 12, 8, 3],
-            'Hybrid Benefit Eligible': [45, 12, 8, 3],
-            'Monthly Savings': ['$1,800', '$960', '$640', '$450']
-        })
-        st.dataframe(windows_license_data, hide_index=True)
-        
-        total_windows_savings = 1800 + 960 + 640 + 450
-        st.success(f"💰 **Total Windows Hybrid Benefit Savings: ${total_windows_savings:,}/month**")
+        if 'ola_data' in st.session_state:
+            windows_license_data = LicensingCalculator().savings_by_license(
+                get_fleet_licensing(st.session_state.ola_data, "ola"))
+            st.dataframe(format_money_columns(windows_license_data, ['License Included', 'With Hybrid Benefit', 'Monthly Savings']),
+                         hide_index=True)
+            
+            total_windows_savings = windows_license_data['Monthly Savings'].sum()
+            st.success(f"💰 **Total Windows & SQL Server Hybrid Benefit Savings: ${total_windows_savings:,.0f}/month**")
+            
+            st.markdown("#### 🧩 License Consolidation Plan")
+            placements, consolidation = get_consolidation_plan(st.session_state.ola_data, "ola")
+            st.dataframe(format_money_columns(consolidation, ['License Before', 'License After', 'Monthly Savings']),
+                         column_config={'Avg CPU Fill': st.column_config.NumberColumn(format="percent")},
+                         hide_index=True)
+            for _, row in consolidation.iterrows():
+                st.markdown(f"• {consolidation_strategy(row)}")
+            with st.expander(f"Workload placements ({len(placements):,})"):
+                show_paged_table(placements, "ola_placements")
+        else:
+            st.info("Load your environment data in Step 2 to size Windows and SQL Server licensing per server.")
     
     with tab2:
         st.markdown("#### 🗄️ Database Licensing")
@@ -884,26 +1115,63 @@ def show_ola_licensing_review():
 def show_ola_portfolio_results():
     st.subheader("Step 5: Portfolio Optimization Results")
     
+    if 'ola_data' not in st.session_state:
+        st.warning("⚠️ Load your environment data in Step 2 to build the portfolio cost model.")
+        if st.button("← Back to Multi-Platform Analysis"):
+            st.session_state.ola_step = 1
+            st.rerun()
+        return
+    
+    df = st.session_state.ola_data
+    scenario_inputs = show_scenario_controls("ola")
+    scenario = get_cost_scenario("ola", df, scenario_inputs)
+    cashflow_inputs = show_cashflow_controls("ola")
+    
+    # A slice re-aggregates the scenario's cached per-server cost arrays; nothing is re-sized or re-priced
+    facet_index = get_bitmap_index(df, "ola")
+    selection = show_slice_filter(facet_index, "ola")
+    server_costs = scenario.get('server_costs')
+    on_demand, reserved = scenario.get('on_demand_compute'), scenario.get('reserved_compute')
+    rows = None if selection is None else facet_index.rows(selection)
+    if rows is None:
+        cost_model = scenario.get('cost_model')
+        servers = len(df)
+    else:
+        cost_model = scenario.cost_model_for(rows)
+        server_costs, on_demand, reserved = server_costs.iloc[rows], on_demand[rows], reserved[rows]
+        servers = len(rows)
+    totals = scenario.totals(cost_model)
+    cashflow_engine = get_cashflow_engine("ola", scenario, rows, cashflow_inputs['migration_cost'])
+    cashflow_labels, cashflow = evaluate_cashflow_scenarios(cashflow_engine, cashflow_inputs, scenario_inputs['ri_term'])
+    roi, payback = cashflow['roi'][0], cashflow['payback_month'][0]
+    hybrid_benefit_savings = cost_model['Monthly License'].iloc[0] - cost_model['Monthly License'].iloc[1]
+    ri_savings = on_demand.sum() - reserved.sum()
+    spot_scores = get_spot_scores(df, scenario.get('sizing'), "ola")
+    spot_summary = SpotScorer().summarize(spot_scores if rows is None else spot_scores.iloc[rows])
+    
     st.markdown("### 📊 Executive Summary - Portfolio-Wide Optimization")
     
     # Executive metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Servers Analyzed", "127", delta="Mixed environment")
+        st.metric("Total Servers Analyzed", f"{servers:,}", delta="Mixed environment")
     with col2:
-        st.metric("Monthly Cost Reduction", "$4,850", delta="-32%")
+        st.metric("Monthly Cost Reduction", f"${totals['monthly_savings']:,.0f}", delta=f"-{totals['savings_pct']:.0f}%")
     with col3:
-        st.metric("Annual Savings Potential", "$58,200", delta="ROI: 340%")
+        st.metric("Annual Savings Potential", f"${totals['monthly_savings'] * 12:,.0f}",
+                  delta=f"{cashflow_inputs['horizon_years']}-yr ROI: " + ("n/a" if pd.isna(roi) else f"{roi:.0%}"))
     with col4:
-        st.metric("Implementation Timeline", "3-6 months", delta="Phased approach")
+        st.metric("Implementation Timeline", f"{cashflow_inputs['migration_months']} months",
+                  delta="No payback in horizon" if pd.isna(payback) else f"Payback in {payback:.0f} months")
     
     # Detailed recommendations
     st.markdown("### 🎯 Top Optimization Recommendations")
     
     recommendations = [
-        {"Priority": "High", "Action": "Apply Windows Hybrid Benefit", "Impact": "$3,850/month", "Effort": "Low", "Timeline": "Immediate"},
+        {"Priority": "High", "Action": "Apply Windows Hybrid Benefit", "Impact": f"${hybrid_benefit_savings:,.0f}/month", "Effort": "Low", "Timeline": "Immediate"},
         {"Priority": "High", "Action": "Right-size over-provisioned instances", "Impact": "$2,100/month", "Effort": "Medium", "Timeline": "1-2 months"},
-        {"Priority": "Medium", "Action": "Purchase Reserved Instances", "Impact": "$1,070/month", "Effort": "Low", "Timeline": "Immediate"},
+        {"Priority": "Medium", "Action": "Purchase Reserved Instances", "Impact": f"${ri_savings:,.0f}/month", "Effort": "Low", "Timeline": "Immediate"},
+        {"Priority": "Medium", "Action": f"Spot and off-hours schedules for {spot_summary['eligible_servers']:,} dev/test servers", "Impact": f"${spot_summary['monthly_savings']:,.0f}/month", "Effort": "Medium", "Timeline": "1-2 months"},
         {"Priority": "Medium", "Action": "Optimize storage tiers", "Impact": "$700/month", "Effort": "Medium", "Timeline": "2-3 months"},
         {"Priority": "Low", "Action": "Migrate to managed databases", "Impact": "$500/month", "Effort": "High", "Timeline": "3-6 months"}
     ]
@@ -918,14 +1186,15 @@ def show_ola_portfolio_results():
     
     with tab1:
         # Cost breakdown
+        categories = ['Monthly Compute', 'Monthly License', 'Monthly Storage']
         cost_data = pd.DataFrame({
-            'Category': ['Compute', 'Storage', 'Database', 'Networking', 'Other'],
-            'Current Monthly Cost': [8500, 2200, 3100, 800, 1200],
-            'Optimized Monthly Cost': [6200, 1800, 2600, 800, 1000]
+            'Category': ['Compute', 'Windows Licensing', 'Storage'],
+            'Current Monthly Cost': cost_model[categories].iloc[0].to_numpy(),
+            'Optimized Monthly Cost': cost_model[categories].iloc[-1].to_numpy()
         })
         
-        fig = px.bar(cost_data, x='Category', y=['Current Monthly Cost', 'Optimized Monthly Cost'],
-                    title="Cost Optimization by Category", barmode='group')
+        fig = build_figure('bar', cost_data, x='Category', y=['Current Monthly Cost', 'Optimized Monthly Cost'],
+                           title="Cost Optimization by Category", barmode='group')
         st.plotly_chart(fig, use_container_width=True)
     
     with tab2:
@@ -936,97 +1205,65 @@ def show_ola_portfolio_results():
             'Optimization Potential': ['High', 'Medium', 'Low', 'High', 'Medium']
         })
         
-        fig = px.scatter(platform_data, x='Platform', y='Current Servers', 
-                        color='Optimization Potential', size='Current Servers',
-                        title="Platform Distribution and Optimization Potential")
+        fig = build_figure('scatter', platform_data, x='Platform', y='Current Servers', 
+                           color='Optimization Potential', size='Current Servers',
+                           title="Platform Distribution and Optimization Potential")
         st.plotly_chart(fig, use_container_width=True)
     
     with tab3:
-        # Implementation timeline
-        timeline_data = pd.DataFrame({
-            'Phase': ['Phase 1 (0-1 month)', 'Phase 2 (1-3 months)', 'Phase 3 (3-6 months)'],
-            'Actions': [
-                'Hybrid Benefit, Reserved Instances',
-                'Right-sizing, Storage optimization',
-                'Database migration, Advanced optimization'
-            ],
-            'Monthly Savings': [4920, 2800, 500],
-            'Cumulative Savings': [4920, 7720, 8220]
-        })
-        
-        fig = px.line(timeline_data, x='Phase', y='Cumulative Savings',
-                     title="Cumulative Savings Timeline", markers=True)
+        # Cash flow: migration ramp, dual running and RI upfronts against staying on premises
+        timeline_data = CashflowEngine.yearly(cashflow)
+        fig = build_figure('line', CashflowEngine.curve(cashflow, cashflow_labels), x='Month', y='Cumulative Savings',
+                           color='Scenario', title="Cumulative Net Savings by Month")
         st.plotly_chart(fig, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("##### Expected Case by Year")
+            st.dataframe(format_money_columns(timeline_data, ['Current Cost', 'Projected Cost', 'Net Savings',
+                                                              'Cumulative Savings']), hide_index=True)
+        with col2:
+            st.markdown("##### Scenario Comparison")
+            st.dataframe(format_money_columns(CashflowEngine.scenario_table(cashflow, cashflow_labels),
+                                              ['NPV', 'Cumulative Savings']), hide_index=True,
+                         column_config={'ROI': st.column_config.NumberColumn(format="percent"),
+                                        'Payback (months)': st.column_config.NumberColumn(format="%d")})
+        st.caption(f"NPV at {cashflow_inputs['discount_rate']:.0%} over {cashflow_inputs['horizon_years']} years; "
+                   "against lifting and shifting the same servers, with migration costs and a dual-running month per server")
     
     # Amazon Q integration
     st.markdown("### 🤖 Ask Amazon Q About Your Portfolio")
-    user_question = st.text_input("Ask about your optimization results...", 
-                                placeholder="e.g., How can I prioritize these recommendations?")
-    
-    if user_question:
-        ola_responses = {
-            "prioritize": "For your mixed environment, I recommend this priority order: 1) Apply Windows Hybrid Benefit immediately (highest ROI, lowest effort), 2) Right-size over-provisioned instances (quick wins), 3) Purchase Reserved Instances for stable workloads, 4) Optimize storage tiers, 5) Consider managed database services for long-term benefits.",
-            "timeline": "Your optimization can be implemented in 3 phases: Phase 1 (0-1 month): Licensing and RI changes for immediate $4,920/month savings. Phase 2 (1-3 months): Right-sizing and storage optimization. Phase 3 (3-6 months): Database migrations and advanced optimizations.",
-            "risk": "The recommendations are low-risk: Hybrid Benefit and RI purchases have no technical risk. Right-sizing should be done gradually with monitoring. Storage optimization can be tested with non-critical data first.",
-            "default": "Your portfolio shows excellent optimization potential with 32% cost reduction possible. The mixed Windows/Linux environment benefits most from licensing optimization and right-sizing. Would you like me to focus on any specific platform or optimization area?"
-        }
-        
-        response_key = "default"
-        if "prioritize" in user_question.lower() or "priority" in user_question.lower():
-            response_key = "prioritize"
-        elif "timeline" in user_question.lower() or "when" in user_question.lower():
-            response_key = "timeline"
-        elif "risk" in user_question.lower() or "safe" in user_question.lower():
-            response_key = "risk"
-        
-        st.markdown(f"**Amazon Q:** {ola_responses[response_key]}")
+    show_q_chat("Ask about your optimization results...", "e.g., How can I prioritize these recommendations?", {
+        'Servers analyzed': f"{servers:,}",
+        'Monthly cost reduction': f"${totals['monthly_savings']:,.0f} (-{totals['savings_pct']:.0f}%)",
+        'Annual savings potential': f"${totals['monthly_savings'] * 12:,.0f}",
+        'Top priority': f"{recommendations[0]['Action']} ({recommendations[0]['Impact']})",
+        'Implementation timeline': f"{cashflow_inputs['migration_months']} months, phased",
+        'Business case': f"NPV ${cashflow['npv'][0]:,.0f} over {cashflow_inputs['horizon_years']} years"
+                         + ("" if pd.isna(payback) else f", payback in {payback:.0f} months")
+    }, fallback="Your portfolio shows excellent optimization potential with 32% cost reduction possible. The mixed Windows/Linux environment benefits most from licensing optimization and right-sizing. Would you like me to focus on any specific platform or optimization area?")
     
     # Export options
     st.markdown("### 📄 Export Portfolio Results")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("📊 Executive Summary"):
-            st.success("Portfolio executive summary generated!")
-    with col2:
-        if st.button("📋 Detailed Analysis"):
-            st.success("Detailed optimization report generated!")
-    with col3:
-        if st.button("💰 Business Case"):
-            st.success("ROI and business case exported!")
+    executive_metrics = pd.DataFrame({
+        'Metric': ['Total Servers Analyzed', 'Monthly Cost Reduction', 'Annual Savings Potential', 'Implementation Timeline'],
+        'Value': [f"{servers:,}", f"${totals['monthly_savings']:,.0f}", f"${totals['monthly_savings'] * 12:,.0f}",
+                  f"{cashflow_inputs['migration_months']} months"]
+    })
+    detailed_analysis = {'Cost Breakdown': cost_data, 'Platform Distribution': platform_data,
+                         'Cost Model': cost_model, 'Server Costs': server_costs}
+    show_export_buttons([
+        ("📊 Executive Summary", "Portfolio Executive Summary",
+         {'Executive Summary': executive_metrics, 'Recommendations': recommendations_df}),
+        ("📋 Detailed Analysis", "Detailed Optimization Analysis", detailed_analysis),
+        ("💰 Business Case", "Business Case",
+         {'Cost Model': cost_model, 'Cost Breakdown': cost_data, 'Savings Timeline': timeline_data,
+          'Cash Flow Scenarios': CashflowEngine.scenario_table(cashflow, cashflow_labels)}),
+    ], key="ola_export")
 
 def create_multiplatform_sample_data():
     """Create sample data for OLA multi-platform analysis"""
-    import random
-    
-    platforms = [
-        ("Windows Server 2019", "Windows"),
-        ("Windows Server 2016", "Windows"), 
-        ("Linux Ubuntu 20.04", "Linux"),
-        ("Linux CentOS 7", "Linux"),
-        ("Linux RHEL 8", "Linux"),
-        ("Container (Docker)", "Container")
-    ]
-    
-    workload_types = ["Web Server", "Database", "File Server", "Application Server", "Development", "Container App"]
-    
-    data = []
-    for i in range(1, 101):  # 100 servers for OLA
-        platform, category = random.choice(platforms)
-        data.append({
-            'Server_Name': f"Server{i:03d}",
-            'CPU_Cores': random.choice([2, 4, 8, 16, 32]),
-            'Memory_GB': random.choice([8, 16, 32, 64, 128]),
-            'Storage_GB': random.choice([100, 500, 1000, 2000, 4000]),
-            'OS': platform,
-            'Platform_Category': category,
-            'Workload_Type': random.choice(workload_types),
-            'Environment': random.choice(['Production', 'Development', 'Test', 'Staging']),
-            'Utilization_CPU': random.randint(10, 90),
-            'Monthly_Cost': random.randint(50, 500)
-        })
-    
-    return pd.DataFrame(data)
+    return FleetGenerator().multiplatform_inventory(100)
 
 def show_one_ola():
     st.subheader("🖥️ ONE OLA - Windows Server & Storage Specialization")
@@ -1151,9 +1388,14 @@ def show_one_ola_storage_analysis():
     # File server analysis
     st.markdown("#### 📁 File Server Analysis")
     
+    metrics_file = st.file_uploader("Share I/O metrics (optional): Server_Name, Throughput_MBps and IOPS samples",
+                                    type=['csv', 'parquet'], key="one_ola_io_metrics")
+    
     if st.button("Load Windows Storage Sample Data"):
-        storage_data = create_windows_storage_sample_data()
-        st.session_state.one_ola_storage = storage_data
+        # The same sample frame is kept across clicks, so its FSx plan and table are not rebuilt
+        if 'one_ola_storage' not in st.session_state:
+            st.session_state.one_ola_storage = create_windows_storage_sample_data()
+        storage_data = st.session_state.one_ola_storage
         
         # Display storage analysis
         col1, col2, col3, col4 = st.columns(4)
@@ -1173,31 +1415,14 @@ def show_one_ola_storage_analysis():
         # Storage recommendations
         st.markdown("#### 🎯 FSx for Windows File Server Recommendations")
         
-        fsx_recommendations = []
-        for _, server in storage_data.iterrows():
-            if server['Access_Pattern'] == 'High':
-                fsx_type = "Multi-AZ"
-                throughput = "512 MB/s"
-            elif server['Access_Pattern'] == 'Medium':
-                fsx_type = "Single-AZ"
-                throughput = "64 MB/s"
-            else:
-                fsx_type = "Single-AZ"
-                throughput = "16 MB/s"
-            
-            monthly_cost = server['Used_GB'] * 0.13  # FSx pricing estimate
-            
-            fsx_recommendations.append({
-                'File Server': server['Server_Name'],
-                'Current Storage (GB)': server['Used_GB'],
-                'Recommended FSx': fsx_type,
-                'Throughput': throughput,
-                'Est. Monthly Cost': f"${monthly_cost:.0f}",
-                'Migration Strategy': 'AWS DataSync + Cutover'
-            })
-        
-        fsx_df = pd.DataFrame(fsx_recommendations)
-        st.dataframe(fsx_df, use_container_width=True, hide_index=True)
+        with timed_stage("fsx_recommendations"):
+            planner = plan_fsx_capacity(storage_data, metrics_file)
+            fsx_df = planner.plan(storage_data)
+        source = metrics_file.name if metrics_file is not None else "one simulated month of 1-minute samples"
+        st.caption(f"Throughput capacity sized to p95 demand + 20% headroom from {planner.demand()['Samples'].sum():,} "
+                   f"samples ({source}); servers without samples fall back to their access pattern.")
+        show_paged_table(fsx_df, "one_ola_fsx",
+                         column_config={'Est. Monthly Cost': st.column_config.NumberColumn(format="$%d")})
         
         # Storage tiering analysis
         st.markdown("#### 📊 Storage Tiering Opportunities")
@@ -1241,24 +1466,37 @@ def show_one_ola_ad_integration():
         current_ad = st.session_state.get('one_ola_profile', {}).get('ad_environment', 'Single domain')
         st.info(f"**Current Setup:** {current_ad}")
         
+        export_file = st.file_uploader("Directory export (optional): ldifde LDIF or csvde / Get-ADObject CSV",
+                                       type=['ldf', 'ldif', 'csv'], key="one_ola_ad_export")
+        if export_file is None:
+            # A removed upload no longer describes the directory
+            st.session_state.pop('one_ola_ad_summary', None)
+        directory = get_directory_summary(export_file)
+        if export_file is None:
+            st.caption("Simulated directory; upload an export to size from your own")
+        
+        stale_accounts = directory['stale_users'] + directory['stale_computers']
         ad_metrics = pd.DataFrame({
-            'Metric': ['Domain Controllers', 'User Accounts', 'Computer Accounts', 'Group Policies'],
-            'Count': [4, 1250, 890, 45],
-            'Complexity': ['Medium', 'High', 'High', 'Medium']
+            'Metric': ['Domains', 'Domain Controllers', 'User Accounts', 'Computer Accounts', 'Groups',
+                       'Group Policies', 'Max Group Nesting', f"Stale Accounts (> {directory['stale_days']} days)"],
+            'Count': [len(directory['domains']), directory['domain_controllers'], directory['users'],
+                      directory['computers'], directory['groups'], directory['group_policies'],
+                      directory['max_nesting_depth'], stale_accounts]
         })
         st.dataframe(ad_metrics, hide_index=True)
+        if directory['circular_nesting']:
+            st.warning("⚠️ Circular group nesting found; resolve it before migrating groups")
+        if stale_accounts:
+            st.caption(f"{stale_accounts:,} enabled accounts are stale and {directory['disabled_users']:,} users are "
+                       "disabled; clean them up before migration")
     
     with col2:
         st.markdown("#### ☁️ AWS AD Integration Options")
         
-        ad_options = pd.DataFrame({
-            'Option': ['AWS Managed Microsoft AD', 'AD Connector', 'Simple AD'],
-            'Best For': ['New AWS workloads', 'Hybrid scenarios', 'Basic needs only'],
-            'Cost/Month': ['$146', '$36', '$36'],
-            'Features': ['Full AD features', 'Proxy to on-premises', 'Basic LDAP'],
-            'Recommendation': ['✅ Recommended', '⚠️ Consider', '❌ Not suitable']
-        })
-        st.dataframe(ad_options, hide_index=True)
+        ad_options = recommend_directory_service(directory)
+        st.dataframe(format_money_columns(ad_options, ['Cost/Month']), hide_index=True)
+        st.caption(f"Sized for {directory['objects']:,} directory objects and "
+                   f"{directory['enabled_users'] - directory['stale_users']:,} active users")
     
     # AD integration architecture
     st.markdown("#### 🏗️ Recommended AD Architecture")
@@ -1317,29 +1555,51 @@ def show_one_ola_licensing_deep_dive():
         'Count': [4, 15, 25, 8, 12],
         'Current Edition': ['Standard', 'Standard', 'Standard', 'Datacenter', 'Standard'],
         'Cores per Server': [8, 4, 8, 16, 4],
-        'Hybrid Benefit Eligible': ['Yes', 'Yes', 'Yes', 'Yes', 'Yes'],
-        'Monthly Savings': ['$320', '$600', '$1,000', '$1,280', '$480']
+        'Hybrid Benefit Eligible': ['Yes', 'Yes', 'Yes', 'Yes', 'Yes']
     })
+    # Checkpoints saved before the fleet carried its role are rebuilt from the profile
+    if 'Server_Role' not in st.session_state.get('one_ola_fleet', pd.DataFrame()):
+        st.session_state.one_ola_fleet = create_windows_licensing_fleet(windows_licensing)
+    fleet = st.session_state.one_ola_fleet
+    licensing = get_fleet_licensing(fleet, "one_ola")
+    role_savings = licensing['Hybrid_Benefit_Savings'].groupby(fleet['Server_Role'].to_numpy()).sum()
+    windows_licensing['Monthly Savings'] = windows_licensing['Server Type'].map(role_savings).fillna(0)
     
-    st.dataframe(windows_licensing, use_container_width=True, hide_index=True)
+    st.dataframe(format_money_columns(windows_licensing, ['Monthly Savings']), use_container_width=True, hide_index=True)
     
-    total_windows_savings = 320 + 600 + 1000 + 1280 + 480
-    st.success(f"💰 **Total Windows Server Hybrid Benefit Savings: ${total_windows_savings:,}/month**")
+    total_windows_savings = windows_licensing['Monthly Savings'].sum()
+    st.success(f"💰 **Total Windows Server Hybrid Benefit Savings: ${total_windows_savings:,.0f}/month**")
     
     # SQL Server licensing (if applicable)
+    sql_consolidation = None
     if st.session_state.get('one_ola_profile', {}).get('sql_server'):
         st.markdown("#### 🗄️ SQL Server Licensing Optimization")
         
+        sql_instances = pd.DataFrame({
+            'Server_Name': ['PROD-SQL01', 'PROD-SQL02', 'DEV-SQL01', 'TEST-SQL01'],
+            'CPU_Cores': [16, 8, 4, 4],
+            'Memory_GB': [128, 64, 32, 32],
+            'OS': 'Windows Server 2019 Standard',
+            'SQL_Edition': ['Enterprise', 'Standard', 'Standard', 'Developer']
+        })
+        sql_costs = LicensingCalculator().license_costs(
+            sql_instances, get_inventory_analyzer().analyze_inventory_dataframe(sql_instances))
         sql_licensing = pd.DataFrame({
-            'SQL Instance': ['PROD-SQL01', 'PROD-SQL02', 'DEV-SQL01', 'TEST-SQL01'],
-            'Current Edition': ['Enterprise', 'Standard', 'Standard', 'Developer'],
-            'Cores': [16, 8, 4, 4],
-            'Current Model': ['BYOL on EC2', 'BYOL on EC2', 'BYOL on EC2', 'BYOL on EC2'],
-            'Recommendation': ['RDS SQL Enterprise', 'RDS SQL Standard', 'RDS SQL Standard', 'RDS SQL Express'],
-            'Monthly Impact': ['-$500 (managed)', '+$200 (license)', 'Break-even', '-$100 (downgrade)']
+            'SQL Instance': sql_costs['Server_Name'],
+            'Current Edition': sql_costs['SQL_Edition'],
+            'Cores': sql_instances['CPU_Cores'],
+            'License Included': sql_costs['License_Included_Monthly'],
+            'BYOL': sql_costs['BYOL_Monthly'],
+            'Dedicated Host': sql_costs['Dedicated_Host_Monthly'],
+            'Best Model': sql_costs['Best_Model'],
+            'Recommendation': ['RDS SQL Enterprise', 'RDS SQL Standard', 'RDS SQL Standard', 'RDS SQL Express']
         })
         
-        st.dataframe(sql_licensing, use_container_width=True, hide_index=True)
+        st.dataframe(format_money_columns(sql_licensing, ['License Included', 'BYOL', 'Dedicated Host']),
+                     use_container_width=True, hide_index=True)
+        _, sql_consolidation = ConsolidationPlanner().plan(sql_instances, sql_costs)
+        # The instances' Windows VMs are covered by the fleet's host plan below
+        sql_consolidation = sql_consolidation[sql_consolidation['Workload Group'].str.startswith('SQL Server')]
         
         st.info("💡 **SQL Server Strategy:** Mix of RDS managed services and EC2 with Hybrid Benefit based on workload requirements")
     
@@ -1359,9 +1619,12 @@ def show_one_ola_licensing_deep_dive():
     
     with col2:
         st.markdown("**Optimization Strategies**")
-        strategies = [
-            "Apply Hybrid Benefit to all eligible Windows workloads",
-            "Consolidate SQL Server instances where possible",
+        _, host_consolidation = get_consolidation_plan(fleet, "one_ola")
+        strategies = ["Apply Hybrid Benefit to all eligible Windows workloads"]
+        if sql_consolidation is not None:
+            strategies += [consolidation_strategy(row) for _, row in sql_consolidation.iterrows()]
+        strategies += [consolidation_strategy(row) for _, row in host_consolidation.iterrows()]
+        strategies += [
             "Use RDS for managed SQL Server workloads",
             "Implement license tracking and monitoring",
             "Regular license optimization reviews"
@@ -1372,17 +1635,12 @@ def show_one_ola_licensing_deep_dive():
     # License cost modeling
     st.markdown("#### 📊 License Cost Modeling")
     
-    cost_model = pd.DataFrame({
-        'Scenario': ['Current (On-premises)', 'Lift & Shift (No Hybrid Benefit)', 'Optimized (With Hybrid Benefit)', 'Fully Managed (RDS + Hybrid Benefit)'],
-        'Monthly License Cost': ['$8,500', '$8,500', '$4,820', '$5,200'],
-        'Monthly Infrastructure': ['$2,000', '$6,200', '$6,200', '$5,800'],
-        'Total Monthly Cost': ['$10,500', '$14,700', '$11,020', '$11,000'],
-        'vs Current': ['Baseline', '+40%', '+5%', '+5%']
-    })
+    scenario = get_cost_scenario("one_ola", fleet, show_scenario_controls("one_ola"))
+    cost_model = scenario.get('cost_model')
     
-    st.dataframe(cost_model, use_container_width=True, hide_index=True)
+    st.dataframe(format_cost_table(cost_model), use_container_width=True, hide_index=True)
     
-    fig = px.bar(cost_model, x='Scenario', y=['Monthly License Cost', 'Monthly Infrastructure'],
+    fig = px.bar(cost_model, x='Scenario', y=['Monthly License', 'Monthly Compute', 'Monthly Storage'],
                 title="License Cost Modeling Scenarios")
     st.plotly_chart(fig, use_container_width=True)
     
@@ -1395,42 +1653,63 @@ def show_one_ola_specialized_results():
     
     st.markdown("### 🎯 ONE OLA Specialized Recommendations")
     
-    # Executive summary for Windows specialization
+    # Executive summary for Windows specialization, from the fleet licensing and FSx plan of the earlier steps
+    fleet = st.session_state.get('one_ola_fleet')
+    storage = st.session_state.get('one_ola_storage')
+    licensing_totals = LicensingCalculator().summarize(get_fleet_licensing(fleet, "one_ola")) if fleet is not None else None
+    fsx_plan = get_fsx_plan(storage) if storage is not None else None
+    windows_percentage = st.session_state.get('one_ola_profile', {}).get('windows_percentage')
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Windows Servers", "64", delta="85% of environment")
+        st.metric("Windows Servers", f"{len(fleet):,}" if fleet is not None else "—",
+                  delta=f"{windows_percentage}% of environment" if windows_percentage is not None else None)
     with col2:
-        st.metric("Storage Optimization", "$1,800/month", delta="File server consolidation")
+        st.metric("FSx for Windows", f"${fsx_plan['Est. Monthly Cost'].sum():,.0f}/month" if fsx_plan is not None else "—",
+                  delta=f"{len(fsx_plan):,} file servers consolidated" if fsx_plan is not None else None, delta_color="off")
     with col3:
-        st.metric("Licensing Savings", "$3,680/month", delta="Hybrid Benefit")
+        st.metric("Licensing Savings", f"${licensing_totals['hybrid_benefit_savings']:,.0f}/month" if licensing_totals else "—",
+                  delta="Hybrid Benefit" if licensing_totals else None)
     with col4:
-        st.metric("Total Specialized Savings", "$5,480/month", delta="52% reduction")
+        reduction = licensing_totals['hybrid_benefit_savings'] / licensing_totals['license_included'] \
+            if licensing_totals and licensing_totals['license_included'] else None
+        st.metric("Licensing Cost Reduction", f"{reduction:.0%}" if reduction is not None else "—",
+                  delta=f"of ${licensing_totals['license_included']:,.0f}/month license-included" if reduction is not None else None,
+                  delta_color="off")
+    if licensing_totals is None:
+        st.info("Complete the Licensing Deep Dive step to size the Hybrid Benefit savings.")
+    if fsx_plan is None:
+        st.info("Load the file servers in the Storage Analysis step to plan the FSx migration.")
     
     # Specialized recommendations
     st.markdown("### 🏆 Top Windows & Storage Recommendations")
     
-    specialized_recs = [
-        {
+    specialized_recs = []
+    if licensing_totals:
+        specialized_recs.append({
             "Priority": "Critical",
             "Category": "Windows Licensing",
-            "Recommendation": "Apply Windows Server Hybrid Benefit to all 64 servers",
-            "Monthly Impact": "$3,680",
+            "Recommendation": f"Apply Windows Server Hybrid Benefit to all {len(fleet):,} servers",
+            "Monthly Impact": f"${licensing_totals['hybrid_benefit_savings']:,.0f} savings",
             "Implementation": "Immediate - configuration change only",
             "Risk": "None"
-        },
-        {
+        })
+    if fsx_plan is not None:
+        multi_az = int((fsx_plan['Recommended FSx'] == 'Multi-AZ').sum())
+        specialized_recs.append({
             "Priority": "High", 
             "Category": "Storage Consolidation",
-            "Recommendation": "Migrate 15 file servers to Amazon FSx for Windows",
-            "Monthly Impact": "$1,800",
+            "Recommendation": f"Migrate {len(fsx_plan):,} file servers to Amazon FSx for Windows ({multi_az:,} Multi-AZ)",
+            "Monthly Impact": f"${fsx_plan['Est. Monthly Cost'].sum():,.0f} FSx cost",
             "Implementation": "2-3 months with AWS DataSync",
             "Risk": "Low - phased migration"
-        },
+        })
+    managed_ad = recommend_directory_service(get_directory_summary()).iloc[0]
+    specialized_recs += [
         {
             "Priority": "High",
             "Category": "Active Directory",
-            "Recommendation": "Deploy AWS Managed Microsoft AD with trust relationship",
-            "Monthly Impact": "$200 cost, operational benefits",
+            "Recommendation": f"Deploy AWS Managed Microsoft AD ({managed_ad['Size']}) with trust relationship",
+            "Monthly Impact": f"${managed_ad['Cost/Month']:,.0f} cost, operational benefits",
             "Implementation": "1 month setup + integration",
             "Risk": "Medium - requires AD expertise"
         },
@@ -1455,16 +1734,13 @@ def show_one_ola_specialized_results():
     with tab1:
         st.markdown("#### 📁 File Server to FSx Migration Plan")
         
-        migration_plan = pd.DataFrame({
-            'Phase': ['Phase 1', 'Phase 2', 'Phase 3'],
-            'File Servers': ['Critical (5 servers)', 'Department (7 servers)', 'Archive (3 servers)'],
-            'FSx Configuration': ['Multi-AZ, 512 MB/s', 'Single-AZ, 64 MB/s', 'Single-AZ, 16 MB/s'],
-            'Migration Method': ['AWS DataSync', 'AWS DataSync', 'AWS Storage Gateway'],
-            'Timeline': ['Month 1', 'Month 2', 'Month 3'],
-            'Risk Level': ['Low', 'Low', 'Very Low']
-        })
-        
-        st.dataframe(migration_plan, use_container_width=True, hide_index=True)
+        if fsx_plan is None:
+            migration_plan = pd.DataFrame()
+            st.info("Load the file servers in the Storage Analysis step to plan the migration phases.")
+        else:
+            migration_plan = fsx_migration_phases(storage, fsx_plan)
+            st.dataframe(format_money_columns(migration_plan, ['FSx Cost/Month']), use_container_width=True,
+                         hide_index=True)
         
         # FSx cost comparison
         fsx_costs = pd.DataFrame({
@@ -1474,21 +1750,24 @@ def show_one_ola_specialized_results():
             'Monthly Savings': ['74%', '73%', '98%']
         })
         
-        fig = px.bar(fsx_costs, x='Storage Tier', y=['Current Cost/GB/Month', 'FSx Cost/GB/Month'],
-                    title="Storage Cost Comparison: Current vs FSx")
+        fig = build_figure('bar', fsx_costs, x='Storage Tier', y=['Current Cost/GB/Month', 'FSx Cost/GB/Month'],
+                           title="Storage Cost Comparison: Current vs FSx")
         st.plotly_chart(fig, use_container_width=True)
     
     with tab2:
         st.markdown("#### 🔐 Active Directory Integration Architecture")
         
-        st.markdown("""
+        directory = get_directory_summary()
+        domain = directory['domains'][0].replace('dc=', '').replace(',', '.') if directory['domains'] else 'corp.example.com'
+        on_premises = [domain, f"Users: {directory['users']:,}", f"Computers: {directory['computers']:,}"]
+        st.markdown(f"""
         **Recommended Architecture: AWS Managed Microsoft AD with Trust**
         
         ```
         On-Premises AD Domain          AWS Managed Microsoft AD
-        ├── corp.company.com          ├── aws.corp.company.com
-        ├── Users: 1,250             ├── AWS-specific accounts
-        ├── Computers: 890           ├── EC2 instances
+        ├── {on_premises[0]:<26}├── aws.{domain}
+        ├── {on_premises[1]:<26}├── AWS-specific accounts
+        ├── {on_premises[2]:<26}├── EC2 instances
         └── Trust Relationship ←────→ └── FSx file systems
         ```
         """)
@@ -1504,106 +1783,820 @@ def show_one_ola_specialized_results():
     with tab3:
         st.markdown("#### 💰 Windows Licensing ROI Analysis")
         
-        # 3-year ROI calculation
-        roi_data = pd.DataFrame({
-            'Year': ['Year 1', 'Year 2', 'Year 3'],
-            'Hybrid Benefit Savings': [44160, 44160, 44160],  # $3,680 * 12
-            'Storage Savings': [21600, 21600, 21600],  # $1,800 * 12
-            'Operational Savings': [6000, 8000, 10000],  # Increasing efficiency
-            'Total Annual Savings': [71760, 73760, 75760],
-            'Cumulative Savings': [71760, 145520, 221280]
-        })
-        
-        fig = px.line(roi_data, x='Year', y='Cumulative Savings',
-                     title="3-Year Cumulative Savings from Windows Specialization",
-                     markers=True)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        st.success("💰 **3-Year Total Savings: $221,280** with Windows & Storage specialization")
+        # Hybrid Benefit is applied as each server migrates; every server pays both ways for its migration month
+        if fleet is None:
+            roi_data = pd.DataFrame()
+            st.info("Complete the Licensing Deep Dive step to project Hybrid Benefit savings.")
+        else:
+            licensing = get_fleet_licensing(fleet, "one_ola")
+            engine = CashflowEngine(licensing['License_Included_Monthly'], licensing['BYOL_Monthly'])
+            with timed_stage("cashflow"):
+                cashflow = engine.evaluate()
+            roi_data = CashflowEngine.yearly(cashflow).rename(columns={
+                'Current Cost': 'License Included', 'Projected Cost': 'With Hybrid Benefit',
+                'Net Savings': 'Hybrid Benefit Savings'})
+            
+            fig = build_figure('line', roi_data, x='Year', y='Cumulative Savings',
+                               title=f"{HORIZON_YEARS}-Year Cumulative Savings from Windows Specialization",
+                               markers=True)
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(format_money_columns(roi_data, list(roi_data.columns[1:])), hide_index=True)
+            
+            st.success(f"💰 **{HORIZON_YEARS}-Year Total Savings: ${cashflow['cumulative'][0, -1]:,.0f}** "
+                       f"(NPV ${cashflow['npv'][0]:,.0f} at {DISCOUNT_RATE:.0%}, {GROWTH_RATE:.0%} annual growth, "
+                       f"{MIGRATION_MONTHS}-month ramp)")
     
     # Amazon Q specialized assistance
     st.markdown("### 🤖 Amazon Q - Windows & Storage Specialist")
-    user_question = st.text_input("Ask about Windows & Storage optimization...", 
-                                placeholder="e.g., How do I migrate file servers with minimal downtime?")
-    
-    if user_question:
-        one_ola_responses = {
-            "migrate": "For minimal downtime file server migration: 1) Use AWS DataSync for initial sync while servers are live, 2) Schedule final sync during maintenance window, 3) Update DNS/DFS to point to FSx, 4) Test access before decommissioning old servers. Typical downtime: 2-4 hours per server.",
-            "fsx": "FSx for Windows File Server provides native SMB/CIFS protocol, integrates with Active Directory, supports DFS, and includes automated backups. It's specifically designed to replace Windows file servers with better performance and lower cost.",
-            "licensing": "Windows Hybrid Benefit can save 40-50% on Windows Server costs. You can apply existing on-premises licenses to AWS EC2 instances. For SQL Server, compare BYOL on EC2 vs RDS License Included based on your usage patterns.",
-            "ad": "AWS Managed Microsoft AD is recommended for Windows-heavy environments. It provides full AD features, integrates seamlessly with FSx, and can establish trust relationships with on-premises AD for hybrid scenarios.",
-            "default": "Your Windows-heavy environment (85% Windows) is perfect for ONE OLA specialization. Focus on: 1) Immediate Hybrid Benefit application ($3,680/month savings), 2) File server consolidation to FSx ($1,800/month savings), 3) AD integration for seamless management. Total potential: 52% cost reduction."
-        }
-        
-        response_key = "default"
-        if "migrate" in user_question.lower() or "downtime" in user_question.lower():
-            response_key = "migrate"
-        elif "fsx" in user_question.lower() or "file" in user_question.lower():
-            response_key = "fsx"
-        elif "licens" in user_question.lower() or "hybrid" in user_question.lower():
-            response_key = "licensing"
-        elif "active directory" in user_question.lower() or "ad" in user_question.lower():
-            response_key = "ad"
-        
-        st.markdown(f"**Amazon Q (Windows & Storage Specialist):** {one_ola_responses[response_key]}")
+    q_facts, q_fallback = one_ola_q_context()
+    show_q_chat("Ask about Windows & Storage optimization...", "e.g., How do I migrate file servers with minimal downtime?",
+                q_facts, speaker="Amazon Q (Windows & Storage Specialist)", fallback=q_fallback)
     
     # Export specialized results
     st.markdown("### 📄 Export Windows & Storage Specialization Results")
-    col1, col2, col3 = st.columns(3)
+    storage_plan = {'Migration Plan': migration_plan, 'FSx Cost Comparison': fsx_costs}
+    if 'one_ola_storage' in st.session_state:
+        storage_plan['File Servers'] = st.session_state.one_ola_storage
+    show_export_buttons([
+        ("🖥️ Windows Optimization Report", "Windows Optimization Report",
+         {'Recommendations': specialized_df, 'AD Benefits': ad_benefits}),
+        ("💾 Storage Migration Plan", "Storage Migration Plan", storage_plan),
+        ("💰 Licensing Business Case", "Licensing Business Case", {'Licensing ROI': roi_data}),
+    ], key="one_ola_export")
+
+def one_ola_q_context():
+    """Assessment facts for the ONE OLA specialist and its fallback answer, from the fleet licensing, FSx plan and
+    directory summary computed in the earlier steps"""
+    facts, focus = {}, []
+    fleet = st.session_state.get('one_ola_fleet')
+    if fleet is not None:
+        licensing = get_fleet_licensing(fleet, "one_ola")
+        savings = licensing['Hybrid_Benefit_Savings'].sum()
+        license_included = licensing['License_Included_Monthly'].sum()
+        facts['Windows servers'] = f"{len(fleet):,}"
+        facts['Hybrid Benefit licensing savings'] = f"${savings:,.0f}/month" + (
+            f" ({savings / license_included:.0%} of license-included cost)" if license_included else "")
+        focus.append(f"Hybrid Benefit on {len(fleet):,} Windows servers (${savings:,.0f}/month savings)")
+    storage = st.session_state.get('one_ola_storage')
+    if storage is not None:
+        fsx_plan = get_fsx_plan(storage)
+        multi_az = int((fsx_plan['Recommended FSx'] == 'Multi-AZ').sum())
+        facts['FSx for Windows File Server'] = (f"{len(fsx_plan):,} file servers, {multi_az:,} Multi-AZ, "
+                                                f"${fsx_plan['Est. Monthly Cost'].sum():,.0f}/month")
+        focus.append(f"file server consolidation to FSx (${fsx_plan['Est. Monthly Cost'].sum():,.0f}/month "
+                     f"for {len(fsx_plan):,} file servers)")
+    directory = get_directory_summary()
+    managed_ad = recommend_directory_service(directory).iloc[0]
+    facts['Active Directory'] = (f"{directory['users']:,} users, {directory['computers']:,} computers; "
+                                 f"AWS Managed Microsoft AD {managed_ad['Size']} at ${managed_ad['Cost/Month']:,.0f}/month")
+    focus.append(f"AWS Managed Microsoft AD with a trust ({managed_ad['Size']}) for seamless management")
+    fallback = ("Your Windows environment is a good fit for ONE OLA specialization. Focus on: "
+                + ", ".join(f"{i}) {item}" for i, item in enumerate(focus, 1)) + ".")
+    return facts, fallback
+
+def get_fsx_plan(storage_data):
+    """FSx plan for the file servers from the planner the storage step last built for them"""
+    cached = st.session_state.get('one_ola_fsx_planner')
+    planner = cached[2] if cached is not None and cached[1] is storage_data else plan_fsx_capacity(storage_data)
+    return planner.plan(storage_data)
+
+def fsx_migration_phases(storage_data, fsx_plan):
+    """One migration phase per access pattern, busiest shares first, with the FSx configuration planned for them"""
+    pattern = storage_data['Access_Pattern'].fillna('Low') if 'Access_Pattern' in storage_data \
+        else pd.Series('Low', index=storage_data.index)
+    phases = fsx_plan.groupby(pattern.to_numpy(), sort=False).agg(
+        servers=('File Server', 'size'), deployments=('Recommended FSx', lambda d: ' / '.join(sorted(d.unique()))),
+        low=('Throughput Capacity (MB/s)', 'min'), high=('Throughput Capacity (MB/s)', 'max'),
+        cost=('Est. Monthly Cost', 'sum'))
+    phases = phases.reindex([p for p in FSX_ACCESS_PROFILES if p in phases.index]
+                            + [p for p in phases.index if p not in FSX_ACCESS_PROFILES])
+    throughput = [f"{low:,} MB/s" if low == high else f"{low:,}-{high:,} MB/s" for low, high in zip(phases['low'], phases['high'])]
+    return pd.DataFrame({
+        'Phase': [f"Phase {i}" for i in range(1, len(phases) + 1)],
+        'File Servers': [f"{p} access ({n:,} servers)" for p, n in zip(phases.index, phases['servers'])],
+        'FSx Configuration': [f"{d}, {t}" for d, t in zip(phases['deployments'], throughput)],
+        'FSx Cost/Month': phases['cost'].to_numpy(),
+        # Low-access shares are mostly cold data, seeded through Storage Gateway rather than copied live
+        'Migration Method': ['AWS Storage Gateway' if p == 'Low' else 'AWS DataSync' for p in phases.index],
+        'Timeline': [f"Month {i}" for i in range(1, len(phases) + 1)],
+        'Risk Level': ['Very Low' if p == 'Low' else 'Low' for p in phases.index],
+    })
+
+def plan_fsx_capacity(storage_data, metrics_file=None):
+    """FSx planner fed once per upload with its I/O samples, or once per file server set with simulated ones"""
+    file_id = metrics_file.file_id if metrics_file is not None else None
+    cached = st.session_state.get('one_ola_fsx_planner')
+    reused = cached is not None and cached[0] == file_id and (file_id is not None or cached[1] is storage_data)
+    get_performance_monitor().record_cache("fsx_planner", reused)
+    if not reused:
+        planner = FsxCapacityPlanner()
+        if metrics_file is not None:
+            planner.add_all(read_metric_chunks(metrics_file))
+        else:
+            planner.add_all(FleetGenerator().share_io_metrics(storage_data))
+        cached = (file_id, storage_data, planner)
+        st.session_state.one_ola_fsx_planner = cached
+    return cached[2]
+
+def get_directory_summary(export_file=None):
+    """Directory counts streamed from an uploaded AD export, parsed once per upload; without one, the export last
+    parsed in this session, else a simulated directory"""
+    cached = st.session_state.get('one_ola_ad_summary')
+    if export_file is None:
+        return cached[1] if cached is not None else get_sample_directory_summary()
+    reused = cached is not None and cached[0] == export_file.file_id
+    if not reused:
+        with timed_stage("ad_export_parse"):
+            cached = (export_file.file_id, DirectoryExportParser().parse(export_file, export_file.name))
+        st.session_state.one_ola_ad_summary = cached
+    get_performance_monitor().record_cache("ad_export", reused)
+    return cached[1]
+
+@st.cache_data
+def get_sample_directory_summary():
+    """Simulated directory at the scale of the sample ONE OLA customer"""
+    as_of = datetime.now().timestamp()
+    export = FleetGenerator().directory_export(1250, as_of, n_computers=886, n_gpos=45, n_domain_controllers=4)
+    return DirectoryExportParser(as_of=as_of).parse_ldif(export)
+
+def create_windows_storage_sample_data():
+    """Create sample data for Windows storage analysis"""
+    return FleetGenerator().file_servers(15)
+
+@st.cache_resource
+def get_q_index():
+    """Built once per server process and memory-mapped from disk while the guides are unchanged"""
+    return QKnowledgeIndex.open_or_build(default_guide_paths(), os.path.join('.toolkit_cache', 'q_index'))
+
+@st.cache_data
+def build_figure(chart, data, **options):
+    """Plotly Express figure, cached on its (already aggregated) data and options"""
+    return getattr(px, chart)(data, **options)
+
+@st.fragment
+def show_q_chat(label, placeholder, assessment_facts, fallback, speaker="Amazon Q"):
+    """Question box and answer; asking a question reruns only this fragment, not the results page"""
+    user_question = st.text_input(label, placeholder=placeholder)
+    if user_question:
+        show_q_answer(user_question, assessment_facts, fallback, speaker)
+
+def show_q_answer(user_question, assessment_facts, fallback, speaker="Amazon Q"):
+    """Answer from the local guide index, grounded in this assessment's numbers"""
+    with timed_stage("q_answer"):
+        result = get_q_index().answer(user_question, assessment_facts)
+    if result is None:
+        st.markdown(f"**{speaker}:** {fallback}")
+        return
+    
+    facts = "; ".join(f"{label}: {value}" for label, value in result['facts'].items())
+    st.markdown(f"**{speaker}:** For this assessment ({facts}), the toolkit guides suggest:")
+    for passage in result['passages']:
+        st.markdown(f"**{passage['heading']}** — _{passage['source']}_")
+        st.text(passage['snippet'])
+
+@st.cache_resource
+def get_report_exporter():
+    """Exporter shared across sessions so unchanged reports are served from its file cache"""
+    return ReportExporter()
+
+@st.cache_resource
+def get_inventory_analyzer():
+    return ServerInventoryAnalyzer()
+
+@st.cache_data
+def _analyze_server_inventory(df, _lookup):
+    _lookup.miss()
+    return get_inventory_analyzer().analyze_inventory_dataframe(df)
+
+def analyze_server_inventory(df):
+    """Size and price every server in the inventory"""
+    with timed_stage("sizing"), get_performance_monitor().cache_lookup("inventory_sizing") as lookup:
+        return _analyze_server_inventory(df, lookup)
+
+def get_incremental_inventory():
+    """Row-level sizing state for the MAP inventory, rebuilt whenever a different inventory is loaded"""
+    inventory = st.session_state.get('inventory_state')
+    reused = inventory is not None and inventory.current is st.session_state.server_data
+    get_performance_monitor().record_cache("incremental_inventory", reused)
+    if not reused:
+        inventory = IncrementalInventory(st.session_state.server_data, get_inventory_analyzer())
+        st.session_state.inventory_state = inventory
+        st.session_state.server_data = inventory.current
+        # Editor deltas are relative to the previous inventory
+        st.session_state.pop('inventory_editor', None)
+    return inventory
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
+
+def get_map_job():
+    """The MAP analysis job for this session, or the one named in the URL"""
+    job_id = st.session_state.get('map_job_id') or st.query_params.get('map_job')
+    return get_job_queue().get(job_id) if job_id else None
+
+def submit_map_job(df):
+    """Queue a MAP analysis of the inventory and make sure a worker will pick it up"""
+    queue = get_job_queue()
+    job_id = queue.submit('map_assessment', {}, {'inventory': df})
+    queue.ensure_workers()
+    st.session_state.map_job_id = job_id
+    st.session_state.map_job_data = df
+    st.session_state.map_job_version = frame_version(df)
+    st.query_params['map_job'] = job_id
+
+def is_map_job_current(df):
+    """Whether the MAP job was submitted for this inventory as it is now, not before an in-place edit"""
+    return st.session_state.get('map_job_data') is df and st.session_state.get('map_job_version') == frame_version(df)
+
+def restore_map_job(job_id):
+    """Reload the inventory and wizard position of a job after a refresh or restart"""
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    inventory = queue.load_frame(job_id, 'inventory') if job else None
+    if inventory is None:
+        del st.query_params['map_job']
+        return
+    st.session_state.server_data = inventory
+    st.session_state.map_job_id = job_id
+    st.session_state.map_job_data = inventory
+    st.session_state.map_job_version = frame_version(inventory)
+    st.session_state.map_step = 4 if job['status'] == 'done' else 3
+
+@st.cache_resource
+def load_job_frame(job_id, name):
+    """Shared, not copied per call: job artifacts are read-only and the paged tables key on the frame object"""
+    return get_job_queue().load_frame(job_id, name)
+
+def get_server_recommendations(df):
+    """Per-server sizing: the finished analysis job's results, else the incrementally maintained ones"""
+    job = get_map_job()
+    if job is not None and job['status'] == 'done' and is_map_job_current(df):
+        recommendations = load_job_frame(job['id'], 'recommendations')
+        if recommendations is not None:
+            return recommendations
+    inventory = st.session_state.get('inventory_state')
+    if inventory is not None and inventory.current is df:
+        return inventory.recommendations
+    return analyze_server_inventory(df)
+
+def frame_version(df):
+    """Edit count for frames the incremental inventory updates in place, so indexes over them are rebuilt"""
+    inventory = st.session_state.get('inventory_state')
+    if inventory is not None and (df is inventory.current or df is inventory.recommendations):
+        return inventory.rows_recomputed
+    return 0
+
+def get_bitmap_index(df, key):
+    """Facet bitmaps for a dataset, built once and kept while the same frame is loaded under the key"""
+    indexes = st.session_state.setdefault('bitmap_indexes', {})
+    reused = key in indexes and indexes[key][0] is df and indexes[key][1] == frame_version(df)
+    get_performance_monitor().record_cache("bitmap_index", reused)
+    if not reused:
+        with timed_stage("bitmap_index"):
+            indexes[key] = (df, frame_version(df), BitmapIndex(df))
+    return indexes[key][2]
+
+def show_slice_filter(facet_index, key):
+    """One multiselect per indexed facet column; returns the selection bitmap, or None when nothing is filtered"""
+    if not facet_index.columns:
+        return None
+    facets = {}
+    with st.expander("🔎 Slice Results", expanded=False):
+        cols = st.columns(len(facet_index.columns))
+        for col, column in zip(cols, facet_index.columns):
+            with col:
+                selected = st.multiselect(column.replace('_', ' '), list(facet_index.values(column)), key=f"{key}_slice_{column}")
+            if selected:
+                facets[column] = selected
+    if not facets:
+        return None
+    with timed_stage("bitmap_slice"):
+        selection = facet_index.select(facets)
+    st.caption(f"Showing {facet_index.count(selection):,} of {facet_index.n_rows:,} servers")
+    return selection
+
+def facet_match_count(facet_index, selection, df, column, text):
+    """Servers in the slice whose column contains text; a scan only if the column is not indexed"""
+    if column in facet_index.columns:
+        return facet_index.count(facet_index.contains(column, text, selection))
+    return int(df[column].str.contains(text, na=False, case=False).sum())
+
+def facet_counts(facet_index, selection, df, column):
+    """Chart rows per category of the slice"""
+    if column in facet_index.columns:
+        return counts_frame(facet_index.counts(column, selection), column)
+    return category_counts(df[column], column)
+
+def get_paged_table(df, key):
+    """Sort orders and filter codes for a result table, rebuilt when a different frame is shown under the key"""
+    tables = st.session_state.setdefault('paged_tables', {})
+    reused = key in tables and tables[key][0] == frame_version(df) and tables[key][1].df is df
+    get_performance_monitor().record_cache("paged_table", reused)
+    if not reused:
+        tables[key] = (frame_version(df), PagedTable(df))
+    return tables[key][1]
+
+@st.fragment
+def show_paged_table(df, key, page_size=50, column_config=None):
+    """Sortable, filterable table that keeps the frame server-side and sends only the visible page"""
+    table = get_paged_table(df, key)
     
+    col1, col2, col3 = st.columns([3, 1, 3])
     with col1:
-        if st.button("🖥️ Windows Optimization Report"):
-            st.success("Windows specialization report generated!")
+        sort_by = st.selectbox("Sort by", ["(original order)"] + list(df.columns), key=f"{key}_sort")
     with col2:
-        if st.button("💾 Storage Migration Plan"):
-            st.success("Detailed storage migration plan exported!")
+        descending = st.toggle("Descending", key=f"{key}_descending")
     with col3:
-        if st.button("💰 Licensing Business Case"):
-            st.success("Windows licensing ROI analysis exported!")
+        search_columns = table.search_columns()
+        search_text = st.text_input(f"Search {', '.join(search_columns)}", key=f"{key}_search") if search_columns else ""
+    
+    facets, ranges = {}, {}
+    with st.expander("Filters"):
+        for column, values in table.facet_columns().items():
+            selected = st.multiselect(column, list(values), key=f"{key}_facet_{column}")
+            if selected:
+                facets[column] = selected
+        numeric = table.numeric_columns()
+        if numeric:
+            range_column = st.selectbox("Range filter", ["(none)"] + numeric, key=f"{key}_range_column")
+            if range_column != "(none)":
+                low, high = table.value_range(range_column)
+                if low < high:
+                    ranges[range_column] = st.slider(range_column, low, high, (low, high), key=f"{key}_range_{range_column}")
+    
+    with timed_stage("paged_table"):
+        mask = table.mask(facets, ranges, (search_columns, search_text) if search_text else None)
+        matching = len(table) if mask is None else int(mask.sum())
+        pages = max((matching + page_size - 1) // page_size, 1)
+        page = min(st.number_input(f"Page (of {pages:,})", min_value=1, value=1, key=f"{key}_page"), pages) - 1
+        rows, matching = table.query(None if sort_by == "(original order)" else sort_by, not descending, mask, page, page_size)
+    st.dataframe(rows, use_container_width=True, hide_index=True, column_config=column_config)
+    
+    first = page * page_size
+    filtered = f" (filtered from {len(table):,})" if mask is not None else ""
+    st.caption(f"Rows {min(first + 1, matching):,}–{first + len(rows):,} of {matching:,}{filtered}")
 
-def create_windows_storage_sample_data():
-    """Create sample data for Windows storage analysis"""
-    import random
-    
-    file_servers = []
-    server_types = ['Finance-FS', 'HR-FS', 'Engineering-FS', 'Marketing-FS', 'Archive-FS', 'Backup-FS', 'Shared-FS']
-    
-    for i, server_type in enumerate(server_types):
-        capacity = random.choice([500, 1000, 2000, 4000, 8000])
-        used_pct = random.randint(60, 90)
-        used_gb = int(capacity * used_pct / 100)
-        
-        file_servers.append({
-            'Server_Name': f"{server_type}-{i+1:02d}",
-            'Server_Type': server_type.split('-')[0],
-            'Capacity_GB': capacity,
-            'Used_GB': used_gb,
-            'Free_GB': capacity - used_gb,
-            'Utilization_%': used_pct,
-            'Access_Pattern': random.choice(['High', 'Medium', 'Low']),
-            'Backup_Required': random.choice([True, False]),
-            'Compliance_Data': random.choice([True, False])
-        })
+EXPORT_FORMAT_OPTIONS = {"CSV": "csv", "Parquet": "parquet", "Excel (XLSX)": "xlsx"}
+
+@st.fragment
+def show_export_buttons(reports, key):
+    """Render one download button per (label, report name, tables) entry; switching format reruns only this fragment"""
+    format_label = st.radio("Export format", list(EXPORT_FORMAT_OPTIONS), horizontal=True, key=f"{key}_format")
+    fmt = EXPORT_FORMAT_OPTIONS[format_label]
+    exporter = get_report_exporter()
+    
+    cols = st.columns(len(reports))
+    for i, (col, (label, report_name, frames)) in enumerate(zip(cols, reports)):
+        with col:
+            # The file is written (or pulled from the export cache) only when the button is clicked
+            st.download_button(
+                label=label,
+                data=lambda report_name=report_name, frames=frames: timed_export(exporter, report_name, frames, fmt),
+                file_name=exporter.file_name(report_name, frames, fmt),
+                mime=exporter.mime_type(frames, fmt),
+                key=f"{key}_{i}"
+            )
+
+def timed_export(exporter, report_name, frames, fmt):
+    with timed_stage(f"export_{fmt}"):
+        return exporter.open(report_name, frames, fmt)
+
+def show_scenario_controls(key):
+    """What-if inputs for the cost model; returns them in CostScenarioEngine's terms"""
+    regions = list(REGION_PRICE_MULTIPLIERS)
+    default_region = st.session_state.get('project_info', {}).get('region', 'us-east-1')
     
-    # Add more servers to reach 15
-    for i in range(len(file_servers), 15):
-        capacity = random.choice([500, 1000, 2000])
-        used_pct = random.randint(50, 85)
-        used_gb = int(capacity * used_pct / 100)
-        
-        file_servers.append({
-            'Server_Name': f"FileServer-{i+1:02d}",
-            'Server_Type': random.choice(['Department', 'Project', 'Archive']),
-            'Capacity_GB': capacity,
-            'Used_GB': used_gb,
-            'Free_GB': capacity - used_gb,
-            'Utilization_%': used_pct,
-            'Access_Pattern': random.choice(['High', 'Medium', 'Low']),
-            'Backup_Required': random.choice([True, False]),
-            'Compliance_Data': random.choice([True, False])
-        })
+    with st.expander("⚙️ What-if Scenario", expanded=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            region = st.selectbox("AWS Region", regions, index=regions.index(default_region), key=f"{key}_region")
+        with col2:
+            ri_term = st.selectbox("Reserved Instance Term", list(RI_TERM_DISCOUNTS), key=f"{key}_ri_term")
+        with col3:
+            coverage = st.slider("Hybrid Benefit Coverage (%)", 0, 100, 100, 5, key=f"{key}_hybrid_benefit")
+        with col4:
+            discount = st.slider("Negotiated Discount (%)", 0, 30, 0, 1, key=f"{key}_discount")
+    
+    return {
+        'region': region,
+        'ri_term': ri_term,
+        'hybrid_benefit_coverage': coverage / 100,
+        'enterprise_discount': discount / 100
+    }
+
+def get_scenario_engine(key, inventory):
+    """Session-scoped scenario engine for a fleet; its sizing and licensing nodes are shared by every step that
+    prices the fleet, whatever the what-if inputs"""
+    state_key = f"{key}_scenario"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = CostScenarioEngine(inventory)
+    else:
+        st.session_state[state_key].update(inventory=inventory)
+    return st.session_state[state_key]
+
+def get_cost_scenario(key, inventory, inputs):
+    """Scenario engine with the what-if inputs applied; a rerun only recomputes the nodes downstream of changed inputs"""
+    with timed_stage("cost_scenario"):
+        scenario = get_scenario_engine(key, inventory)
+        scenario.update(**inputs)
+        scenario.get('cost_model')
+    return scenario
+
+def show_region_comparison(recommendations):
+    """Every region priced in one pass, cheapest first, against the project's primary region"""
+    primary_region = st.session_state.get('project_info', {}).get('region', 'us-east-1')
+    with timed_stage("region_comparison"):
+        comparison = get_inventory_analyzer().compare_regions(recommendations, primary_region)
+    
+    cheapest = comparison.iloc[0]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Cheapest Region", cheapest['Region'], delta=f"${cheapest['vs Primary Region']:,.0f}/month vs {primary_region}",
+                  delta_color="inverse")
+    with col2:
+        st.metric("Primary Region Rank", f"{int(comparison.loc[comparison['Region'] == primary_region, 'Rank'].iloc[0])} of {len(comparison)}")
+    
+    fig = build_figure('bar', comparison, x='Region', y='Total Monthly Cost', color='vs Primary Region (%)',
+                       title=f"Monthly Cost by Region (vs {primary_region})")
+    st.plotly_chart(fig, use_container_width=True)
+    display = format_money_columns(comparison, ['Monthly Compute', 'Monthly License', 'Monthly Storage',
+                                                'Total Monthly Cost', 'vs Primary Region'])
+    display['vs Primary Region (%)'] = display['vs Primary Region (%)'].map(lambda v: f"{v:+.1f}%")
+    display.loc[display['Region'] == primary_region, 'vs Primary Region (%)'] = "Primary"
+    st.dataframe(display, use_container_width=True, hide_index=True)
+
+def get_inventory_anomalies(df):
+    """Suspicious inventory values, re-detected only when the inventory or its edits change"""
+    signature = frame_version(df)
+    cached = st.session_state.get('inventory_anomalies')
+    reused = cached is not None and cached[0] is df and cached[1] == signature
+    get_performance_monitor().record_cache("inventory_anomalies", reused)
+    if not reused:
+        with timed_stage("anomaly_detection"):
+            cached = (df, signature, InventoryValidator().detect_anomalies(df))
+        st.session_state.inventory_anomalies = cached
+    return cached[2]
+
+def get_spot_scores(inventory, sizing, key):
+    """Spot and off-hours scheduling scores for a fleet, rescored only when the inventory changes"""
+    cache = st.session_state.setdefault('spot_scores', {})
+    signature = frame_version(inventory)
+    reused = key in cache and cache[key][0] is inventory and cache[key][1] == signature
+    get_performance_monitor().record_cache("spot_scores", reused)
+    if not reused:
+        with timed_stage("spot_scoring"):
+            cache[key] = (inventory, signature, SpotScorer().score(inventory, sizing))
+    return cache[key][2]
+
+def get_saved_recommendations(assessment_id, updated):
+    """Per-server results of a saved assessment: its finished analysis job's, else its inventory sized again"""
+    cached = st.session_state.get('saved_recommendations')
+    reused = cached is not None and cached[0] == assessment_id and cached[1] == updated
+    get_performance_monitor().record_cache("saved_recommendations", reused)
+    if not reused:
+        checkpoint = get_checkpoint_store().load(assessment_id)
+        state, frames = checkpoint if checkpoint is not None else ({}, {})
+        job = get_job_queue().get(state['map_job_id']) if state.get('map_job_current') else None
+        recommendations = load_job_frame(job['id'], 'recommendations') if job and job['status'] == 'done' else None
+        if recommendations is None and 'server_data' in frames:
+            recommendations = analyze_server_inventory(frames['server_data'])
+        cached = (assessment_id, updated, recommendations)
+        st.session_state.saved_recommendations = cached
+    return cached[2]
+
+def get_assessment_diff(before, after):
+    """Changes from a saved assessment's results to the current ones, recomputed only when either side changes"""
+    signature = frame_version(after)
+    cached = st.session_state.get('assessment_diff')
+    reused = cached is not None and cached[0] is before and cached[1] is after and cached[2] == signature
+    get_performance_monitor().record_cache("assessment_diff", reused)
+    if not reused:
+        with timed_stage("assessment_diff"):
+            cached = (before, after, signature, AssessmentDiff().compare(before, after))
+        st.session_state.assessment_diff = cached
+    return cached[3]
+
+def show_assessment_diff(recommendations):
+    """Added and removed servers, instance changes and cost deltas since a saved assessment"""
+    saved = get_checkpoint_store().list()
+    saved = saved[(saved['Assessment'] != st.session_state.assessment_id) & (saved['Servers'] > 0)]
+    if saved.empty:
+        st.caption("No other saved assessments to compare with yet.")
+        return
+    labels = {row.Assessment: f"{row.Title or 'Untitled'} · {row.Servers:,} rows · {row.Updated:%Y-%m-%d %H:%M}"
+              for row in saved.itertuples()}
+    choice = st.selectbox("Compare with", list(labels), format_func=labels.get, index=None,
+                          placeholder="Choose a saved assessment", key="assessment_diff_choice")
+    if choice is None:
+        return
+    before = get_saved_recommendations(choice, saved.loc[saved['Assessment'] == choice, 'Updated'].iloc[0])
+    if before is None:
+        st.warning("That assessment has no server inventory to compare with.")
+        return
+    diff = get_assessment_diff(before, recommendations)
+    
+    servers = diff['by_change'].set_index('Change')['Servers']
+    total = diff['by_component'].set_index('Component').loc['Total']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Added Servers", f"{servers['Added']:,}")
+    with col2:
+        st.metric("Removed Servers", f"{servers['Removed']:,}")
+    with col3:
+        st.metric("Instance Changes", f"{servers['Instance Changed']:,}")
+    with col4:
+        st.metric("Monthly Cost Change", f"${total['Change']:,.0f}",
+                  delta=None if pd.isna(total['Change (%)']) else f"{total['Change (%)']:+.1f}%", delta_color="inverse")
+    if diff['duplicates']:
+        st.caption(f"{diff['duplicates']:,} repeated Server_Name rows were compared by their last row.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.dataframe(format_money_columns(diff['by_change'], ['Cost Delta']), use_container_width=True, hide_index=True)
+    with col2:
+        st.dataframe(format_money_columns(diff['by_component'], ['Before', 'After', 'Change']),
+                     use_container_width=True, hide_index=True)
+    if not diff['by_family'].empty:
+        fig = build_figure('bar', diff['by_family'], x='Instance_Family', y='Change',
+                           title="Monthly Cost Change by Instance Family")
+        st.plotly_chart(fig, use_container_width=True)
+    if not diff['instance_moves'].empty:
+        st.markdown("**Instance type changes**")
+        st.dataframe(format_money_columns(diff['instance_moves'], ['Cost_Delta']), use_container_width=True, hide_index=True)
+    if diff['changes'].empty:
+        st.success("✅ No server changed since that assessment.")
+        return
+    st.markdown("**Changed servers**")
+    show_paged_table(diff['changes'], "map_assessment_diff",
+                     column_config={column: st.column_config.NumberColumn(format="$%.2f")
+                                    for column in ['Before_Monthly_Cost', 'After_Monthly_Cost', 'Cost_Delta']})
+
+def spot_recommendation(spot_summary):
+    """Key recommendation line for the Spot and scheduling savings"""
+    if not spot_summary['eligible_servers']:
+        return "No dev/test or interruption-tolerant servers identified → add an Environment column to find Spot and scheduling savings"
+    return (f"Move {spot_summary['eligible_servers']:,} dev/test and interruption-tolerant servers to Spot or "
+            f"off-hours schedules → Save ${spot_summary['monthly_savings']:,.0f}/month ({spot_summary['savings_pct']:.0f}%)")
+
+def get_cost_simulation(inventory, sizing, rows, trials):
+    """Monte Carlo cost bands for the inventory or a slice of it, rerun only when the data, slice or trials change"""
+    signature = (frame_version(inventory), None if rows is None else hash(rows.tobytes()), trials)
+    cached = st.session_state.get('map_cost_simulation')
+    reused = cached is not None and cached[0] is inventory and cached[1] == signature
+    get_performance_monitor().record_cache("cost_simulation", reused)
+    if not reused:
+        with timed_stage("cost_simulation"):
+            sliced = inventory if rows is None else inventory.iloc[rows]
+            cached = (inventory, signature, CostSimulator().simulate(sliced, sizing, trials))
+        st.session_state.map_cost_simulation = cached
+    return cached[2]
+
+def show_cost_simulation(simulation):
+    """P10/P50/P90 bands per cost component and the distribution of the fleet total"""
+    st.markdown("#### 🎲 Cost Uncertainty")
+    col1, col2 = st.columns(2)
+    with col1:
+        bands = CostSimulator.bands(simulation)
+        st.dataframe(format_money_columns(bands, ['P10', 'P50', 'P90', 'Current Sizing']), hide_index=True)
+        st.caption(f"{len(simulation['trials']):,} trials. Each server's peak demand, instance choice (cheapest fit "
+                   "or general purpose) and storage growth are sampled; fleet growth and price drift are shared "
+                   "within a trial. Current Sizing is the deterministic estimate for every server's current cores "
+                   "and memory; the bands right-size to demand instead, so they need not contain it.")
+    with col2:
+        fig = build_figure('histogram', simulation['trials'][['Total']], x='Total', nbins=50,
+                           title="Simulated Monthly Cost")
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_cashflow_controls(key):
+    """Business case assumptions for the cash-flow projection"""
+    with st.expander("📅 Business Case Assumptions"):
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            horizon = st.selectbox("Horizon (years)", [1, 2, 3, 4, 5], index=HORIZON_YEARS - 1, key=f"{key}_horizon")
+        with col2:
+            migration_months = st.slider("Migration Ramp (months)", 1, 24, MIGRATION_MONTHS, key=f"{key}_ramp")
+        with col3:
+            growth = st.slider("Annual Growth (%)", 0, 30, round(GROWTH_RATE * 100), key=f"{key}_growth")
+        with col4:
+            discount_rate = st.slider("Discount Rate (%)", 0, 20, round(DISCOUNT_RATE * 100), key=f"{key}_discount_rate")
+        with col5:
+            migration_cost = st.number_input("Migration Cost per Server ($)", 0, 50_000, int(MIGRATION_COST_PER_SERVER),
+                                             100, key=f"{key}_migration_cost")
+    
+    return {
+        'horizon_years': horizon,
+        'migration_months': migration_months,
+        'growth_rate': growth / 100,
+        'discount_rate': discount_rate / 100,
+        'migration_cost': float(migration_cost)
+    }
+
+def get_cashflow_engine(key, scenario, rows, migration_cost):
+    """Cash-flow engine over the scenario's per-server costs, rebuilt only when those costs or the slice change"""
+    server_costs = scenario.get('server_costs')
+    signature = (None if rows is None else hash(rows.tobytes()), migration_cost)
+    engines = st.session_state.setdefault('cashflow_engines', {})
+    reused = key in engines and engines[key][0] is server_costs and engines[key][1] == signature
+    get_performance_monitor().record_cache("cashflow_engine", reused)
+    if not reused:
+        with timed_stage("cashflow_engine"):
+            # Measured against lifting and shifting the same servers, like the savings figures above it
+            current = server_costs['Lift_And_Shift_Monthly_Cost'].to_numpy()
+            reserved = scenario.get('reserved_compute') * (1 - scenario.get('enterprise_discount'))
+            target = server_costs['Optimized_Monthly_Cost'].to_numpy()
+            if rows is not None:
+                current, reserved, target = current[rows], reserved[rows], target[rows]
+            engines[key] = (server_costs, signature, CashflowEngine(current, target, reserved, migration_cost))
+    return engines[key][2]
+
+def evaluate_cashflow_scenarios(engine, inputs, ri_term):
+    """The expected case first, then one assumption varied per scenario, evaluated together"""
+    ramp, growth, rate = inputs['migration_months'], inputs['growth_rate'], inputs['discount_rate']
+    scenarios = [
+        ("Expected", growth, rate, ramp, RI_TERM_MONTHS[ri_term]),
+        ("Twice as long to migrate", growth, rate, min(ramp * 2, 12 * inputs['horizon_years']), RI_TERM_MONTHS[ri_term]),
+        ("No growth", 0.0, rate, ramp, RI_TERM_MONTHS[ri_term]),
+        ("Discount rate +4 pts", growth, rate + 0.04, ramp, RI_TERM_MONTHS[ri_term]),
+        ("No upfront payments", growth, rate, ramp, 0),
+    ]
+    labels, growth, rate, ramp, term = zip(*scenarios)
+    with timed_stage("cashflow"):
+        results = engine.evaluate(inputs['horizon_years'], list(growth), list(rate), list(ramp), list(term))
+    return list(labels), results
+
+def get_fleet_licensing(inventory, key):
+    """Per-server license costs under each licensing model: the fleet's scenario engine node, so the licensing
+    pages, consolidation plan and cost model share one sizing and one result"""
+    with timed_stage("licensing"):
+        return get_scenario_engine(key, inventory).get('licensing')
+
+def get_consolidation_plan(inventory, key):
+    """Bin-packing plan for a fleet's SQL Server instances and Windows VMs, rebuilt with its license costs"""
+    licensing = get_fleet_licensing(inventory, key)
+    plans = st.session_state.setdefault('consolidation_plans', {})
+    reused = key in plans and plans[key][0] is licensing
+    get_performance_monitor().record_cache("consolidation_plan", reused)
+    if not reused:
+        with timed_stage("consolidation"):
+            plans[key] = (licensing, ConsolidationPlanner().plan(inventory, licensing))
+    return plans[key][1]
+
+def consolidation_strategy(plan_row):
+    """One recommendation line for a consolidation summary row"""
+    group = plan_row['Workload Group']
+    if round(plan_row['Monthly Savings']) == 0:
+        return f"{group}: already licensed as densely as consolidation would allow"
+    if plan_row['Monthly Savings'] > 0:
+        return (f"Consolidate {plan_row['Workloads']:,} {group} workloads onto {plan_row['Targets Needed']:,} x "
+                f"{plan_row['Target']} (${plan_row['Monthly Savings']:,.0f}/month less in licenses)")
+    return (f"Keep per-server licensing for {group}: {plan_row['Target']} consolidation would add "
+            f"${-plan_row['Monthly Savings']:,.0f}/month")
+
+def format_money_columns(df, columns):
+    """Whole-dollar strings for the given columns of a display table"""
+    display = df.copy()
+    for column in columns:
+        display[column] = display[column].map(lambda v: "—" if pd.isna(v) else f"-${-v:,.0f}" if v < 0 else f"${v:,.0f}")
+    return display
+
+def format_cost_table(cost_model):
+    """Dollar/percent strings for display; charts keep the numeric frame"""
+    display = format_money_columns(cost_model, ['Monthly Compute', 'Monthly License', 'Monthly Storage', 'Total Monthly Cost'])
+    display['vs Lift & Shift'] = display['vs Lift & Shift'].map(lambda v: "Baseline" if v == 0 else f"{v:+.0%}")
+    return display
+
+def create_windows_licensing_fleet(windows_licensing):
+    """Expand the per-role Windows licensing profile into one inventory row per server"""
+    fleet = windows_licensing.loc[windows_licensing.index.repeat(windows_licensing['Count'])].reset_index(drop=True)
+    return pd.DataFrame({
+        'Server_Name': fleet['Server Type'].str.replace(' ', '-') + '-' + (fleet.groupby('Server Type').cumcount() + 1).astype(str).str.zfill(2),
+        'CPU_Cores': fleet['Cores per Server'],
+        'Memory_GB': fleet['Cores per Server'] * 4,
+        'Storage_GB': 500,
+        'OS': 'Windows Server 2019 ' + fleet['Current Edition'],
+        'Application_Count': 2,
+        'Server_Role': fleet['Server Type']
+    })
+
+# Session keys saved with an assessment checkpoint; data frames are stored as Arrow IPC, the rest as JSON
+CHECKPOINT_PROFILE_KEYS = ['project_info', 'ola_profile', 'one_ola_profile']
+CHECKPOINT_STATE_KEYS = ['page', 'map_step', 'ola_step', 'one_ola_step', 'map_job_id'] + CHECKPOINT_PROFILE_KEYS
+CHECKPOINT_FRAME_KEYS = ['server_data', 'ola_data', 'one_ola_storage', 'one_ola_fleet']
+# Derived from the checkpointed keys and rebuilt on demand
+CHECKPOINT_DERIVED_KEYS = ['map_job_data', 'map_job_version', 'inventory_state', 'inventory_editor', 'ola_upload_key']
+
+@st.cache_resource
+def get_checkpoint_store():
+    return CheckpointStore()
+
+def save_checkpoint():
+    """Persist this session's wizard state and data under its assessment id; unchanged frames are skipped"""
+    state = {key: st.session_state[key] for key in CHECKPOINT_STATE_KEYS if key in st.session_state}
+    frames = {key: st.session_state[key] for key in CHECKPOINT_FRAME_KEYS
+              if isinstance(st.session_state.get(key), pd.DataFrame)}
+    if not frames and not any(key in state for key in CHECKPOINT_PROFILE_KEYS):
+        return
+    if 'map_job_id' in state:
+        state['map_job_current'] = is_map_job_current(st.session_state.get('server_data'))
+    title = next((state[key]['customer'] for key in CHECKPOINT_PROFILE_KEYS if state.get(key, {}).get('customer')), '')
+    with timed_stage("checkpoint_save"):
+        get_checkpoint_store().save(st.session_state.assessment_id, state, frames, title,
+                                    {key: frame_version(frame) for key, frame in frames.items()})
+    if st.query_params.get('assessment') != st.session_state.assessment_id:
+        st.query_params['assessment'] = st.session_state.assessment_id
+
+def open_assessment(assessment_id):
+    """Replace the session's assessment with a checkpointed one; False if there is no such checkpoint"""
+    with timed_stage("checkpoint_restore"):
+        try:
+            checkpoint = get_checkpoint_store().load(assessment_id)
+        except ValueError:
+            checkpoint = None
+    if checkpoint is None:
+        return False
+    state, frames = checkpoint
+    for key in CHECKPOINT_STATE_KEYS + CHECKPOINT_FRAME_KEYS + CHECKPOINT_DERIVED_KEYS:
+        st.session_state.pop(key, None)
+    # The analysis job is reused only if the inventory was not edited after it was submitted
+    map_job_current = state.pop('map_job_current', False)
+    st.session_state.update(state)
+    st.session_state.update(frames)
+    if map_job_current and 'server_data' in frames:
+        st.session_state.map_job_data = frames['server_data']
+        st.session_state.map_job_version = frame_version(frames['server_data'])
+    st.session_state.assessment_id = assessment_id
+    st.query_params['assessment'] = assessment_id
+    if 'map_job_id' in state:
+        st.query_params['map_job'] = state['map_job_id']
+    elif 'map_job' in st.query_params:
+        del st.query_params['map_job']
+    return True
+
+def show_checkpoint_controls():
+    """Current assessment id and a picker to reopen any other saved assessment"""
+    st.caption(f"Current assessment: `{st.session_state.assessment_id}` (saved automatically)")
+    saved = get_checkpoint_store().list()
+    saved = saved[saved['Assessment'] != st.session_state.assessment_id]
+    if saved.empty:
+        st.caption("No other saved assessments yet.")
+        return
+    labels = {row.Assessment: f"{row.Title or 'Untitled'} · {row.Servers:,} rows · {row.Updated:%Y-%m-%d %H:%M}"
+              for row in saved.itertuples()}
+    choice = st.selectbox("Reopen assessment", list(labels), format_func=labels.get, key="checkpoint_choice")
+    if st.button("Open Assessment"):
+        open_assessment(choice)
+        st.rerun()
+
+@st.cache_resource
+def get_performance_monitor():
+    """One monitor per server process, so the metrics file covers every session"""
+    return PerformanceMonitor()
+
+def timed_stage(name):
+    return get_performance_monitor().timer('stage', name)
+
+def session_state_size():
+    # One pass with a shared seen-set, so frames referenced from several keys count once
+    return estimate_size({key: value for key, value in st.session_state.items()})
+
+def record_session_metrics(monitor):
+    """Fold this session's cache counters and memory footprint into the shared monitor, then flush"""
+    session_id = st.session_state.get('session_id', 'unknown')
+    exporter = get_report_exporter()
+    monitor.observe_cache("report_export", "process", exporter.cache_hits, exporter.cache_misses)
+    for key, value in st.session_state.items():
+        if isinstance(value, DependencyGraph):
+            monitor.observe_cache("cost_scenario_nodes", f"{session_id}:{key}", value.cache_hits, value.cache_misses)
+    if monitor.memory_sample_due(session_id):
+        monitor.record_session_memory(session_id, session_state_size())
+    monitor.flush()
+
+def show_performance_panel(monitor):
+    """Timings, cache hit rates and session memory, replacing the raw session_state dump"""
+    session_id = st.session_state.get('session_id', 'unknown')
+    session_bytes = session_state_size()
+    monitor.record_session_memory(session_id, session_bytes)
+    metrics = monitor.snapshot()
     
-    return pd.DataFrame(file_servers)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Reruns", st.session_state.rerun_count)
+    with col2:
+        st.metric("Session Memory", f"{session_bytes / 2**20:.2f} MB")
+    st.caption(f"{metrics['sessions']} sessions holding {metrics['session_memory_bytes'] / 2**20:.1f} MB; "
+               f"Prometheus metrics in {monitor.metrics_path}")
+    
+    st.markdown("**Wall time**")
+    st.dataframe(metrics['timers'], hide_index=True)
+    st.markdown("**Cache hit rates**")
+    st.dataframe(metrics['caches'], hide_index=True,
+                 column_config={'Hit Rate': st.column_config.NumberColumn(format="percent")})
+    st.markdown("**Session state**")
+    st.dataframe(pd.DataFrame([
+        {'Key': key, 'Type': type(value).__name__, 'Size (KB)': round(estimate_size(value) / 1024, 1)}
+        for key, value in st.session_state.items()
+    ]), hide_index=True)
 
 def show_results_dashboard():
     st.subheader("📈 Results Dashboard")
@@ -1611,24 +2604,7 @@ def show_results_dashboard():
 
 def create_sample_data():
     """Create sample server data for demonstration"""
-    import random
-    
-    server_names = [f"Server{i:03d}" for i in range(1, 51)]
-    os_options = ["Windows Server 2019", "Windows Server 2016", "Linux Ubuntu 20.04", "Linux CentOS 7"]
-    
-    data = []
-    for name in server_names:
-        data.append({
-            'Server_Name': name,
-            'CPU_Cores': random.choice([2, 4, 8, 16]),
-            'Memory_GB': random.choice([8, 16, 32, 64]),
-            'Storage_GB': random.choice([100, 500, 1000, 2000]),
-            'OS': random.choice(os_options),
-            'Application_Count': random.randint(1, 5),
-            'Storage_Type': random.choice(['SSD', 'HDD', 'SAN'])
-        })
-    
-    return pd.DataFrame(data)
+    return FleetGenerator().server_inventory(50)
 
 if __name__ == "__main__":
     main()